@@ -0,0 +1,106 @@
+import os
+import queue
+import threading
+import time
+
+from parse_cache import CHUNK_SIZE, ParseCache
+from traffic_core import report_from_day
+from traffic_metrics import aggregate_file
+
+# Kinds of the (kind, value) messages a BackgroundLoad posts
+PROGRESS = "progress"    # value: (fraction done or None, partial result or None)
+DONE = "done"            # value: the result
+MISSING = "missing"      # value: name of the missing file
+CANCELLED = "cancelled"  # value: None
+FAILED = "failed"        # value: the exception
+
+SNAPSHOT_SECONDS = 0.25  # Minimum time between partial reports while a file is streamed
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class BackgroundLoad(threading.Thread):
+    def __init__(self, function, *args):
+        """
+        Initializes a load that runs on a worker thread and reports through a queue, so a Tk window can
+        poll it with after() instead of blocking its main loop. Call start() to begin.
+        :param function: Called as function(load, *args); reports with load.progress() and returns the result
+        :param args: Further arguments for function
+        """
+        super().__init__(daemon=True)
+        self.function = function
+        self.args = args
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            result = self.function(self, *self.args)
+        except LoadCancelled:
+            self.messages.put((CANCELLED, None))
+        except FileNotFoundError as e:
+            self.messages.put((MISSING, e.filename))
+        except Exception as e:  # Handed to the Tk thread, which reports it
+            self.messages.put((FAILED, e))
+        else:
+            self.messages.put((DONE, result))
+
+    def progress(self, fraction=None, partial=None):
+        """
+        Posts the progress of the load. Raises LoadCancelled once cancel() was called.
+        :param fraction: Share of the work done from 0 to 1, or None when unknown
+        :param partial: Optional partial result, e.g. a DayReport of the rows read so far
+        """
+        if self.cancel_event.is_set():
+            raise LoadCancelled()
+        self.messages.put((PROGRESS, (fraction, partial)))
+
+    def cancel(self):
+        """
+        Asks the load to stop at its next progress report.
+        """
+        self.cancel_event.set()
+
+
+def stream_report(load, file_name, date=None, cache=None, engine="python", store=None, metrics=None,
+                  snapshot_seconds=SNAPSHOT_SECONDS):
+    """
+    Loads the DayReport of a day for a BackgroundLoad. Days in the store or the parse cache are returned
+    directly; otherwise the CSV file is streamed through a TrafficAggregator, posting a partial report
+    every snapshot_seconds so the histogram fills in as the file is read. The streamed day is written to
+    the parse cache once the file is read, unless the load was cancelled.
+    Raises FileNotFoundError when the CSV file does not exist.
+    :param load: The BackgroundLoad running this function
+    :param file_name: Path of the traffic CSV file
+    :param date: Date the file covers, as shown to the user
+    :param cache: ParseCache checked for an up-to-date parsed day and filled on a miss, a default one is
+                  used if omitted
+    :param engine: "python" or "numpy", as returned by available_engine
+    :param store: Optional RollupStore the day is read from, ingesting it first if needed; it holds only the
+                  daily metrics, so it is not used when per-site metrics are given
+    :param metrics: Optional MetricSet of per-site metrics, evaluated with the daily ones
+    :param snapshot_seconds: Minimum time between partial reports
+    """
+    if store is not None and metrics is None:
+        load.progress()
+        return store.load_report(file_name, date, cache, engine)
+
+    cache = cache or ParseCache()
+    day = cache.cached(file_name)
+    if day is not None:
+        return report_from_day(day, date, engine, metrics)
+
+    size = max(os.path.getsize(file_name), 1)
+    snapshot_due = time.perf_counter() + snapshot_seconds
+
+    def progress(consumed, aggregator):
+        nonlocal snapshot_due
+        partial = None
+        if time.perf_counter() >= snapshot_due:
+            partial = aggregator.report(date)
+            snapshot_due = time.perf_counter() + snapshot_seconds
+        load.progress(min(consumed / size, 1.0), partial)
+
+    return aggregate_file(file_name, CHUNK_SIZE, metrics, engine, cache, progress).report(date)
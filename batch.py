@@ -0,0 +1,135 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+
+from instrumentation import collect, merge
+from metric_registry import MetricSet
+from parse_cache import ParseCache, converted_path
+from results_log import ResultsLog, results_record
+from traffic_core import available_engine, date_range_files, file_date, report_from_day
+from traffic_metrics import DEFAULT_METRICS, aggregate_file
+
+
+def process_file(file_name, engine="python", metrics=None, cache=None):
+    """
+    Computes the daily metrics for one file. Days in the parse cache, or packed by traffic_convert.py, are
+    read from there; other files are streamed once, filling the cache as they are read.
+    Runs inside a worker process.
+    :param metrics: Optional MetricSet of per-site metrics, evaluated with the daily ones
+    :param cache: ParseCache to read and fill, a default one is used if omitted
+    :return: Tuple of (file name, row count, byte count, DayReport or None if the file is missing)
+    """
+    cache = cache or ParseCache()
+    try:
+        day = cache.cached(file_name)
+        if day is not None:
+            # The CSV file may have been removed after traffic_convert.py packed it
+            size = os.path.getsize(file_name if os.path.exists(file_name) else converted_path(file_name))
+            return file_name, day.row_count, size, report_from_day(day, engine=engine, metrics=metrics)
+        size = os.path.getsize(file_name)
+        aggregator = aggregate_file(file_name, metrics=metrics, engine=engine, cache=cache)
+    except FileNotFoundError:
+        return file_name, 0, 0, None
+    return file_name, aggregator.vehicle_count, size, aggregator.report()
+
+
+def run_batch(file_names, workers=None, engine="python", results_log=None, metrics=None, cache=None):
+    """
+    Processes the files across a process pool and prints the results in date order.
+    :param file_names: Paths of the traffic CSV files to process
+    :param workers: Number of worker processes, defaults to the CPU count
+    :param engine: "python" or "numpy"
+    :param results_log: Optional ResultsLog receiving one record per dated file
+    :param metrics: Optional MetricSet of per-site metrics, printed after the daily results
+    :param cache: ParseCache read and filled by every worker, a default one is used if omitted
+    :return: List of (file name, result lines) tuples in date order
+    """
+    engine = available_engine(engine)
+    cache = cache or ParseCache()
+
+    # Sort up front so the output order does not depend on which worker finishes first
+    file_names = sorted(set(file_names), key=lambda name: (file_date(name) or datetime.max, name))
+
+    started = time.perf_counter()
+    if len(file_names) == 1 or workers == 1:
+        # Starting worker processes costs more than a single file takes
+        outcomes = [process_file(file_name, engine, metrics, cache) for file_name in file_names]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            count = len(file_names)
+            collected = list(pool.map(collect, [process_file] * count, file_names, [engine] * count,
+                                      [metrics] * count, [cache] * count))
+        # The stages recorded in each worker are added to this process's totals
+        outcomes = []
+        for outcome, summary in collected:
+            merge(summary)
+            outcomes.append(outcome)
+    elapsed = time.perf_counter() - started
+
+    total_rows = total_bytes = processed = 0
+    merged = []
+    for file_name, rows, size, report in outcomes:
+        if report is None:
+            print(f"Error: No file found: {file_name}")
+            continue
+        results = report.results()
+        day = file_date(file_name)
+        if results_log is not None and day is not None:
+            results_log.append(results_record(report, day))
+        processed += 1
+        total_rows += rows
+        total_bytes += size
+        merged.append((file_name, results))
+        print(f"== {file_name} ==")
+        for result in results:
+            print(result)
+
+    if results_log is not None:
+        results_log.close()
+    elapsed = max(elapsed, 1e-9)
+    print(f"Processed {processed} files, {total_rows} rows, {total_bytes / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"({total_rows / elapsed:,.0f} rows/s, {processed / elapsed:.2f} files/s)")
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the daily traffic metrics for many files without a GUI.")
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument("--range", nargs=2, metavar=("START", "END"), help="Inclusive date range as DDMMYYYY DDMMYYYY")
+    selection.add_argument("--glob", help="Glob pattern of CSV files, e.g. 'traffic_data*2024.csv'")
+    parser.add_argument("--directory", default=".", help="Directory holding the files for --range")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--engine", choices=("python", "numpy"), default="python")
+    parser.add_argument("--results-log", metavar="PATH", help="Also write one results record per date to this log")
+    parser.add_argument("--metrics", metavar="JSON", help="File of per-site metric definitions")
+    args = parser.parse_args(argv)
+
+    if args.range:
+        try:
+            file_names = date_range_files(args.range[0], args.range[1], args.directory)
+        except ValueError:
+            parser.error("Dates must use the DDMMYYYY format.")
+    else:
+        file_names = glob.glob(args.glob)
+    metrics = None
+    if args.metrics:
+        try:
+            metrics = MetricSet.from_json(args.metrics, DEFAULT_METRICS)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read metrics: {e}")
+    if not file_names:
+        print("No files to process.")
+        return 1
+
+    run_batch(file_names, args.workers, args.engine, ResultsLog(args.results_log) if args.results_log else None,
+              metrics)
+    return 0
+
+
+# Batch entry point: python batch.py --range 01012024 31122024 --workers 8
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+from datetime import date
+
+from mmap_scan import scan_hourly_counts
+from traffic_generator import generate_day
+from traffic_metrics import ELM_JUNCTION, HANLEY_JUNCTION
+
+
+def readlines_hourly_counts(file_name):
+    """
+    The original histogram path: readlines, a dict per row, then counting.
+    """
+    with open(file_name, 'r') as f:
+        lines = f.readlines()
+    headers = lines[0].strip().split(',')
+    data = [dict(zip(headers, line.strip().split(','))) for line in lines[1:]]
+    traffic_data = {ELM_JUNCTION: [0] * 24, HANLEY_JUNCTION: [0] * 24}
+    for row in data:
+        hour = int(row["timeOfDay"].split(":")[0])
+        if row["JunctionName"] in traffic_data:
+            traffic_data[row["JunctionName"]][hour] += 1
+    return traffic_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mmap hour/junction scanner against the readlines path.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--file", default="bench_traffic_data.csv", help="Synthetic file, generated if missing")
+    parser.add_argument("--skip-readlines", action="store_true", help="Skip the original path, which needs several GB of memory at 10M rows")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"Writing {args.rows} rows to {args.file}...")
+        generate_day(args.file, date(2024, 6, 15), args.rows)
+
+    timings = [("mmap scan", scan_hourly_counts)]
+    if not args.skip_readlines:
+        timings.append(("readlines + dict", readlines_hourly_counts))
+
+    results = []
+    for name, function in timings:
+        started = time.perf_counter()
+        counts = function(args.file)
+        elapsed = time.perf_counter() - started
+        rows = sum(map(sum, counts.values()))
+        results.append(counts)
+        print(f"{name:>18}: {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+    if len(results) == 2 and results[0] != results[1]:
+        print("Warning: the two paths disagree")
+
+
+if __name__ == "__main__":
+    main()
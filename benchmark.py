@@ -0,0 +1,228 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from traffic_generator import generate_day
+
+BENCH_DATE = datetime(2024, 6, 15)
+DATA_DIRECTORY = ".bench_data"
+OUTPUT_PATH = "benchmark_results.jsonl"
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+STARTUP_MODULES = ("batch", "traffic_core", "histogram_export", "data_loop", "looping_data")
+STARTUP_REPEAT = 5
+
+
+def bench_file(rows, directory=DATA_DIRECTORY, seed=0):
+    """
+    Returns the directory holding the generated benchmark file of a size, generating it on first use.
+    """
+    size_directory = os.path.abspath(os.path.join(directory, str(rows)))
+    path = os.path.join(size_directory, f"traffic_data{BENCH_DATE.strftime('%d%m%Y')}.csv")
+    if not os.path.exists(path):
+        os.makedirs(size_directory, exist_ok=True)
+        print(f"Generating {rows} rows into {path}...", file=sys.stderr)
+        generate_day(path, BENCH_DATE, rows, seed)
+    return size_directory
+
+
+def measure(function, memory=True):
+    """
+    Times one call, then repeats it under tracemalloc for the peak Python memory when memory is set,
+    so the tracing overhead does not skew the timing.
+    :return: Tuple of (seconds, peak bytes or None)
+    """
+    started = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - started
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def processing_cases(engine):
+    """
+    Returns (name, setup) pairs; setup receives a scratch directory and returns the function to time.
+    Each case runs with the benchmark file's directory as the working directory.
+    """
+    from data_loop import MultiCSVProcessor as HourlyProcessor
+    from looping_data import MultiCSVProcessor as SummaryProcessor
+    from mmap_scan import scan_hourly_counts
+    from parse_cache import ParseCache
+    from results_log import ResultsLog
+
+    file_name = f"traffic_data{BENCH_DATE.strftime('%d%m%Y')}.csv"
+    date = BENCH_DATE.strftime("%d/%m/%Y")
+
+    def cold(scratch):
+        def run():
+            # A fresh cache directory each call so every run parses the CSV
+            cache = ParseCache(os.path.join(scratch, f"cache_{time.perf_counter_ns()}"))
+            HourlyProcessor(engine, cache).process_csv(file_name, date)
+        return run
+
+    def warm(scratch):
+        processor = HourlyProcessor(engine, ParseCache(os.path.join(scratch, "cache")))
+        processor.process_csv(file_name, date)
+        return lambda: processor.process_csv(file_name, date)
+
+    def summary(scratch):
+        processor = SummaryProcessor(engine, ParseCache(os.path.join(scratch, "cache")),
+                                     results_log=ResultsLog(os.path.join(scratch, "results.jsonl")))
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                processor.load_csv_file(BENCH_DATE.strftime("%d%m%Y"))
+        return run
+
+    def scan(scratch):
+        return lambda: scan_hourly_counts(file_name)
+
+    return [
+        ("data_loop.process_csv (cold cache)", cold),
+        ("data_loop.process_csv (warm cache)", warm),
+        ("looping_data.load_csv_file (warm cache)", summary),
+        ("mmap_scan.scan_hourly_counts", scan),
+    ]
+
+
+def draw_time(engine, scratch):
+    """
+    Times HistogramApp.draw_histogram on a real canvas: the first draw creates every item, the second
+    applies the differences after the data changed.
+    :return: Dictionary of timings in seconds, or None when no display is available
+    """
+    import tkinter as tk
+    from data_loop import HistogramApp
+    from parse_cache import ParseCache
+    from traffic_core import load_report
+
+    report = load_report(f"traffic_data{BENCH_DATE.strftime('%d%m%Y')}.csv", "bench",
+                         ParseCache(os.path.join(scratch, "cache")), engine)
+    app = HistogramApp.from_report(report)
+    try:
+        app.setup_window()
+    except tk.TclError as e:
+        print(f"Skipping the canvas benchmark: {e}", file=sys.stderr)
+        return None
+    try:
+        started = time.perf_counter()
+        app.draw_histogram()
+        app.root.update_idletasks()
+        first = time.perf_counter() - started
+
+        changed = {junction: [count + 1 for count in hours] for junction, hours in app.traffic_data.items()}
+        app.set_data(changed, app.date)
+        started = time.perf_counter()
+        app.draw_histogram()
+        app.root.update_idletasks()
+        update = time.perf_counter() - started
+        return {"first_draw_seconds": first, "update_draw_seconds": update,
+                "changed_items": app.renderer.last_sync_changes}
+    finally:
+        app.close()
+
+
+def startup_time(module, repeat=STARTUP_REPEAT):
+    """
+    Times a fresh interpreter importing one of the project modules, as every short batch invocation does.
+    :return: Tuple of (best seconds, modules the import pulled in that are slow to load)
+    """
+    source_directory = os.path.dirname(os.path.abspath(__file__))
+    check = (f"import sys, time; started = time.perf_counter(); import {module}; "
+             "print(time.perf_counter() - started); print(' '.join(sorted({'tkinter', 'numpy'} & set(sys.modules))))")
+    best = None
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", check], cwd=source_directory, capture_output=True, text=True,
+                                check=True).stdout.splitlines()
+        seconds = float(output[0])
+        heavy = output[1].split() if len(output) > 1 else []
+        best = seconds if best is None else min(best, seconds)
+    return best, heavy
+
+
+def run_benchmarks(sizes, engine="python", memory=True, canvas=True, directory=DATA_DIRECTORY, startup=True):
+    """
+    Runs every case for every size.
+    :return: The benchmark run as a JSON-serializable dictionary
+    """
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": engine,
+        "results": [],
+    }
+    if startup:
+        for module in STARTUP_MODULES:
+            seconds, heavy = startup_time(module)
+            run["results"].append({"case": f"import {module} (cold start)", "seconds": round(seconds, 6),
+                                   "heavy_imports": heavy})
+            print(f"{'import ' + module + ' (cold start)':>42}: {seconds * 1000:8.1f} ms"
+                  + (f" (loads {', '.join(heavy)})" if heavy else ""), file=sys.stderr)
+    original_directory = os.getcwd()
+    for rows in sizes:
+        size_directory = bench_file(rows, directory)
+        with tempfile.TemporaryDirectory() as scratch:
+            os.chdir(size_directory)
+            try:
+                for name, setup in processing_cases(engine):
+                    seconds, peak = measure(setup(scratch), memory)
+                    run["results"].append({"case": name, "rows": rows, "seconds": round(seconds, 6),
+                                           "rows_per_second": round(rows / seconds) if seconds else None,
+                                           "peak_memory_bytes": peak})
+                    print(f"{name:>42} {rows:>10} rows: {seconds:8.3f}s {rows / max(seconds, 1e-9):>14,.0f} rows/s"
+                          + (f" {peak / 1e6:9.1f} MB peak" if peak is not None else ""), file=sys.stderr)
+                if canvas:
+                    timings = draw_time(engine, scratch)
+                    if timings is not None:
+                        run["results"].append({"case": "data_loop.HistogramApp.draw_histogram", "rows": rows, **timings})
+                        print(f"{'data_loop.HistogramApp.draw_histogram':>42} {rows:>10} rows: "
+                              f"{timings['first_draw_seconds'] * 1000:.1f} ms first, "
+                              f"{timings['update_draw_seconds'] * 1000:.1f} ms update", file=sys.stderr)
+            finally:
+                os.chdir(original_directory)
+    return run
+
+
+# Example: python benchmark.py --rows 10000 100000 1000000 --engine numpy
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the traffic pipelines on generated data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_SIZES), help="File sizes in rows")
+    parser.add_argument("--engine", choices=("python", "numpy"), default="python")
+    parser.add_argument("--data-directory", default=DATA_DIRECTORY, help="Where generated files are kept")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="JSON Lines file each run is appended to")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+    parser.add_argument("--no-canvas", action="store_true", help="Skip the Tk canvas benchmark")
+    parser.add_argument("--no-startup", action="store_true", help="Skip the cold start import timings")
+    args = parser.parse_args()
+
+    result = run_benchmarks(args.rows, args.engine, not args.no_memory, not args.no_canvas, args.data_directory,
+                            not args.no_startup)
+    with open(args.output, "a") as output:
+        output.write(json.dumps(result) + "\n")
+    print(json.dumps(result, indent=2))
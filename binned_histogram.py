@@ -0,0 +1,235 @@
+import argparse
+import math
+import os
+
+from binned_series import DAY_SECONDS, BinnedSeries
+from canvas_renderer import HistogramWindow
+from parse_cache import ParseCache
+from traffic_core import date_range_files, file_date
+
+PALETTE = ("#2ca02c", "#d62728", "#1f77b4", "#ff7f0e", "#9467bd", "#8c564b",
+           "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+TICK_STEPS = (60, 300, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400, 2 * 86400, 7 * 86400)
+TICK_MIN_PX = 80     # Minimum spacing between time labels
+LABEL_MIN_PX = 28    # Minimum width a value label needs per series
+LEGEND_COLUMNS = 4
+
+
+class BinnedHistogramApp(HistogramWindow):
+    def __init__(self, series, title, canvas_width=1200):
+        """
+        Initializes a level-of-detail histogram of binned vehicle counts.
+        At most one value per pixel column is drawn, each series as a single step line, so the number of
+        canvas items depends on the canvas width and not on the number of bins.
+        :param series: BinnedSeries to show
+        :param title: Heading of the window
+        :param canvas_width: Width of the canvas in pixels
+        """
+        super().__init__()
+        self.canvas_width = canvas_width
+        self.title = title
+        self._bound = False
+        self.set_series(series)
+
+    def set_series(self, series, keep_view=False):
+        """
+        Replaces the series shown by the next draw, showing every bin unless keep_view is set and the
+        new series has the same bins.
+        """
+        keep_view = keep_view and getattr(self, "series", None) is not None and series.bin_count == self.series.bin_count
+        self.series = series
+        if not keep_view:
+            self.first, self.last = 0, max(series.bin_count, 1)
+        legend_rows = -(-len(series.names()) // LEGEND_COLUMNS)
+        self.plot_left = 70
+        self.plot_right = self.canvas_width - 30
+        self.plot_top = 60 + legend_rows * 22 + 30
+        self.plot_bottom = self.plot_top + 420
+        self.canvas_height = self.plot_bottom + 80
+
+    def set_view(self, first, last):
+        """
+        Shows the bins [first, last), clamped to the series.
+        """
+        count = max(self.series.bin_count, 1)
+        width = min(max(1, last - first), count)
+        first = min(max(0, first), count - width)
+        self.first, self.last = first, first + width
+
+    def zoom(self, factor, center=None):
+        """
+        Zooms in (factor < 1) or out (factor > 1) around a bin, the middle of the view by default.
+        """
+        center = (self.first + self.last) / 2 if center is None else center
+        width = max(1, round((self.last - self.first) * factor))
+        first = round(center - width * (center - self.first) / (self.last - self.first))
+        self.set_view(first, first + width)
+
+    def pan(self, fraction):
+        """
+        Moves the view by a fraction of its width.
+        """
+        step = max(1, round((self.last - self.first) * abs(fraction)))
+        step = step if fraction > 0 else -step
+        self.set_view(self.first + step, self.last + step)
+
+    def window_title(self):
+        return self.title
+
+    def heading_shapes(self):
+        """
+        Returns the main heading.
+        """
+        return [
+            ("heading", "text", (self.canvas_width // 2, 30),
+             {"text": self.title, "font": ("Arial", 16, "bold"), "fill": "black"})
+        ]
+
+    def _bin_label(self, index, with_day):
+        day, seconds = self.series.bin_start(index)
+        time_label = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}"
+        if with_day and day < len(self.series.day_labels):
+            return f"{self.series.day_labels[day]} {time_label}"
+        return time_label
+
+    def histogram_shapes(self):
+        """
+        Returns one step line per series over the visible bins, plus time ticks, axes and, when there is
+        room, value labels.
+        """
+        plot_width = self.plot_right - self.plot_left
+        plot_height = self.plot_bottom - self.plot_top
+        edges, values = self.series.downsample(self.first, self.last, plot_width)
+        columns = len(edges) - 1
+        visible = self.last - self.first
+        peak = max(self.series.peak(self.first, self.last), 1)
+        xs = [self.plot_left + plot_width * (edge - self.first) / visible for edge in edges]
+        shapes = []
+
+        for index, (name, column_values) in enumerate(values.items()):
+            coords = []
+            for column, value in enumerate(column_values):
+                y = self.plot_bottom - plot_height * value / peak
+                coords.extend((xs[column], y, xs[column + 1], y))
+            if len(coords) == 4:
+                coords.extend(coords[2:])  # A line needs two points even for a single bin
+            shapes.append((("series", name), "line", tuple(coords),
+                           {"fill": PALETTE[index % len(PALETTE)], "width": 2}))
+
+        # Value labels only when every series has room for its own label in each column
+        column_px = plot_width / columns
+        if columns == visible and column_px >= LABEL_MIN_PX * len(values):
+            for index, (name, column_values) in enumerate(values.items()):
+                for column, value in enumerate(column_values):
+                    x = xs[column] + column_px * (index + 0.5) / len(values)
+                    y = self.plot_bottom - plot_height * value / peak
+                    shapes.append((("value", index, column), "text", (x, y - 4),
+                                   {"text": str(value), "anchor": "s", "font": ("Arial", 8),
+                                    "fill": PALETTE[index % len(PALETTE)]}))
+
+        # Time ticks, at most one every TICK_MIN_PX pixels
+        px_per_second = plot_width / (visible * self.series.bin_seconds)
+        step = next((step for step in TICK_STEPS
+                     if step % self.series.bin_seconds == 0 and step * px_per_second >= TICK_MIN_PX), None)
+        if step is None:
+            step = TICK_STEPS[-1] * math.ceil(TICK_MIN_PX / (TICK_STEPS[-1] * px_per_second))
+        bins_per_tick = step // self.series.bin_seconds
+        with_day = len(self.series.day_labels) > 1
+        for slot, index in enumerate(range(-(-self.first // bins_per_tick) * bins_per_tick, self.last + 1, bins_per_tick)):
+            x = self.plot_left + plot_width * (index - self.first) / visible
+            shapes.append((("tick", slot), "line", (x, self.plot_bottom, x, self.plot_bottom + 5), {}))
+            shapes.append((("tick_label", slot), "text", (x, self.plot_bottom + 8),
+                           {"text": self._bin_label(index, with_day), "anchor": "n", "font": ("Arial", 9)}))
+
+        shapes.append(("x_axis", "line", (self.plot_left, self.plot_bottom, self.plot_right, self.plot_bottom), {}))
+        shapes.append(("y_axis", "line", (self.plot_left, self.plot_top, self.plot_left, self.plot_bottom), {}))
+        shapes.append(("y_peak", "text", (self.plot_left - 6, self.plot_top),
+                       {"text": str(peak), "anchor": "e", "font": ("Arial", 9)}))
+        detail = "one bin per column" if columns == visible else "busiest bin per pixel column"
+        shapes.append(("x_label", "text", (self.canvas_width // 2, self.plot_bottom + 45), {
+            "text": f"{self.series.bin_seconds // 60}-minute bins {self._bin_label(self.first, with_day)} to "
+                    f"{self._bin_label(self.last - 1, with_day)} ({visible} bins, {detail})",
+            "anchor": "center", "font": ("Arial", 11)}))
+        return shapes
+
+    def legend_shapes(self):
+        """
+        Returns the legend, LEGEND_COLUMNS series per row.
+        """
+        shapes = []
+        column_width = (self.canvas_width - 100) // LEGEND_COLUMNS
+        for index, name in enumerate(self.series.names()):
+            row, column = divmod(index, LEGEND_COLUMNS)
+            x, y = 55 + column * column_width, 60 + row * 22
+            shapes.append((("swatch", index), "rectangle", (x, y, x + 16, y + 16), {"fill": PALETTE[index % len(PALETTE)]}))
+            shapes.append((("name", index), "text", (x + 24, y + 8), {"text": name, "anchor": "w", "font": ("Arial", 10)}))
+        return shapes
+
+    def setup_window(self):
+        """
+        Sets up the window and binds the keys and mouse wheel that pan and zoom the view.
+        """
+        super().setup_window()
+        if not self._bound:
+            bindings = {
+                "<Left>": lambda event: self.pan(-0.25), "<Right>": lambda event: self.pan(0.25),
+                "<plus>": lambda event: self.zoom(0.5), "<equal>": lambda event: self.zoom(0.5),
+                "<minus>": lambda event: self.zoom(2), "<Home>": lambda event: self.set_view(0, self.series.bin_count),
+                "<Button-4>": lambda event: self.zoom(0.8, self._bin_at(event.x)),
+                "<Button-5>": lambda event: self.zoom(1.25, self._bin_at(event.x)),
+                "<MouseWheel>": lambda event: self.zoom(0.8 if event.delta > 0 else 1.25, self._bin_at(event.x)),
+            }
+            for sequence, action in bindings.items():
+                self.root.bind(sequence, lambda event, action=action: (action(event), self.draw_histogram()))
+            self._bound = True
+
+    def _bin_at(self, x):
+        fraction = (x - self.plot_left) / (self.plot_right - self.plot_left)
+        return self.first + min(max(fraction, 0), 1) * (self.last - self.first)
+
+    def close(self):
+        super().close()
+        self._bound = False
+
+    def refresh(self, series):
+        """
+        Replaces the series, keeping the current view when the bins are unchanged.
+        """
+        self.set_series(series, keep_view=True)
+        self.draw_histogram()
+
+
+def load_series(file_names, bin_seconds, junctions=None, cache=None):
+    """
+    Bins the traffic CSV files of consecutive days, leaving missing days empty.
+    """
+    cache = cache or ParseCache()
+    days = []
+    labels = []
+    for file_name in file_names:
+        date = file_date(file_name)
+        labels.append(date.strftime("%d/%m") if date else os.path.basename(file_name))
+        try:
+            days.append(cache.load(file_name))
+        except FileNotFoundError:
+            print(f"File not found: {file_name}")
+            days.append(None)
+    return BinnedSeries.from_days(days, bin_seconds, labels, junctions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show vehicle counts in fine time bins over one or more days.")
+    parser.add_argument("start", metavar="DDMMYYYY", help="First date")
+    parser.add_argument("end", metavar="DDMMYYYY", nargs="?", help="Last date, the first date when omitted")
+    parser.add_argument("--bin", type=int, default=5, help="Bin width in minutes, e.g. 1, 5 or 15")
+    parser.add_argument("--junction", action="append", help="Junction to show, repeatable; all when omitted")
+    parser.add_argument("--directory", default=".")
+    args = parser.parse_args()
+    if args.bin <= 0 or DAY_SECONDS % (args.bin * 60):
+        parser.error(f"--bin must be a positive number of minutes that divides a day evenly, not {args.bin}")
+
+    files = date_range_files(args.start, args.end or args.start, args.directory)
+    app = BinnedHistogramApp(load_series(files, args.bin * 60, args.junction),
+                             f"Vehicles per {args.bin} minutes ({args.start} to {args.end or args.start})")
+    app.run()
+    app.close()
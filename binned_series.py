@@ -0,0 +1,126 @@
+from array import array
+
+from parse_cache import TIME_COLUMN
+
+DAY_SECONDS = 86400
+
+
+def _build_levels(counts):
+    """
+    Builds a max pyramid over one series: level 0 holds the bins and each level above holds the
+    maximum of pairs of entries from the level below.
+    """
+    levels = [counts]
+    while len(levels[-1]) > 1:
+        below = levels[-1]
+        above = array('l', map(max, below[0::2], below[1::2]))
+        if len(below) % 2:
+            above.append(below[-1])
+        levels.append(above)
+    return levels
+
+
+def _range_max(levels, first, last):
+    """
+    Returns the largest bin in [first, last) from a max pyramid, reading O(log n) entries.
+    """
+    best = 0
+    level = 0
+    while first < last:
+        if first & 1:
+            best = max(best, levels[level][first])
+            first += 1
+        if last & 1:
+            last -= 1
+            best = max(best, levels[level][last])
+        first >>= 1
+        last >>= 1
+        level += 1
+    return best
+
+
+class BinnedSeries:
+    def __init__(self, bin_seconds, counts, day_labels=None):
+        """
+        Initializes vehicle counts binned over one or more consecutive days.
+        :param bin_seconds: Width of one bin in seconds, dividing a day evenly (60, 300, 900, 3600, ...)
+        :param counts: Dictionary of series name (e.g. junction) to its counts per bin, all the same length
+        :param day_labels: Optional label per day, such as its date
+        """
+        if DAY_SECONDS % bin_seconds:
+            raise ValueError(f"Bin width must divide a day evenly: {bin_seconds}")
+        self.bin_seconds = bin_seconds
+        self.counts = {name: array('l', values) for name, values in counts.items()}
+        self.bin_count = len(next(iter(self.counts.values()), ()))
+        self.day_labels = day_labels or []
+        self._levels = {name: _build_levels(values) for name, values in self.counts.items()}
+
+    @classmethod
+    def from_days(cls, days, bin_seconds, day_labels=None, names=None):
+        """
+        Bins the vehicles of consecutive ParsedDays per junction.
+        :param days: List of ParsedDay in date order; None stands for a day without data
+        :param bin_seconds: Width of one bin in seconds
+        :param day_labels: Optional label per day
+        :param names: Junctions to include, every junction seen when omitted
+        """
+        bins_per_day = DAY_SECONDS // bin_seconds
+        counts = {name: array('l', [0]) * (bins_per_day * len(days)) for name in names or ()}
+        for index, day in enumerate(days):
+            if day is None:
+                continue
+            base = index * bins_per_day
+            vocabulary = day.vocabularies['JunctionName']
+            targets = []
+            for name in vocabulary:
+                if names is None and name not in counts:
+                    counts[name] = array('l', [0]) * (bins_per_day * len(days))
+                targets.append(counts.get(name))
+            for code, seconds in zip(day.columns['JunctionName'], day.columns[TIME_COLUMN]):
+                target = targets[code]
+                if target is not None:
+                    target[base + seconds // bin_seconds] += 1
+        return cls(bin_seconds, dict(sorted(counts.items())), day_labels)
+
+    def rebin(self, factor):
+        """
+        Returns a coarser series whose bins each sum factor bins of this one.
+        """
+        counts = {}
+        for name, values in self.counts.items():
+            counts[name] = array('l', (sum(values[i:i + factor]) for i in range(0, len(values), factor)))
+        return BinnedSeries(self.bin_seconds * factor, counts, self.day_labels)
+
+    def names(self):
+        return list(self.counts)
+
+    def bin_start(self, index):
+        """
+        Returns (day index, seconds since midnight) at which a bin starts.
+        """
+        return divmod(index * self.bin_seconds, DAY_SECONDS)
+
+    def peak(self, first=0, last=None):
+        """
+        Returns the largest count of any series in the bins [first, last).
+        """
+        last = self.bin_count if last is None else last
+        return max((_range_max(levels, first, last) for levels in self._levels.values()), default=0)
+
+    def downsample(self, first, last, columns):
+        """
+        Reduces the bins [first, last) to at most one value per pixel column.
+        Each column holds the busiest bin it covers, so short peaks stay visible and the y-scale stays
+        in vehicles per bin. The cost depends on the number of columns, not on the number of bins.
+        :return: Tuple of (bin edges of the columns, dictionary of series name to one value per column)
+        """
+        visible = last - first
+        columns = max(1, min(columns, visible))
+        edges = [first + visible * column // columns for column in range(columns + 1)]
+        values = {}
+        for name, levels in self._levels.items():
+            if columns == visible:
+                values[name] = levels[0][first:last].tolist()
+            else:
+                values[name] = [_range_max(levels, a, b) for a, b in zip(edges, edges[1:])]
+        return edges, values
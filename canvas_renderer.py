@@ -0,0 +1,275 @@
+import queue
+import time
+from abc import ABC, abstractmethod
+
+from background_load import PROGRESS
+from instrumentation import record, stage
+
+LOAD_POLL_MS = 50      # Delay between checks of a background load's messages
+COMMAND_POLL_MS = 100  # Delay between checks for commands sent to serve()
+
+
+class CanvasRenderer:
+    def __init__(self, canvas):
+        """
+        Initializes a retained-mode renderer that keeps canvas items alive between draws.
+        :param canvas: The tk.Canvas to draw on
+        """
+        self.canvas = canvas
+        self.groups = {}  # {group: {key: [item_id, kind, coords, options]}}
+        self.last_sync_seconds = 0.0
+        self.last_sync_changes = 0
+
+    def sync(self, group, shapes):
+        """
+        Brings the items of a group in line with a list of shapes, touching only the items that changed.
+        :param group: Name of the group, e.g. "histogram" or "legend"
+        :param shapes: List of (key, kind, coords, options) tuples, where kind is a canvas item type
+                       such as "rectangle", "text" or "line" and key identifies the item across draws
+        :return: Number of canvas items created, moved, reconfigured or deleted
+        """
+        started = time.perf_counter()
+        items = self.groups.setdefault(group, {})
+        seen = set()
+        changes = 0
+
+        for key, kind, coords, options in shapes:
+            seen.add(key)
+            item = items.get(key)
+            if item is None or item[1] != kind:
+                if item is not None:
+                    self.canvas.delete(item[0])
+                item_id = getattr(self.canvas, f"create_{kind}")(*coords, **options)
+                items[key] = [item_id, kind, coords, options]
+                changes += 1
+                continue
+            if item[2] != coords:
+                self.canvas.coords(item[0], *coords)
+                item[2] = coords
+                changes += 1
+            if item[3] != options:
+                changed = {name: value for name, value in options.items() if item[3].get(name) != value}
+                self.canvas.itemconfigure(item[0], **changed)
+                item[3] = options
+                changes += 1
+
+        for key in [key for key in items if key not in seen]:
+            self.canvas.delete(items.pop(key)[0])
+            changes += 1
+
+        self.last_sync_seconds = time.perf_counter() - started
+        self.last_sync_changes = changes
+        record(f"tk.sync.{group}", self.last_sync_seconds, rows=len(shapes))
+        return changes
+
+
+class HistogramWindow(ABC):
+    """
+    Base class for the histogram apps. One Tk window and its canvas items are kept across datasets;
+    subclasses describe what to draw as lists of shapes and the renderer applies only the differences.
+    """
+
+    canvas_width = 800
+    canvas_height = 600
+
+    def __init__(self):
+        """
+        Initializes the window state. The Tk root is created on first use.
+        """
+        self.root = None
+        self.canvas = None
+        self.renderer = None
+        self.status_bar = None  # Progress bar and Cancel button, shown while a load runs
+        self.loading = None     # The running BackgroundLoad
+
+    @abstractmethod
+    def window_title(self):
+        """
+        Returns the title of the window.
+        """
+
+    def heading_shapes(self):
+        """
+        Returns the shapes drawn once the window is set up, such as a heading.
+        """
+        return []
+
+    @abstractmethod
+    def histogram_shapes(self):
+        """
+        Returns the shapes of the histogram as (key, kind, coords, options) tuples, see CanvasRenderer.sync.
+        """
+
+    def legend_shapes(self):
+        return []
+
+    def setup_window(self):
+        """
+        Sets up the Tkinter window and canvas for the histogram, reusing them if they already exist.
+        Tk is imported here rather than at module level, so building shapes or exporting them needs no GUI.
+        """
+        import tkinter as tk
+
+        if self.root is None:
+            with stage("tk.init"):
+                self.root = tk.Tk()
+            self.root.protocol("WM_DELETE_WINDOW", self.hide)
+        self.root.title(self.window_title())
+        if self.canvas is None:
+            self.canvas = tk.Canvas(self.root, width=self.canvas_width, height=self.canvas_height, bg="white")
+            self.canvas.pack()
+            self.renderer = CanvasRenderer(self.canvas)
+        elif (int(self.canvas["width"]), int(self.canvas["height"])) != (self.canvas_width, self.canvas_height):
+            self.canvas.configure(width=self.canvas_width, height=self.canvas_height)
+        self.renderer.sync("heading", self.heading_shapes())
+
+    def draw_histogram(self):
+        """
+        Draws the histogram with bars, labels, and axes.
+        """
+        self.renderer.sync("histogram", self.histogram_shapes())
+
+    def add_legend(self):
+        """
+        Adds a legend to the histogram.
+        """
+        self.renderer.sync("legend", self.legend_shapes())
+
+    def hide(self):
+        """
+        Hides the window and leaves the main loop, keeping the window for the next dataset.
+        """
+        self.root.withdraw()
+        self.root.quit()
+
+    def close(self):
+        """
+        Destroys the window, cancelling a running load.
+        """
+        if self.loading is not None:
+            self.loading.cancel()
+            self.loading = None
+        if self.root is not None:
+            self.root.destroy()
+            self.root = self.canvas = self.renderer = self.status_bar = None
+
+    def show(self):
+        """
+        Draws the current data and shows the window without entering the main loop.
+        """
+        self.setup_window()
+        self.draw_histogram()
+        self.add_legend()
+        self.root.deiconify()
+
+    def run(self, poll=None, interval_ms=1000):
+        """
+        Shows the window and runs the Tkinter main loop until it is closed.
+        :param poll: Optional callable returning new data for refresh, or None when nothing changed
+        :param interval_ms: Delay between calls to poll
+        """
+        self.show()
+
+        if poll is not None:
+            def update():
+                if self.root is None:
+                    return
+                data = poll()
+                if data is not None:
+                    self.refresh(data)
+                self._poll_job = self.root.after(interval_ms, update)
+            self._poll_job = self.root.after(interval_ms, update)
+
+        self.root.mainloop()
+
+        if poll is not None and self.root is not None:
+            self.root.after_cancel(self._poll_job)
+
+    def serve(self, commands, interval_ms=COMMAND_POLL_MS):
+        """
+        Runs the Tkinter main loop while another thread, such as a console prompt, sends it work.
+        The window starts hidden and closing it only hides it again; the loop ends when None is received.
+        :param commands: Queue of callables, each called on the Tk thread with this window
+        :param interval_ms: Delay between checks of the queue
+        """
+        self.setup_window()
+        self.root.withdraw()
+        self.root.protocol("WM_DELETE_WINDOW", self.root.withdraw)
+
+        def receive():
+            while True:
+                try:
+                    command = commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command is None:
+                    self.root.quit()
+                    return
+                command(self)
+            self.root.after(interval_ms, receive)
+
+        self.root.after(interval_ms, receive)
+        self.root.mainloop()
+        if self.root is not None:
+            self.root.protocol("WM_DELETE_WINDOW", self.hide)
+
+    def start_load(self, load, on_finish, on_partial=None, interval_ms=LOAD_POLL_MS):
+        """
+        Starts a BackgroundLoad and shows its progress under the histogram, with a Cancel button.
+        Its messages are read from the Tk main loop, which must be running or entered afterwards.
+        :param load: BackgroundLoad that has not been started
+        :param on_finish: Called on the Tk thread with the final (kind, value) message of the load
+        :param on_partial: Optional, called on the Tk thread with each partial result
+        :param interval_ms: Delay between checks of the load's messages
+        """
+        import tkinter as tk
+        from tkinter import ttk
+
+        if self.loading is not None:
+            self.loading.cancel()
+        self.show()
+        if self.status_bar is None:
+            self.status_bar = tk.Frame(self.root)
+            self.progress_bar = ttk.Progressbar(self.status_bar, maximum=1.0)
+            self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=5)
+            self.cancel_button = tk.Button(self.status_bar, text="Cancel")
+            self.cancel_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        # Indeterminate until the load reports how far it got
+        self.progress_bar.configure(mode="indeterminate", value=0)
+        self.progress_bar.start()
+        self.cancel_button.configure(command=load.cancel)
+        self.status_bar.pack(fill=tk.X)
+        self.loading = load
+        load.start()
+
+        def receive():
+            if self.loading is not load:
+                return  # Replaced by another load or the window was closed
+            while True:
+                try:
+                    kind, value = load.messages.get_nowait()
+                except queue.Empty:
+                    break
+                if kind != PROGRESS:
+                    self.progress_bar.stop()
+                    self.status_bar.pack_forget()
+                    self.loading = None
+                    on_finish(kind, value)
+                    return
+                fraction, partial = value
+                if fraction is not None and str(self.progress_bar["mode"]) != "determinate":
+                    self.progress_bar.stop()
+                    self.progress_bar.configure(mode="determinate")
+                if fraction is not None:
+                    self.progress_bar.configure(value=fraction)
+                if partial is not None and on_partial is not None:
+                    on_partial(partial)
+            self.root.after(interval_ms, receive)
+
+        self.root.after(interval_ms, receive)
+
+    @abstractmethod
+    def refresh(self, data):
+        """
+        Replaces the data shown and redraws only what changed.
+        """
@@ -1,45 +1,78 @@
-import tkinter as tk
+import argparse
+import queue
+import threading
 
+from background_load import CANCELLED, DONE, MISSING, BackgroundLoad, stream_report
+from canvas_renderer import HistogramWindow
+from follow import FollowedFile
+from metric_registry import MetricSet
+from parse_cache import ParseCache
+from rollup_store import RollupStore
+from traffic_core import ENGINES, available_engine, load_report
+from traffic_metrics import DEFAULT_METRICS
 
-class HistogramApp:
+
+class HistogramApp(HistogramWindow):
     def __init__(self, traffic_data, date):
         """
         Initializes the histogram application with the traffic data and selected date.
         :param traffic_data: Dictionary containing vehicle frequencies for two junctions per hour
         :param date: Selected date as a string
         """
-        self.traffic_data = traffic_data  # {'Elm Avenue/Rabbit Road': [...], 'Hanley Highway/Westway': [...]}
-        self.date = date
-        self.root = tk.Tk()
-        self.canvas = None
+        super().__init__()
         self.bar_width = 20  # Bar width for histogram
         self.spacing = 10    # Spacing between bars
-        self.canvas_width = max(900, len(traffic_data["Elm Avenue/Rabbit Road"]) * (self.bar_width * 2 + self.spacing) + 100)
         self.canvas_height = 630
+        self.set_data(traffic_data, date)
+
+    def set_data(self, traffic_data, date):
+        """
+        Replaces the traffic data and date shown by the next draw.
+        """
+        self.traffic_data = traffic_data  # {'Elm Avenue/Rabbit Road': [...], 'Hanley Highway/Westway': [...]}
+        self.date = date
+        self.canvas_width = max(900, len(traffic_data["Elm Avenue/Rabbit Road"]) * (self.bar_width * 2 + self.spacing) + 100)
         self.max_frequency = max(
             max(self.traffic_data["Elm Avenue/Rabbit Road"]),
-            max(self.traffic_data["Hanley Highway/Westway"])
+            max(self.traffic_data["Hanley Highway/Westway"]),
+            1  # Avoid dividing by zero before any vehicle has been recorded
         )
 
-    def setup_window(self):
+    @staticmethod
+    def traffic_data_from_report(report):
+        """
+        Extracts the hourly counts of both junctions from a DayReport, all zero when report is None.
+        """
+        return {
+            "Elm Avenue/Rabbit Road": report.hourly_counts("Elm Avenue/Rabbit Road") if report else [0] * 24,
+            "Hanley Highway/Westway": report.hourly_counts("Hanley Highway/Westway") if report else [0] * 24
+        }
+
+    @classmethod
+    def from_report(cls, report):
         """
-        Sets up the Tkinter window and canvas for the histogram.
+        Creates the hourly histogram of both junctions from a DayReport.
         """
-        self.root.title(f"Histogram of Vehicle Frequency per Hour ({self.date})")
-        self.canvas = tk.Canvas(self.root, width=self.canvas_width, height=self.canvas_height, bg="white")
-        self.canvas.pack()
+        return cls(cls.traffic_data_from_report(report), report.date)
 
-        # Add main heading
-        self.canvas.create_text(
-            self.canvas_width // 2, 30,
-            text=f"Histogram of Vehicle Frequency per Hour ({self.date})",
-            font=("Arial", 16, "bold"),
-            fill="black"
-        )
+    def window_title(self):
+        return f"Histogram of Vehicle Frequency per Hour ({self.date})"
 
-    def draw_histogram(self):
+    def heading_shapes(self):
+        """
+        Returns the main heading.
         """
-        Draws the histogram with bars, labels, and axes.
+        return [
+            ("heading", "text", (self.canvas_width // 2, 30), {
+                "text": f"Histogram of Vehicle Frequency per Hour ({self.date})",
+                "font": ("Arial", 16, "bold"),
+                "fill": "black"
+            })
+        ]
+
+    def histogram_shapes(self):
+        """
+        Returns the bars, labels, and axes of the histogram.
         """
         # Dimensions and parameters
         x_start = 50  # Start position for the bars
@@ -47,6 +80,7 @@ class HistogramApp:
         y_max_height = 400  # The maximum height for the bars in pixels
 
         hours = range(24)  # Hours from 00 to 23
+        shapes = []
 
         for i, hour in enumerate(hours):
             x_offset = x_start + i * (self.bar_width * 2 + self.spacing)
@@ -58,8 +92,9 @@ class HistogramApp:
             y0_elm = y_base - elm_height
             x1_elm = x0_elm + self.bar_width
             y1_elm = y_base
-            self.canvas.create_rectangle(x0_elm, y0_elm, x1_elm, y1_elm, fill="lawn green")
-            self.canvas.create_text((x0_elm + x1_elm) // 2, y0_elm - 10, text=str(elm_freq), anchor=tk.S, font=("Arial", 9, "bold"), fill="lawn green")
+            shapes.append((("elm", i), "rectangle", (x0_elm, y0_elm, x1_elm, y1_elm), {"fill": "lawn green"}))
+            shapes.append((("elm_label", i), "text", ((x0_elm + x1_elm) // 2, y0_elm - 10),
+                           {"text": str(elm_freq), "anchor": "s", "font": ("Arial", 9, "bold"), "fill": "lawn green"}))
 
             # Hanley Highway/Westway bar
             hanley_freq = self.traffic_data["Hanley Highway/Westway"][i]
@@ -68,38 +103,58 @@ class HistogramApp:
             y0_hanley = y_base - hanley_height
             x1_hanley = x0_hanley + self.bar_width
             y1_hanley = y_base
-            self.canvas.create_rectangle(x0_hanley, y0_hanley, x1_hanley, y1_hanley, fill="tomato")
-            self.canvas.create_text((x0_hanley + x1_hanley) // 2, y0_hanley - 10, text=str(hanley_freq), anchor=tk.S, font=("Arial", 9, "bold"), fill="tomato")
+            shapes.append((("hanley", i), "rectangle", (x0_hanley, y0_hanley, x1_hanley, y1_hanley), {"fill": "tomato"}))
+            shapes.append((("hanley_label", i), "text", ((x0_hanley + x1_hanley) // 2, y0_hanley - 10),
+                           {"text": str(hanley_freq), "anchor": "s", "font": ("Arial", 9, "bold"), "fill": "tomato"}))
 
             # Hour labels on the x-axis
-            self.canvas.create_text((x0_elm + x1_hanley) // 2, y1_elm + 20, text=f"{hour:02d}", anchor=tk.N, font=("Arial", 10))
+            shapes.append((("hour", i), "text", ((x0_elm + x1_hanley) // 2, y1_elm + 20),
+                           {"text": f"{hour:02d}", "anchor": "n", "font": ("Arial", 10)}))
 
         # Add labels for axes
-        self.canvas.create_text(self.canvas_width // 2, 600, text="Hours (00:00 to 23:00)", anchor=tk.CENTER, font=("Arial", 12))
+        shapes.append(("x_label", "text", (self.canvas_width // 2, 600),
+                       {"text": "Hours (00:00 to 23:00)", "anchor": "center", "font": ("Arial", 12)}))
+        return shapes
 
-    def add_legend(self):
+    def legend_shapes(self):
         """
-        Adds a legend to the histogram.
+        Returns the legend of the histogram.
         """
-        # Add legend for Elm Avenue/Rabbit Road
-        self.canvas.create_rectangle(55, 70, 75, 90, fill="lawn green")
-        self.canvas.create_text(85, 80, text="Elm Avenue/Rabbit Road", anchor=tk.W, font=("Arial", 10))
-
-        # Add legend for Hanley Highway/Westway
-        self.canvas.create_rectangle(55, 100, 75, 120, fill="tomato")
-        self.canvas.create_text(85, 110, text="Hanley Highway/Westway", anchor=tk.W, font=("Arial", 10))
+        return [
+            # Legend for Elm Avenue/Rabbit Road
+            ("elm_swatch", "rectangle", (55, 70, 75, 90), {"fill": "lawn green"}),
+            ("elm_name", "text", (85, 80), {"text": "Elm Avenue/Rabbit Road", "anchor": "w", "font": ("Arial", 10)}),
+            # Legend for Hanley Highway/Westway
+            ("hanley_swatch", "rectangle", (55, 100, 75, 120), {"fill": "tomato"}),
+            ("hanley_name", "text", (85, 110), {"text": "Hanley Highway/Westway", "anchor": "w", "font": ("Arial", 10)}),
+        ]
 
-    def run(self):
+    def refresh(self, traffic_data):
         """
-        Runs the Tkinter main loop to display the histogram.
+        Replaces the traffic data and updates only the bars that changed.
+        :param traffic_data: Dictionary containing vehicle frequencies for two junctions per hour
         """
-        self.setup_window()
+        self.set_data(traffic_data, self.date)
         self.draw_histogram()
-        self.add_legend()
-        self.root.mainloop()
 
 
 class MultiCSVProcessor:
+    def __init__(self, engine="python", cache=None, histogram_only=False, store=None, metrics=None):
+        """
+        Initializes the processor.
+        :param engine: "python" for the per-row reference loop or "numpy" for the vectorized engine
+        :param cache: ParseCache holding previously parsed days, a default one is created if omitted
+        :param histogram_only: Scan only the junction and time columns instead of building a full report
+        :param store: Optional RollupStore; days are ingested once and read back from it afterwards
+        :param metrics: Optional MetricSet of per-site metrics; the store is bypassed when given, as it holds
+                        only the daily metrics
+        """
+        self.engine = available_engine(engine)
+        self.cache = cache or ParseCache()
+        self.histogram_only = histogram_only
+        self.store = store
+        self.metrics = metrics
+
     def validate_date_input(self, prompt, min_value, max_value):
         """
         Validates date inputs with range checking.
@@ -115,59 +170,130 @@ class MultiCSVProcessor:
 
     def process_csv(self, file_name, date):
         """
-        Processes a CSV file and generates data for histogram visualization.
+        Processes a CSV file in a single aggregation pass.
+        :return: The DayReport with the hourly junction counts and summary metrics, or None if the file is missing
         """
         try:
-            with open(file_name, 'r') as f:
-                lines = f.readlines()
+            if self.store is not None and self.metrics is None:
+                return self.store.load_report(file_name, date, self.cache, self.engine)
+            return load_report(file_name, date, self.cache, self.engine, self.metrics)
         except FileNotFoundError:
             print(f"File not found: {file_name}")
             return None
 
-        headers = lines[0].strip().split(',')
-        data = [dict(zip(headers, line.strip().split(','))) for line in lines[1:]]
+    def show_date(self, app, file_name, date, finished):
+        """
+        Loads a day on a worker thread, filling in the histogram as its rows are read. Runs on the Tk thread.
+        :param app: The HistogramApp showing the day
+        :param finished: Called once the load has ended, whether or not it succeeded
+        """
+        print(f"Processing file: {file_name}")
+        app.set_data(HistogramApp.traffic_data_from_report(None), date)
+        if self.histogram_only:
+            from mmap_scan import scan_hourly_counts  # Loads NumPy, so only when the scan is asked for
+            load = BackgroundLoad(lambda load: scan_hourly_counts(file_name))
+            on_partial = None
+        else:
+            load = BackgroundLoad(stream_report, file_name, date, self.cache, self.engine, self.store, self.metrics)
+            on_partial = lambda report: app.refresh(HistogramApp.traffic_data_from_report(report))
 
-        # Example: Process the data and generate histogram-compatible data
-        traffic_data = {
-            "Elm Avenue/Rabbit Road": [0] * 24,
-            "Hanley Highway/Westway": [0] * 24
-        }
+        def on_finish(kind, value):
+            if kind == DONE:
+                app.refresh(value if self.histogram_only else HistogramApp.traffic_data_from_report(value))
+            elif kind == MISSING:
+                print(f"File not found: {file_name}")
+            elif kind == CANCELLED:
+                print(f"Cancelled loading {file_name}.")
+            else:
+                print(f"Error processing {file_name}: {value}")
+            finished()
 
-        for row in data:
-            hour = int(row["timeOfDay"].split(":")[0])  # Extract hour from "HH:MM"
-            if row["JunctionName"] == "Elm Avenue/Rabbit Road":
-                traffic_data["Elm Avenue/Rabbit Road"][hour] += 1
-            elif row["JunctionName"] == "Hanley Highway/Westway":
-                traffic_data["Hanley Highway/Westway"][hour] += 1
+        app.start_load(load, on_finish, on_partial)
 
-        return traffic_data
+    def follow(self, file_name, date, interval_ms=1000):
+        """
+        Shows the histogram of a file that is still being appended to, parsing only new rows on each refresh.
+        """
+        followed = FollowedFile(file_name, self.metrics, self.engine)
+        try:
+            followed.poll()
+        except FileNotFoundError:
+            print(f"File not found: {file_name}")
+            return
 
-    def run(self):
+        def poll():
+            try:
+                if not followed.poll():
+                    return None
+            except FileNotFoundError:
+                return None
+            return HistogramApp.traffic_data_from_report(followed.report(date))
+
+        app = HistogramApp(HistogramApp.traffic_data_from_report(followed.report(date)), date)
+        app.run(poll, interval_ms)
+
+    def prompt_dates(self, commands):
         """
-        Main loop to handle multiple CSV files.
+        Asks for dates on the console and sends each one to the Tk thread, so the window stays responsive
+        between prompts. Runs on a background thread; sends None when the user is done.
+        :param commands: Queue read by HistogramApp.serve
         """
-        while True:
-            day = self.validate_date_input("Enter day (1-31): ", 1, 31)
-            month = self.validate_date_input("Enter month (1-12): ", 1, 12)
-            year = self.validate_date_input("Enter year (2000-2024): ", 2000, 2024)
+        try:
+            while True:
+                day = self.validate_date_input("Enter day (1-31): ", 1, 31)
+                month = self.validate_date_input("Enter month (1-12): ", 1, 12)
+                year = self.validate_date_input("Enter year (2000-2024): ", 2000, 2024)
 
-            date = f"{day:02d}/{month:02d}/{year}"
-            file_name = f"traffic_data{day:02d}{month:02d}{year}.csv"
+                date = f"{day:02d}/{month:02d}/{year}"
+                file_name = f"traffic_data{day:02d}{month:02d}{year}.csv"
 
-            print(f"Processing file: {file_name}")
-            traffic_data = self.process_csv(file_name, date)
+                finished = threading.Event()
+                commands.put(lambda app, file_name=file_name, date=date: self.show_date(app, file_name, date,
+                                                                                      finished.set))
+                finished.wait()
 
-            if traffic_data:
-                app = HistogramApp(traffic_data, date)
-                app.run()  # Display the histogram
+                cont = input("Do you want to process another file? (Y/N): ").strip().lower()
+                if cont != 'y':
+                    print("Exiting program.")
+                    break
+        except EOFError:
+            print("Exiting program.")
+        finally:
+            commands.put(None)
 
-            cont = input("Do you want to process another file? (Y/N): ").strip().lower()
-            if cont != 'y':
-                print("Exiting program.")
-                break
+    def run(self):
+        """
+        Main loop to handle multiple CSV files. Tk runs on the main thread while the console prompt runs
+        on a background thread; one window is reused for every date.
+        """
+        app = HistogramApp(HistogramApp.traffic_data_from_report(None), "")
+        commands = queue.Queue()
+        threading.Thread(target=self.prompt_dates, args=(commands,), daemon=True).start()
+        app.serve(commands)
+        app.close()
 
 
 # Example usage
 if __name__ == "__main__":
-    csv_processor = MultiCSVProcessor()
-    csv_processor.run()
+    parser = argparse.ArgumentParser(description="Show hourly vehicle histograms for traffic CSV files.")
+    parser.add_argument("--engine", choices=ENGINES, default="python")
+    parser.add_argument("--follow", metavar="DDMMYYYY", help="Follow the file for this date as rows are appended")
+    parser.add_argument("--interval", type=int, default=1000, help="Refresh interval in milliseconds for --follow")
+    parser.add_argument("--histogram-only", action="store_true", help="Scan only the columns the histogram needs")
+    parser.add_argument("--store", metavar="PATH", help="Read days from this rollup store, ingesting new ones")
+    parser.add_argument("--metrics", metavar="JSON", help="File of per-site metric definitions")
+    args = parser.parse_args()
+
+    metrics = None
+    if args.metrics:
+        try:
+            metrics = MetricSet.from_json(args.metrics, DEFAULT_METRICS)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read metrics: {e}")
+    csv_processor = MultiCSVProcessor(engine=args.engine, histogram_only=args.histogram_only,
+                                      store=RollupStore(args.store) if args.store else None, metrics=metrics)
+    if args.follow:
+        follow_date = f"{args.follow[:2]}/{args.follow[2:4]}/{args.follow[4:]}"
+        csv_processor.follow(f"traffic_data{args.follow}.csv", follow_date, args.interval)
+    else:
+        csv_processor.run()
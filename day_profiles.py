@@ -0,0 +1,114 @@
+import os
+from array import array
+from collections import OrderedDict
+
+from binned_series import DAY_SECONDS, BinnedSeries
+from parse_cache import ParseCache, converted_path
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; band statistics fall back to sorting each bin
+    np = None
+
+DEFAULT_CAPACITY = 120  # Days kept in memory, enough to page back and forth through a few months
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class DayProfileCache:
+    def __init__(self, capacity=DEFAULT_CAPACITY, bin_seconds=3600, cache=None):
+        """
+        Initializes an in-memory LRU cache of per-day vehicle profiles, so paging through dates
+        re-reads no file that is still cached and unchanged.
+        :param capacity: Number of days kept, the least recently used day is dropped first
+        :param bin_seconds: Width of one bin in seconds, 3600 for hourly profiles
+        :param cache: ParseCache the days are loaded through, a default one is created if omitted
+        """
+        if DAY_SECONDS % bin_seconds:
+            raise ValueError(f"Bin width must divide a day evenly: {bin_seconds}")
+        self.capacity = capacity
+        self.bin_seconds = bin_seconds
+        self.cache = cache or ParseCache()
+        self.entries = OrderedDict()  # {file name: (signature, {junction: counts per bin})}
+        self.hits = self.misses = 0
+
+    @property
+    def bin_count(self):
+        return DAY_SECONDS // self.bin_seconds
+
+    def _signature(self, file_name):
+        # The CSV file may have been removed after traffic_convert.py packed it
+        for path in (file_name, converted_path(file_name)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, stat.st_size, stat.st_mtime_ns
+        return None
+
+    def get(self, file_name):
+        """
+        Returns the profile of one day, loading it when it is not cached or its file changed.
+        :param file_name: Path of a traffic CSV file
+        :return: Dictionary of junction name to its vehicle counts per bin, or None when the file is missing
+        """
+        signature = self._signature(file_name)
+        entry = self.entries.get(file_name)
+        if entry is not None and entry[0] == signature:
+            self.entries.move_to_end(file_name)
+            self.hits += 1
+            return entry[1]
+        self.entries.pop(file_name, None)
+        if signature is None:
+            return None
+
+        self.misses += 1
+        try:
+            day = self.cache.load(file_name)
+        except FileNotFoundError:
+            return None
+        profile = BinnedSeries.from_days([day], self.bin_seconds).counts
+        self.entries[file_name] = (signature, profile)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return profile
+
+    def junction_counts(self, file_name, junction):
+        """
+        Returns the counts per bin of one junction on one day, all zero when the junction saw no vehicles.
+        :return: The counts, or None when the file is missing
+        """
+        profile = self.get(file_name)
+        if profile is None:
+            return None
+        return profile.get(junction) or array('l', [0]) * self.bin_count
+
+
+def _percentile(ordered, percent):
+    # Linear interpolation between the closest ranks, as numpy.percentile does by default
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def band_statistics(profiles, percentiles=PERCENTILES):
+    """
+    Computes the mean and percentiles of each bin across days.
+    :param profiles: List of per-day counts, all with the same number of bins
+    :param percentiles: Percentiles to compute, from 0 to 100
+    :return: Dictionary with "mean" and "p<percentile>" lists of one value per bin, empty without profiles
+    """
+    if not profiles:
+        return {}
+    if np is not None:
+        matrix = np.array(profiles, dtype=np.float64)
+        statistics = {"mean": matrix.mean(axis=0).tolist()}
+        for percent, values in zip(percentiles, np.percentile(matrix, percentiles, axis=0)):
+            statistics[f"p{percent}"] = values.tolist()
+        return statistics
+
+    columns = [sorted(column) for column in zip(*profiles)]
+    statistics = {"mean": [sum(column) / len(column) for column in columns]}
+    for percent in percentiles:
+        statistics[f"p{percent}"] = [_percentile(column, percent) for column in columns]
+    return statistics
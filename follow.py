@@ -0,0 +1,67 @@
+import os
+
+from parse_cache import CHUNK_SIZE, read_chunks
+from traffic_metrics import TrafficAggregator
+
+
+class FollowedFile:
+    def __init__(self, file_name, metrics=None, engine="python"):
+        """
+        Initializes incremental aggregation of a CSV file that is still being appended to.
+        :param file_name: Path of the traffic CSV file to follow
+        :param metrics: Optional MetricSet of per-site metrics, evaluated with the daily ones
+        :param engine: "python" or "numpy", as returned by available_engine
+        """
+        self.file_name = file_name
+        self.metrics = metrics
+        self.engine = engine
+        self.offset = 0          # Byte offset just past the last complete line consumed
+        self.partial = b""       # Bytes of a line whose newline has not been written yet
+        self.aggregator = None   # Created once the header line is available
+
+    def reset(self):
+        """
+        Starts again from the beginning of the file, e.g. after it was truncated or replaced.
+        """
+        self.offset = 0
+        self.partial = b""
+        self.aggregator = None
+
+    def poll(self, chunk_size=CHUNK_SIZE):
+        """
+        Parses only the rows appended since the previous poll, a chunk of lines at a time, so a large backlog
+        is never read into memory at once.
+        Raises FileNotFoundError when the file does not exist.
+        :param chunk_size: Approximate number of bytes read per chunk
+        :return: Number of new rows fed to the aggregator
+        """
+        size = os.path.getsize(self.file_name)
+        if size < self.offset + len(self.partial):
+            self.reset()
+        if size == self.offset + len(self.partial):
+            return 0
+
+        before = self.aggregator.vehicle_count if self.aggregator else 0
+        with open(self.file_name, "rb") as file:
+            file.seek(self.offset + len(self.partial))
+            for lines in read_chunks(file, chunk_size):
+                if self.partial:
+                    lines[0] = self.partial + lines[0]
+                    self.partial = b""
+                # Keep an unterminated last line for the next poll
+                if not lines[-1].endswith(b"\n"):
+                    self.partial = lines.pop()
+                self.offset += sum(map(len, lines))
+                lines = [line.decode("utf-8") for line in lines]
+                if self.aggregator is None and lines:
+                    self.aggregator = TrafficAggregator(lines[0].strip().split(','), self.metrics, self.engine)
+                    lines = lines[1:]
+                if lines:
+                    self.aggregator.add_lines(lines)
+        return self.aggregator.vehicle_count - before if self.aggregator else 0
+
+    def report(self, date=None):
+        """
+        Returns a DayReport of every complete row read so far, or None before the header arrives.
+        """
+        return self.aggregator.report(date) if self.aggregator else None
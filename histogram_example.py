@@ -0,0 +1,114 @@
+from canvas_renderer import HistogramWindow
+
+
+class HistogramApp(HistogramWindow):
+    def __init__(self, traffic_data, date):
+        """
+        Initializes the histogram application with the traffic data and selected date.
+        :param traffic_data: Dictionary containing vehicle frequencies for two junctions per hour
+        :param date: Selected date as a string
+        """
+        super().__init__()
+        self.bar_width = 20  # Increased bar width for better visibility
+        self.spacing = 10    # Spacing between bars
+        self.canvas_height = 600
+        self.set_data(traffic_data, date)
+
+    def set_data(self, traffic_data, date):
+        """
+        Replaces the traffic data and date shown by the next draw.
+        """
+        self.traffic_data = traffic_data  # {'Elm Avenue/Rabbit Road': [...], 'Hanley Highway/Westway': [...]}
+        self.date = date
+        self.canvas_width = max(900, len(traffic_data["Elm Avenue/Rabbit Road"]) * (self.bar_width * 2 + self.spacing) + 100)
+        self.max_frequency = max(
+            max(self.traffic_data["Elm Avenue/Rabbit Road"]),
+            max(self.traffic_data["Hanley Highway/Westway"])
+        )
+
+    def window_title(self):
+        return f"Histogram of Vehicle Frequency per Hour ({self.date})"
+
+    def histogram_shapes(self):
+        """
+        Returns the bars, labels, and axes of the histogram.
+        """
+        # Dimensions and parameters
+        x_start = 80
+        y_base = 500
+        y_max_height = 400  # The maximum height for the bars in pixels
+        shapes = []
+
+        # Draw the bars for each hour
+        hours = range(24)  # Hours from 00 to 23
+        for i, hour in enumerate(hours):
+            # Elm Avenue/Rabbit Road bar
+            elm_freq = self.traffic_data["Elm Avenue/Rabbit Road"][i]
+            elm_height = (elm_freq / self.max_frequency) * y_max_height
+            x0_elm = x_start + i * (self.bar_width * 2 + self.spacing)
+            y0_elm = y_base - elm_height
+            x1_elm = x0_elm + self.bar_width
+            y1_elm = y_base
+            shapes.append((("elm", i), "rectangle", (x0_elm, y0_elm, x1_elm, y1_elm), {"fill": "green"}))
+            shapes.append((("elm_label", i), "text", ((x0_elm + x1_elm) // 2, y0_elm - 10),
+                           {"text": str(elm_freq), "anchor": "s", "font": ("Arial", 9)}))
+
+            # Hanley Highway/Westway bar
+            hanley_freq = self.traffic_data["Hanley Highway/Westway"][i]
+            hanley_height = (hanley_freq / self.max_frequency) * y_max_height
+            x0_hanley = x1_elm + 5  # Small spacing between bars for the same hour
+            y0_hanley = y_base - hanley_height
+            x1_hanley = x0_hanley + self.bar_width
+            y1_hanley = y_base
+            shapes.append((("hanley", i), "rectangle", (x0_hanley, y0_hanley, x1_hanley, y1_hanley), {"fill": "red"}))
+            shapes.append((("hanley_label", i), "text", ((x0_hanley + x1_hanley) // 2, y0_hanley - 10),
+                           {"text": str(hanley_freq), "anchor": "s", "font": ("Arial", 9)}))
+
+            # Hour labels on the x-axis
+            shapes.append((("hour", i), "text", ((x0_elm + x1_hanley) // 2, y1_elm + 20),
+                           {"text": f"{hour:02d}", "anchor": "n", "font": ("Arial", 10)}))
+
+        # Draw x-axis and y-axis
+        shapes.append(("x_axis", "line", (50, y_base, self.canvas_width, y_base), {"arrow": "last"}))
+        shapes.append(("y_axis", "line", (50, y_base, 50, 50), {"arrow": "first"}))
+
+        # Add labels for axes
+        shapes.append(("x_label", "text", (self.canvas_width // 2, 580),
+                       {"text": "Hours 00:00 to 24:00", "anchor": "center", "font": ("Arial", 12)}))
+        shapes.append(("y_label", "text", (20, 275),
+                       {"text": "Frequency of Vehicles", "anchor": "center", "angle": 90, "font": ("Arial", 12)}))
+        return shapes
+
+    def legend_shapes(self):
+        """
+        Returns the legend of the histogram.
+        """
+        return [
+            # Legend for Elm Avenue/Rabbit Road
+            ("elm_swatch", "rectangle", (self.canvas_width - 250, 70, self.canvas_width - 230, 90), {"fill": "green"}),
+            ("elm_name", "text", (self.canvas_width - 200, 80),
+             {"text": "Elm Avenue/Rabbit Road", "anchor": "w", "font": ("Arial", 10)}),
+            # Legend for Hanley Highway/Westway
+            ("hanley_swatch", "rectangle", (self.canvas_width - 250, 100, self.canvas_width - 230, 120), {"fill": "red"}),
+            ("hanley_name", "text", (self.canvas_width - 200, 110),
+             {"text": "Hanley Highway/Westway", "anchor": "w", "font": ("Arial", 10)}),
+        ]
+
+    def refresh(self, traffic_data):
+        """
+        Replaces the traffic data and updates only the bars that changed.
+        """
+        self.set_data(traffic_data, self.date)
+        self.draw_histogram()
+
+
+# Example usage
+if __name__ == "__main__":
+    # Example data for two junctions
+    traffic_data = {
+        "Elm Avenue/Rabbit Road": [12, 14, 16, 18, 23, 25, 27, 29, 33, 31, 29, 27, 25, 21, 19, 16, 14, 12, 18, 21, 23, 19, 16, 9],
+        "Hanley Highway/Westway": [10, 12, 14, 16, 19, 22, 25, 29, 32, 33, 31, 29, 27, 25, 23, 20, 18, 15, 17, 22, 24, 20, 14, 8],
+    }
+    date = "15/06/2024"
+    app = HistogramApp(traffic_data, date)
+    app.run()
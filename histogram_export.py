@@ -0,0 +1,315 @@
+import argparse
+import glob
+import html
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentation import collect, merge
+from traffic_core import ENGINES, available_engine, date_range_files, file_date, load_report
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # Pillow is optional; without it PNG files are drawn without text
+    Image = ImageDraw = None
+
+EXPORT_FORMATS = ("svg", "png")
+
+# Tk colour names used by the histograms, as RGB
+COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "blue": (0, 0, 255),
+    "green": (0, 255, 0),
+    "red": (255, 0, 0),
+    "lawn green": (124, 252, 0),
+    "tomato": (255, 99, 71),
+}
+
+# Tk anchors mapped to SVG text-anchor and dominant-baseline
+SVG_ANCHORS = {
+    "n": ("middle", "hanging"), "s": ("middle", "text-after-edge"), "e": ("end", "central"),
+    "w": ("start", "central"), "center": ("middle", "central"),
+    "ne": ("end", "hanging"), "nw": ("start", "hanging"), "se": ("end", "text-after-edge"),
+    "sw": ("start", "text-after-edge"),
+}
+
+
+def _rgb(color):
+    if color.startswith("#") and len(color) == 7:
+        return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return COLORS.get(color, (0, 0, 0))
+
+
+def _hex(color):
+    return "#%02x%02x%02x" % _rgb(color)
+
+
+SHAPE_KINDS = ("rectangle", "line", "polygon", "text")  # Canvas item kinds the renderers draw
+
+
+def window_shapes(app):
+    """
+    Returns every shape a HistogramWindow would draw, in drawing order, without creating a Tk window.
+    Shapes kept hidden, such as the empty bands of an overlay page, are left out.
+    Raises ValueError for a kind of canvas item the renderers cannot draw, rather than leaving it out.
+    """
+    shapes = []
+    for shape in app.heading_shapes() + app.histogram_shapes() + app.legend_shapes():
+        _, kind, _, options = shape
+        if kind not in SHAPE_KINDS:
+            raise ValueError(f"Cannot export canvas items of kind {kind!r}")
+        if options.get("state") != "hidden":
+            shapes.append(shape)
+    return shapes
+
+
+def _outline(options, default):
+    """
+    Returns the outline colour of a rectangle or polygon, or None when it has none, as for Tk's outline="".
+    """
+    color = options.get("outline", default)
+    return color or None
+
+
+def _points(coords):
+    return " ".join(f"{x:g},{y:g}" for x, y in zip(coords[0::2], coords[1::2]))
+
+
+def render_svg(app):
+    """
+    Renders the layout of a HistogramWindow as an SVG document.
+    :return: The SVG document as a string
+    """
+    width, height = app.canvas_width, app.canvas_height
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path d="M 0 0 L 10 5 L 0 10 z"/></marker></defs>',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    for _, kind, coords, options in window_shapes(app):
+        if kind == "rectangle":
+            x0, y0, x1, y1 = coords
+            outline = _outline(options, "black")
+            parts.append(f'<rect x="{min(x0, x1):g}" y="{min(y0, y1):g}" width="{abs(x1 - x0):g}" '
+                         f'height="{abs(y1 - y0):g}" fill="{_hex(options.get("fill", "white"))}" '
+                         f'stroke="{_hex(outline) if outline else "none"}"/>')
+        elif kind == "polygon":
+            # Tk fills polygons black and draws no outline unless told otherwise
+            outline = _outline(options, "")
+            parts.append(f'<polygon points="{_points(coords)}" fill="{_hex(options.get("fill", "black"))}" '
+                         f'stroke="{_hex(outline) if outline else "none"}"/>')
+        elif kind == "line":
+            arrow = options.get("arrow")
+            markers = ""
+            if arrow in ("first", "both"):
+                markers += ' marker-start="url(#arrow)"'
+            if arrow in ("last", "both"):
+                markers += ' marker-end="url(#arrow)"'
+            if options.get("dash"):
+                markers += f' stroke-dasharray="{" ".join(map(str, options["dash"]))}"'
+            parts.append(f'<polyline points="{_points(coords)}" fill="none" stroke="{_hex(options.get("fill", "black"))}" '
+                         f'stroke-width="{options.get("width", 1)}"{markers}/>')
+        elif kind == "text":
+            x, y = coords
+            family, size, *style = options.get("font", ("Arial", 10))
+            text_anchor, baseline = SVG_ANCHORS[options.get("anchor", "center")]
+            weight = ' font-weight="bold"' if "bold" in style else ""
+            rotate = f' transform="rotate({-options["angle"]:g} {x:g} {y:g})"' if options.get("angle") else ""
+            parts.append(f'<text x="{x:g}" y="{y:g}" font-family="{family}" font-size="{size}pt"{weight} '
+                         f'fill="{_hex(options.get("fill", "black"))}" text-anchor="{text_anchor}" '
+                         f'dominant-baseline="{baseline}"{rotate}>{html.escape(str(options.get("text", "")), quote=False)}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def _png_bytes(width, height, pixels):
+    """
+    Encodes an RGB bytearray as a PNG file.
+    """
+    stride = width * 3
+    raw = b"".join(b"\0" + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def render_png(app):
+    """
+    Rasterizes the layout of a HistogramWindow as a PNG image.
+    Text is drawn only when Pillow is installed; otherwise the bars, lines, bands and legend swatches are drawn.
+    :return: The PNG file contents as bytes
+    """
+    width, height = app.canvas_width, app.canvas_height
+    if Image is not None:
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        for _, kind, coords, options in window_shapes(app):
+            if kind == "rectangle":
+                x0, y0, x1, y1 = coords
+                outline = _outline(options, "black")
+                draw.rectangle((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)),
+                               fill=_rgb(options.get("fill", "white")), outline=_rgb(outline) if outline else None)
+            elif kind == "polygon":
+                outline = _outline(options, "")
+                draw.polygon(list(zip(coords[0::2], coords[1::2])), fill=_rgb(options.get("fill", "black")),
+                             outline=_rgb(outline) if outline else None)
+            elif kind == "line":
+                draw.line(coords, fill=_rgb(options.get("fill", "black")), width=options.get("width", 1))
+            elif kind == "text" and not options.get("angle"):
+                anchor = {"n": "mt", "s": "mb", "e": "rm", "w": "lm", "center": "mm"}.get(options.get("anchor", "center"), "mm")
+                draw.text(coords, str(options.get("text", "")), fill=_rgb(options.get("fill", "black")), anchor=anchor)
+        return _png_bytes(width, height, image.tobytes())
+
+    pixels = bytearray(b"\xff" * (width * height * 3))
+
+    def fill(x0, y0, x1, y1, rgb):
+        x0, x1 = max(0, int(round(min(x0, x1)))), min(width, int(round(max(x0, x1))))
+        y0, y1 = max(0, int(round(min(y0, y1)))), min(height, int(round(max(y0, y1))))
+        if x0 >= x1:
+            return
+        row = bytes(rgb) * (x1 - x0)
+        for y in range(y0, y1):
+            pixels[(y * width + x0) * 3:(y * width + x1) * 3] = row
+
+    def segment(x0, y0, x1, y1, width_px, rgb):
+        if x0 == x1 or y0 == y1:
+            # Axes, ticks and step lines are horizontal or vertical and fill as one rectangle
+            fill(min(x0, x1), min(y0, y1), max(x0, x1) + width_px, max(y0, y1) + width_px, rgb)
+            return
+        steps = int(max(abs(x1 - x0), abs(y1 - y0))) + 1
+        for step in range(steps + 1):
+            x = x0 + (x1 - x0) * step / steps
+            y = y0 + (y1 - y0) * step / steps
+            fill(x, y, x + width_px, y + width_px, rgb)
+
+    def polygon(coords, rgb):
+        # Even-odd scanline fill through the centre of each pixel row
+        points = list(zip(coords[0::2], coords[1::2]))
+        edges = list(zip(points, points[1:] + points[:1]))
+        top = max(0, int(min(y for _, y in points)))
+        bottom = min(height, int(max(y for _, y in points)) + 1)
+        for y in range(top, bottom):
+            centre = y + 0.5
+            crossings = sorted(xa + (centre - ya) * (xb - xa) / (yb - ya)
+                               for (xa, ya), (xb, yb) in edges if (ya <= centre) != (yb <= centre))
+            for start, end in zip(crossings[0::2], crossings[1::2]):
+                fill(start, y, end, y + 1, rgb)
+
+    for _, kind, coords, options in window_shapes(app):
+        if kind == "rectangle":
+            x0, y0, x1, y1 = coords
+            outline = _outline(options, "black")
+            if outline:
+                fill(x0, y0, x1 + 1, y1 + 1, _rgb(outline))
+                fill(x0 + 1, y0 + 1, x1, y1, _rgb(options.get("fill", "white")))
+            else:
+                fill(x0, y0, x1, y1, _rgb(options.get("fill", "white")))
+        elif kind == "polygon":
+            polygon(coords, _rgb(options.get("fill", "black")))
+            outline = _outline(options, "")
+            if outline:
+                for x0, y0, x1, y1 in zip(coords[0::2], coords[1::2], coords[2::2] + coords[:1], coords[3::2] + coords[1:2]):
+                    segment(x0, y0, x1, y1, 1, _rgb(outline))
+        elif kind == "line":
+            width_px = options.get("width", 1)
+            rgb = _rgb(options.get("fill", "black"))
+            for x0, y0, x1, y1 in zip(coords[0::2], coords[1::2], coords[2::2], coords[3::2]):
+                segment(x0, y0, x1, y1, width_px, rgb)
+    return _png_bytes(width, height, pixels)
+
+
+def export_app(app, base_path, formats=("svg",)):
+    """
+    Writes a HistogramWindow layout to base_path with one extension per format.
+    :return: List of the written paths
+    """
+    written = []
+    for extension in formats:
+        path = f"{base_path}.{extension}"
+        if extension == "svg":
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(render_svg(app))
+        elif extension == "png":
+            with open(path, "wb") as file:
+                file.write(render_png(app))
+        else:
+            raise ValueError(f"Unsupported export format: {extension}")
+        written.append(path)
+    return written
+
+
+def export_file(file_name, output_dir, formats=("svg",), chart="hourly", engine="python"):
+    """
+    Builds the histogram of one traffic CSV file and writes it without opening a window.
+    Runs inside a worker process.
+    :param chart: "hourly" for the per-junction hourly histogram, "summary" for the headline counts
+    :return: List of the written paths, empty when the file is missing
+    """
+    # Imported here so each worker only loads the histogram module it needs
+    if chart == "hourly":
+        from data_loop import HistogramApp
+    else:
+        from looping_data import HistogramApp
+
+    day = file_date(file_name)
+    date = day.strftime("%d/%m/%Y") if day else os.path.basename(file_name)
+    try:
+        report = load_report(file_name, date, engine=engine)
+    except FileNotFoundError:
+        return []
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return export_app(HistogramApp.from_report(report), os.path.join(output_dir, f"{stem}_{chart}"), formats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render daily traffic histograms to SVG/PNG without a display.")
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument("--range", nargs=2, metavar=("START", "END"), help="Inclusive date range as DDMMYYYY DDMMYYYY")
+    selection.add_argument("--glob", help="Glob pattern of CSV files, e.g. 'traffic_data*2024.csv'")
+    parser.add_argument("--directory", default=".", help="Directory holding the files for --range")
+    parser.add_argument("--output-dir", default="charts")
+    parser.add_argument("--format", default="svg", help="Comma separated list of svg and png")
+    parser.add_argument("--chart", choices=("hourly", "summary"), default="hourly")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--engine", choices=ENGINES, default="python")
+    args = parser.parse_args(argv)
+
+    formats = tuple(extension.strip() for extension in args.format.split(","))
+    unsupported = [extension for extension in formats if extension not in EXPORT_FORMATS]
+    if unsupported:
+        parser.error(f"Unsupported export format: {', '.join(unsupported)} (choose from {', '.join(EXPORT_FORMATS)})")
+    if args.range:
+        try:
+            file_names = date_range_files(args.range[0], args.range[1], args.directory)
+        except ValueError:
+            parser.error("Dates must use the DDMMYYYY format.")
+    else:
+        file_names = sorted(glob.glob(args.glob))
+    os.makedirs(args.output_dir, exist_ok=True)
+    engine = available_engine(args.engine)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(collect, export_file, name, args.output_dir, formats, args.chart, engine)
+                   for name in file_names]
+        written = []
+        for future in futures:
+            paths, summary = future.result()
+            merge(summary)  # Stages recorded in the worker
+            written.extend(paths)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"Wrote {len(written)} files in {elapsed:.2f}s ({len(written) / elapsed:.1f} files/s)")
+    return 0
+
+
+# Headless entry point: python histogram_export.py --range 01062024 30062024 --format svg,png
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import atexit
+import io
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Set TRAFFIC_PROFILE to enable recording for any entry point, e.g. TRAFFIC_PROFILE=1 python data_loop.py.
+# Add "memory" for per-stage peak allocations and "cprofile" for a cProfile capture: TRAFFIC_PROFILE=memory,cprofile
+PROFILE_VARIABLE = "TRAFFIC_PROFILE"
+PROFILE_OUTPUT = "traffic_profile.prof"  # Where the cProfile statistics are dumped
+
+
+class _NullStage:
+    """
+    Stage returned while recording is disabled; entering, leaving and counting do nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, rows=0, size=0):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class Stage:
+    def __init__(self, recorder, name):
+        """
+        Initializes a timed stage of a Recorder. Use as a context manager.
+        :param recorder: Recorder the totals are added to
+        :param name: Stage name, such as "csv.parse" or "tk.draw"
+        """
+        self.recorder = recorder
+        self.name = name
+        self.rows = 0
+        self.size = 0
+        self.child_peak = 0
+
+    def add(self, rows=0, size=0):
+        """
+        Counts rows and bytes handled by the stage.
+        """
+        self.rows += rows
+        self.size += size
+
+    def __enter__(self):
+        self.parent = self.recorder.active[-1] if self.recorder.active else None
+        self.recorder.active.append(self)
+        if self.recorder.trace_memory:
+            self.base_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        peak = 0
+        if self.recorder.trace_memory:
+            # reset_peak() in nested stages hides their peaks from this one, so children report upwards
+            peak = max(tracemalloc.get_traced_memory()[1] - self.base_memory, self.child_peak)
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, peak + self.base_memory - self.parent.base_memory)
+        self.recorder.active.pop()
+        self.recorder.record(self.name, elapsed, self.rows, self.size, peak)
+        return False
+
+
+class Recorder:
+    def __init__(self, trace_memory=False, profile=False):
+        """
+        Initializes the per-run totals of every stage.
+        :param trace_memory: Record the peak allocations of each stage with tracemalloc
+        :param profile: Capture the whole run with cProfile
+        """
+        self.trace_memory = trace_memory
+        self.profiler = None
+        if profile:
+            import cProfile  # Imported only when asked for, to keep startup short
+            self.profiler = cProfile.Profile()
+        self.stages = {}  # {name: [calls, seconds, rows, bytes, peak bytes]}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.perf_counter()
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @property
+    def active(self):
+        """
+        Stages open on the calling thread, innermost last.
+        """
+        try:
+            return self.local.active
+        except AttributeError:
+            self.local.active = []
+            return self.local.active
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def record(self, name, seconds, rows=0, size=0, peak=0, calls=1):
+        with self.lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = [0, 0.0, 0, 0, 0]
+            totals[0] += calls
+            totals[1] += seconds
+            totals[2] += rows
+            totals[3] += size
+            totals[4] = max(totals[4], peak)
+
+    def summary(self):
+        """
+        Returns the totals of the run as a JSON-serializable dictionary.
+        """
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": {name: {"calls": calls, "seconds": seconds, "rows": rows, "bytes": size, "peak_bytes": peak}
+                       for name, (calls, seconds, rows, size, peak) in self.stages.items()},
+        }
+
+    def format_summary(self):
+        """
+        Returns the totals of the run as text lines, one per stage.
+        """
+        lines = [f"{'Stage':<24}{'calls':>7}{'seconds':>10}{'rows':>12}{'rows/s':>14}{'MB':>9}"
+                 + (f"{'peak MB':>9}" if self.trace_memory else "")]
+        for name, (calls, seconds, rows, size, peak) in self.stages.items():
+            rate = f"{rows / seconds:,.0f}" if rows and seconds else "-"
+            lines.append(f"{name:<24}{calls:>7}{seconds:>10.3f}{rows:>12}{rate:>14}{size / 1e6:>9.1f}"
+                         + (f"{peak / 1e6:>9.1f}" if self.trace_memory else ""))
+        lines.append(f"Wall time {time.perf_counter() - self.started:.3f}s")
+        return lines
+
+
+_recorder = None
+
+
+def stage(name):
+    """
+    Returns a context manager timing one stage, or a shared no-op one while recording is disabled.
+    Usage: with stage("csv.parse") as timed: ...; timed.add(rows=n, size=b)
+    """
+    if _recorder is None:
+        return NULL_STAGE
+    return _recorder.stage(name)
+
+
+def record(name, seconds, rows=0, size=0):
+    """
+    Adds an already timed call to a stage; does nothing while recording is disabled.
+    """
+    if _recorder is not None:
+        _recorder.record(name, seconds, rows, size)
+
+
+def collect(function, *args):
+    """
+    Calls function(*args) with the stages it records kept in a fresh Recorder, so a worker process can send
+    them back to the parent, which adds them with merge(). Totals a forked worker inherited are left out.
+    :return: Tuple of (result, Recorder.summary() of the call, or None while recording is disabled)
+    """
+    global _recorder
+    outer = _recorder
+    if outer is None:
+        return function(*args), None
+    _recorder = Recorder(outer.trace_memory)
+    try:
+        result = function(*args)
+        return result, _recorder.summary()
+    finally:
+        _recorder = outer
+
+
+def merge(summary):
+    """
+    Adds the stage totals of a summary returned by collect(); does nothing for None or while recording is disabled.
+    """
+    if _recorder is None or summary is None:
+        return
+    for name, totals in summary["stages"].items():
+        _recorder.record(name, totals["seconds"], totals["rows"], totals["bytes"], totals["peak_bytes"],
+                         totals["calls"])
+
+
+def enabled():
+    return _recorder is not None
+
+
+def enable(trace_memory=False, profile=False):
+    """
+    Starts recording stages for this process.
+    :return: The new Recorder
+    """
+    global _recorder
+    disable()
+    _recorder = Recorder(trace_memory, profile)
+    _recorder.start()
+    return _recorder
+
+
+def disable():
+    """
+    Stops recording.
+    :return: The Recorder that was active, or None
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop()
+    return recorder
+
+
+def report(file=None):
+    """
+    Stops recording and prints the per-stage summary, plus the top cProfile entries when captured.
+    """
+    recorder = disable()
+    if recorder is None:
+        return
+    file = file or sys.stderr
+    print("\n".join(recorder.format_summary()), file=file)
+    if recorder.profiler is not None:
+        recorder.profiler.dump_stats(PROFILE_OUTPUT)
+        import pstats
+        text = io.StringIO()
+        pstats.Stats(recorder.profiler, stream=text).sort_stats("cumulative").print_stats(15)
+        print(text.getvalue(), file=file)
+        print(f"cProfile statistics saved to '{PROFILE_OUTPUT}'.", file=file)
+    return recorder.summary()
+
+
+def _enable_from_environment():
+    value = os.environ.get(PROFILE_VARIABLE, "")
+    if value and value != "0":
+        options = value.lower().split(",")
+        enable(trace_memory="memory" in options, profile="cprofile" in options)
+        atexit.register(report)
+
+
+_enable_from_environment()
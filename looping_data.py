@@ -1,40 +1,70 @@
-import tkinter as tk
+import argparse
+import queue
+import threading
+from datetime import datetime
 
+from background_load import CANCELLED, DONE, MISSING, BackgroundLoad, stream_report
+from canvas_renderer import HistogramWindow
+from parse_cache import ParseCache
+from results_log import ResultsLog, results_record
+from rollup_store import RollupStore
+from traffic_core import ENGINES, available_engine, load_report
 
-class HistogramApp:
+
+class HistogramApp(HistogramWindow):
     def __init__(self, traffic_data, date):
         """
         Initializes the histogram application with the traffic data and selected date.
         """
+        super().__init__()
+        self.set_data(traffic_data, date)
+
+    def set_data(self, traffic_data, date):
+        """
+        Replaces the traffic data and date shown by the next draw.
+        """
         self.traffic_data = traffic_data
         self.date = date
-        self.root = tk.Tk()
-        self.canvas = None
 
-    def setup_window(self):
+    @staticmethod
+    def traffic_data_from_report(report):
         """
-        Sets up the Tkinter window and canvas for the histogram.
+        Extracts the headline counts shown as bars from a DayReport, all zero when report is None.
         """
-        self.root.title(f"Traffic Data Histogram - {self.date}")
-        self.canvas = tk.Canvas(self.root, width=800, height=600, bg="white")
-        self.canvas.pack()
+        return {
+            "Trucks": report.truck_count if report else 0,
+            "Two-Wheelers": report.two_wheeled_vehicle_count if report else 0,
+            "Overspeed": report.over_speed_limit_count if report else 0,
+            "Bicycles (Avg/Hour)": report.avg_bike_per_hour if report else 0,
+        }
 
-    def draw_histogram(self):
+    @classmethod
+    def from_report(cls, report):
         """
-        Draws the histogram with axes, labels, and bars.
+        Creates the histogram of the headline counts from a DayReport.
+        """
+        return cls(cls.traffic_data_from_report(report), report.date)
+
+    def window_title(self):
+        return f"Traffic Data Histogram - {self.date}"
+
+    def histogram_shapes(self):
+        """
+        Returns the axes, labels, and bars of the histogram.
         """
         if not self.traffic_data:
             print("No data available to display the histogram.")
-            return
+            return []
 
         # Convert string values to integers
         numeric_data = {key: int(value) for key, value in self.traffic_data.items()}
 
-        max_value = max(numeric_data.values())
+        max_value = max(max(numeric_data.values()), 1)  # Avoid dividing by zero before any row was read
         bar_width = 40
         spacing = 20
         x_start = 50
         y_base = 500
+        shapes = []
 
         # Draw bars
         for i, (key, value) in enumerate(numeric_data.items()):
@@ -44,139 +74,65 @@ class HistogramApp:
             x1 = x0 + bar_width
             y1 = y_base
 
-            self.canvas.create_rectangle(x0, y0, x1, y1, fill="blue")
-            self.canvas.create_text((x0 + x1) // 2, y1 + 15, text=key, anchor=tk.N)
+            shapes.append((("bar", key), "rectangle", (x0, y0, x1, y1), {"fill": "blue"}))
+            shapes.append((("label", key), "text", ((x0 + x1) // 2, y1 + 15), {"text": key, "anchor": "n"}))
 
         # Draw axes
-        self.canvas.create_line(40, y_base, 750, y_base, arrow=tk.LAST)  # X-axis
-        self.canvas.create_line(50, 50, 50, y_base, arrow=tk.FIRST)       # Y-axis
-
+        shapes.append(("x_axis", "line", (40, y_base, 750, y_base), {"arrow": "last"}))
+        shapes.append(("y_axis", "line", (50, 50, 50, y_base), {"arrow": "first"}))
+        return shapes
 
-    def add_legend(self):
+    def legend_shapes(self):
         """
-        Adds a legend to the histogram.
+        Returns the legend of the histogram.
         """
-        self.canvas.create_text(600, 50, text="Blue Bars: Traffic Data", fill="blue", font=("Arial", 12))
+        return [("legend", "text", (600, 50), {"text": "Blue Bars: Traffic Data", "fill": "blue", "font": ("Arial", 12)})]
 
-    def run(self):
+    def refresh(self, traffic_data):
         """
-        Runs the Tkinter main loop to display the histogram.
+        Replaces the traffic data and updates only the bars that changed.
         """
-        self.setup_window()
+        self.set_data(traffic_data, self.date)
         self.draw_histogram()
-        self.add_legend()
-        self.root.mainloop()
 
 
 class MultiCSVProcessor:
-    def __init__(self):
+    def __init__(self, engine="python", cache=None, store=None, results_log=None):
         """
         Initializes the application for processing multiple CSV files.
+        :param engine: "python" for the per-row reference loop or "numpy" for the vectorized engine
+        :param cache: ParseCache holding previously parsed days, a default one is created if omitted
+        :param store: Optional RollupStore; days are ingested once and read back from it afterwards
+        :param results_log: ResultsLog the results of each date are saved to, a default one is created if omitted
         """
         self.current_data = None
+        self.engine = available_engine(engine)
+        self.cache = cache or ParseCache()
+        self.store = store
+        self.results_log = results_log or ResultsLog()
 
     def load_csv_file(self, file_path):
         """
         Loads a CSV file and processes its data.
         """
-        # Helper function for parsing time
-        def parse_time(time_str):
-            hours, minutes, seconds = map(int, time_str.split(':'))
-            return hours, minutes
-
+        file_name = f"traffic_data{file_path}.csv"
         try:
-            with open(f"traffic_data{file_path}.csv", 'r') as file:
-                lines = file.readlines()
-
-            # Read headers
-            columns = lines[0].strip().split(',')
+            if self.store is not None:
+                self.current_data = self.store.load_report(file_name, file_path, self.cache, self.engine)
+            else:
+                self.current_data = load_report(file_name, file_path, self.cache, self.engine)
         except FileNotFoundError:
             print(f"Error: No file found for the date {file_path}.csv")
             return None
 
-        # Variables
-        vehicle_count = truck_count = elec_count = two_wheeled_vehicle_count = 0
-        buses_heading_north_count = no_turn_count = bicycle_count = over_speed_limit_count = 0
-        elm_junction_count = hanley_junction_count = elm_junc_scooter_count = 0
-        vehicles_by_hour = {}
-        rain_hours = 0
-        rain_minutes = 0
-        rain_times = []
-        previous_weather = None
-
-        for line in lines[1:]:
-            row = dict(zip(columns, line.strip().split(',')))
-            vehicle_count += 1
-
-            if row['VehicleType'].strip() == 'Truck':
-                truck_count += 1
-            if row.get('elctricHybrid', '').strip() == 'True':
-                elec_count += 1
-            if row['VehicleType'].strip() in ['Bicycle', 'Motorcycle', 'Scooter']:
-                two_wheeled_vehicle_count += 1
-            if (row['VehicleType'].strip() == 'Buss' and
-                row['JunctionName'].strip() == 'Elm Avenue/Rabbit Road' and
-                row['travel_Direction_out'].strip() == 'N'):
-                buses_heading_north_count += 1
-            if row['travel_Direction_in'].strip() == row['travel_Direction_out'].strip():
-                no_turn_count += 1
-            if row['VehicleType'].strip() == 'Bicycle':
-                bicycle_count += 1
-            if int(row['JunctionSpeedLimit']) < int(row['VehicleSpeed']):
-                over_speed_limit_count += 1
-            if row['JunctionName'].strip() == 'Elm Avenue/Rabbit Road':
-                elm_junction_count += 1
-                if row['VehicleType'].strip() == 'Scooter':
-                    elm_junc_scooter_count += 1
-
-            # Track vehicles by hour for Hanley Highway/Westway
-            if row['JunctionName'].strip() == 'Hanley Highway/Westway':
-                hanley_junction_count += 1
-                hour = row['timeOfDay'].split(':')[0]
-                vehicles_by_hour[hour] = vehicles_by_hour.get(hour, 0) + 1
-
-            # Calculate rain durations
-            if row['Weather_Conditions'] in ('Light Rain', 'Heavy Rain'):
-                time_of_day = parse_time(row['timeOfDay'])
-                rain_times.append(time_of_day)
-            elif row['Weather_Conditions'] not in ('Light Rain', 'Heavy Rain') and previous_weather in ('Light Rain', 'Heavy Rain'):
-                time_in_minutes = [(time[0] * 60 + time[1]) for time in rain_times]
-                if time_in_minutes:
-                    range_minutes = max(time_in_minutes) - min(time_in_minutes)
-                    rain_hours += range_minutes // 60
-                    rain_minutes += range_minutes % 60
-                    if rain_minutes >= 60:
-                        rain_hours += 1
-                        rain_minutes -= 60
-                    rain_times.clear()
-            previous_weather = row['Weather_Conditions']
-
-        # Final calculations
-        truck_percentage = round((truck_count * 100) / vehicle_count) if vehicle_count else 0
-        avg_bike_per_hour = round(bicycle_count / 24)
-        elm_junc_scooter_percentage = int((elm_junc_scooter_count * 100) / elm_junction_count) if elm_junction_count else 0
-        peak_hour = max(vehicles_by_hour.items(), key=lambda x: x[1]) if vehicles_by_hour else ('0', 0)
-        formatted_peak_hours = f"Between {peak_hour[0]}:00 and {int(peak_hour[0]) + 1}:00"
-        formatted_rain_duration = f"{rain_hours} hours and {rain_minutes} minutes"
-
-        # Display outcomes
-        results = [
-            f"The total number of vehicles recorded for this date is {vehicle_count}",
-            f"The total number of trucks recorded for this date is {truck_count}",
-            f"The total number of electric vehicles for this date is {elec_count}",
-            f"The total number of two-wheeled vehicles for this date is {two_wheeled_vehicle_count}",
-            f"The total number of Buses leaving Elm Avenue/Rabbit Road heading North is {buses_heading_north_count}",
-            f"The total number of vehicles through both junctions not turning left or right is {no_turn_count}",
-            f"The percentage of all vehicles recorded that are Trucks for this date is {truck_percentage}%",
-            f"The average number of Bikes per hour for this date is {avg_bike_per_hour}",
-            f"The total number of vehicles recorded as over the speed limit for this date is {over_speed_limit_count}",
-            f"The total number of vehicles recorded through Elm Avenue/Rabbit Road junction is {elm_junction_count}",
-            f"The total number of vehicles recorded through Hanley Highway/Westway junction is {hanley_junction_count}",
-            f"{elm_junc_scooter_percentage}% of vehicles recorded through Elm Avenue/Rabbit Road are scooters.",
-            f"The highest number of vehicles in an hour on Hanley Highway/Westway is {peak_hour[1]}",
-            f"The most vehicles through Hanley Highway/Westway were recorded {formatted_peak_hours}",
-            f"The number of hours of rain for this date is {formatted_rain_duration}"
-        ]
+        return self.show_results(file_path)
+
+    def show_results(self, file_path):
+        """
+        Prints and saves the results of the current date.
+        :return: The result lines
+        """
+        results = self.current_data.results()
 
         for result in results:
             print(result)
@@ -184,49 +140,93 @@ class MultiCSVProcessor:
         self.save_results_to_file(file_path, results)
         return results
 
-    def save_results_to_file(self, file_path, results):
+    def save_results_to_file(self, file_path, results=None):
         """
-        Saves the results to a text file.
+        Saves the results of the current date as a record keyed by its date, replacing any earlier record.
+        :param file_path: The date as DDMMYYYY
+        :param results: The formatted result lines, unused; the record is built from the current DayReport
         """
         try:
-            with open(f"results.txt", "a") as file:
-                for line in results:
-                    file.write(line + "\n")
-            print(f"Results saved to 'results.txt'.")
-        except Exception as e:
+            day = datetime.strptime(file_path, "%d%m%Y")
+            self.results_log.append(results_record(self.current_data, day))
+            self.results_log.flush()
+            print(f"Results saved to '{self.results_log.path}'.")
+        except (OSError, ValueError) as e:
             print(f"Error saving results: {e}")
 
+    def show_date(self, app, file_path, finished):
+        """
+        Loads a date on a worker thread, filling in the histogram as its rows are read. Runs on the Tk thread.
+        :param app: The HistogramApp showing the date
+        :param file_path: The date as DDMMYYYY
+        :param finished: Called once the load has ended, whether or not it succeeded
+        """
+        file_name = f"traffic_data{file_path}.csv"
+        app.set_data(HistogramApp.traffic_data_from_report(None), file_path)
+
+        def on_finish(kind, value):
+            if kind == DONE:
+                self.current_data = value
+                app.refresh(HistogramApp.traffic_data_from_report(value))
+                self.show_results(file_path)
+            elif kind == MISSING:
+                print(f"Error: No file found for the date {file_path}.csv")
+            elif kind == CANCELLED:
+                print(f"Cancelled loading {file_name}.")
+            else:
+                print(f"Error processing {file_name}: {value}")
+            finished()
+
+        app.start_load(BackgroundLoad(stream_report, file_name, file_path, self.cache, self.engine, self.store),
+                       on_finish, lambda report: app.refresh(HistogramApp.traffic_data_from_report(report)))
+
+    def prompt_dates(self, commands):
+        """
+        Asks for dates on the console and sends each one to the Tk thread, so the window stays responsive
+        between prompts. Runs on a background thread; sends None when the user is done.
+        :param commands: Queue read by HistogramApp.serve
+        """
+        try:
+            while True:
+                print("Enter the date for the file you want to process (format: DDMMYYYY).")
+                date = input("Date (e.g., 21122024): ").strip()
+
+                if len(date) != 8 or not date.isdigit():
+                    print("Invalid date format. Please try again.")
+                    continue
+
+                finished = threading.Event()
+                commands.put(lambda app, date=date: self.show_date(app, date, finished.set))
+                finished.wait()
+
+                load_another = input("Do you want to load another file? (yes/no): ").strip().lower()
+                if load_another == "no":
+                    print("Exiting the program. Goodbye!")
+                    break
+        except EOFError:
+            print("Exiting the program. Goodbye!")
+        finally:
+            commands.put(None)
+
     def process_files(self):
         """
-        Main loop for processing multiple CSV files based on user input.
-        """
-        while True:
-            print("Enter the date for the file you want to process (format: DDMMYYYY).")
-            date = input("Date (e.g., 21122024): ").strip()
-            
-            if len(date) != 8 or not date.isdigit():
-                print("Invalid date format. Please try again.")
-                continue
-            
-            results = self.load_csv_file(date)
-            if results:
-                # Display the histogram
-                histogram_data = {
-                    "Trucks": results[1].split()[-1],
-                    "Two-Wheelers": results[3].split()[-1],
-                    "Overspeed": results[8].split()[-1],
-                    "Bicycles (Avg/Hour)": results[7].split()[-1],
-                }
-                app = HistogramApp(histogram_data, date)
-                app.run()
-
-            load_another = input("Do you want to load another file? (yes/no): ").strip().lower()
-            if load_another == "no":
-                print("Exiting the program. Goodbye!")
-                break
+        Main loop for processing multiple CSV files based on user input. Tk runs on the main thread while
+        the console prompt runs on a background thread; one window is reused for every date.
+        """
+        app = HistogramApp(HistogramApp.traffic_data_from_report(None), "")
+        commands = queue.Queue()
+        threading.Thread(target=self.prompt_dates, args=(commands,), daemon=True).start()
+        app.serve(commands)
+        app.close()
+        self.results_log.close()
 
 
 # Main program entry point
 if __name__ == "__main__":
-    processor = MultiCSVProcessor()
+    parser = argparse.ArgumentParser(description="Show the headline traffic counts for dates entered on the console.")
+    parser.add_argument("--engine", choices=ENGINES, default="python")
+    parser.add_argument("--store", metavar="PATH", help="Read days from this rollup store, ingesting new ones")
+    args = parser.parse_args()
+
+    processor = MultiCSVProcessor(engine=args.engine, store=RollupStore(args.store) if args.store else None)
     processor.process_files()
@@ -0,0 +1,582 @@
+import argparse
+import importlib.util
+import json
+from array import array
+
+from instrumentation import stage
+from parse_cache import CATEGORICAL_COLUMNS, INTEGER_COLUMNS, TIME_COLUMN
+from rain_intervals import DAY_SECONDS, DRY, RAIN, find_spans
+
+# NumPy is optional and slow to import; the compiled per-row evaluator is always available
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+HOUR = "hour"       # Group key for the hour of day, taken from the time column
+CHUNK_ROWS = 1 << 16  # Rows evaluated per call of the compiled loop
+
+ORDERED_COLUMNS = INTEGER_COLUMNS + (TIME_COLUMN,)  # Columns Less can compare
+JSON_KEYS = {"name", "where", "same", "less", "by", "spans", "ratio", "scale"}
+
+
+class Is:
+    def __init__(self, column, *values):
+        """
+        Condition holding when a categorical column has one of the values.
+        """
+        self.column = column
+        self.values = values
+        self.columns = (column,)
+
+    def key(self):
+        return ("is", self.column, tuple(sorted(self.values)))
+
+
+class Same:
+    def __init__(self, first, second):
+        """
+        Condition holding when two categorical columns have the same value, e.g. the direction in and out.
+        """
+        self.first = first
+        self.second = second
+        self.columns = (first, second)
+
+    def key(self):
+        return ("same", self.first, self.second)
+
+
+class Less:
+    def __init__(self, first, second):
+        """
+        Condition holding when an integer column is smaller than another, e.g. the speed limit and the speed.
+        """
+        self.first = first
+        self.second = second
+        self.columns = (first, second)
+
+    def key(self):
+        return ("less", self.first, self.second)
+
+
+class Count:
+    def __init__(self, name, *conditions, by=None):
+        """
+        Metric counting the rows for which every condition holds.
+        :param name: Name of the metric
+        :param conditions: Is, Same or Less conditions; every row is counted when there are none
+        :param by: Optional grouping: HOUR, a categorical column, or a (categorical column, HOUR) tuple.
+                   HOUR gives {"HH": count} and a column gives {value: count}, both in order of first
+                   appearance; the tuple gives {value: [24 hourly counts]}
+        """
+        self.name = name
+        self.conditions = conditions
+        self.by = tuple(by) if isinstance(by, (list, tuple)) else by
+
+
+class Spans:
+    def __init__(self, name, *conditions, by=None):
+        """
+        Metric finding the spans of time during which the rows satisfy every condition, e.g. the rain spans.
+        Rows are bucketed by second, so they may come in any order; a span runs from a matching row through
+        the last matching row before a row that does not match, as find_spans reads them.
+        :param name: Name of the metric
+        :param conditions: Is, Same or Less conditions
+        :param by: Optional categorical column; gives {value: spans} for the values with any span instead of
+                   a single list of (start, end) seconds since midnight
+        """
+        self.name = name
+        self.conditions = conditions
+        self.by = by
+
+
+class Ratio:
+    def __init__(self, name, numerator, denominator, scale=1, rounding=round):
+        """
+        Metric derived from others once they are counted, 0 when the denominator is 0.
+        :param numerator: Name of a metric
+        :param denominator: Name of a metric or a number
+        :param scale: Factor applied to the numerator, 100 for a percentage
+        :param rounding: Function applied to the quotient, such as round or int
+        """
+        self.name = name
+        self.numerator = numerator
+        self.denominator = denominator
+        self.scale = scale
+        self.rounding = rounding
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_column(where, column, allowed, kind):
+    """
+    Raises ValueError unless column is one of allowed, naming the metric and the kind of column expected.
+    """
+    if column in allowed:
+        return
+    if column in CATEGORICAL_COLUMNS + ORDERED_COLUMNS:
+        raise ValueError(f"{where}: {column!r} is not a {kind} column; use one of {', '.join(allowed)}")
+    raise ValueError(f"{where}: unknown column {column!r}")
+
+
+def _check_pair(where, key, value):
+    if not (isinstance(value, list) and len(value) == 2 and all(isinstance(item, str) for item in value)):
+        raise ValueError(f"{where}: {key!r} must be a list of two column names")
+
+
+def _group_column(metric):
+    """
+    Returns the categorical column a Count or Spans metric is grouped by, or None.
+    """
+    by = metric.by[0] if isinstance(metric.by, tuple) else metric.by
+    return None if by in (None, HOUR) else by
+
+
+class MetricSet:
+    def __init__(self, metrics=(), base=None):
+        """
+        Initializes a registry of metric definitions, evaluated together in a single pass over a day.
+        :param metrics: Count, Spans and Ratio definitions
+        :param base: Optional MetricSet these metrics will extend, e.g. DEFAULT_METRICS; ratios may refer to
+                     its metrics, and its names cannot be redefined
+        """
+        self.base = base
+        self.metrics = {}
+        self.version = 0  # Bumped by register, so sets built by extended() notice changes
+        self._compiled = {}  # {columns present: (compiled per-row evaluator, columns it reads)}
+        self._extended = {}  # {id of the other set: (other set, versions, combined set)}
+        for metric in metrics:
+            self.register(metric)
+
+    def register(self, metric):
+        """
+        Adds a metric, replacing any metric of the same name.
+        Raises ValueError when the definition refers to an unknown column or metric, or to a column of the
+        wrong kind, e.g. Is on a speed column or Less on a categorical one.
+        """
+        self._validate(metric)
+        self.metrics[metric.name] = metric
+        self.version += 1
+        self._compiled.clear()
+        return metric
+
+    def names(self):
+        return list(self.metrics)
+
+    def _scalar(self, name):
+        """
+        Returns whether name is a registered metric whose value is a single number: an ungrouped Count or a Ratio.
+        """
+        for metric_set in (self, self.base):
+            metric = metric_set.metrics.get(name) if metric_set is not None else None
+            if metric is not None:
+                return isinstance(metric, Ratio) or isinstance(metric, Count) and metric.by is None
+        return False
+
+    def _validate(self, metric):
+        if not isinstance(metric, (Count, Spans, Ratio)):
+            raise ValueError(f"Unknown metric kind: {type(metric).__name__}")
+        if not isinstance(metric.name, str) or not metric.name:
+            raise ValueError(f"Metric names must be non-empty strings, not {metric.name!r}")
+        where = f"Metric {metric.name!r}"
+        if self.base is not None and metric.name in self.base.metrics:
+            raise ValueError(f"{where} is already defined")
+
+        if isinstance(metric, Ratio):
+            if not self._scalar(metric.numerator):
+                raise ValueError(f"{where}: numerator {metric.numerator!r} is not a count or ratio defined before it")
+            if not (_is_number(metric.denominator) or self._scalar(metric.denominator)):
+                raise ValueError(f"{where}: denominator {metric.denominator!r} is not a number or a count or "
+                                 f"ratio defined before it")
+            if not _is_number(metric.scale):
+                raise ValueError(f"{where}: scale must be a number")
+            return
+
+        for condition in metric.conditions:
+            if isinstance(condition, Is):
+                _check_column(where, condition.column, CATEGORICAL_COLUMNS, "categorical")
+                if not condition.values or not all(isinstance(value, str) for value in condition.values):
+                    raise ValueError(f"{where}: the values of {condition.column!r} must be one or more strings")
+            elif isinstance(condition, Same):
+                for column in condition.columns:
+                    _check_column(where, column, CATEGORICAL_COLUMNS, "categorical")
+            elif isinstance(condition, Less):
+                for column in condition.columns:
+                    _check_column(where, column, ORDERED_COLUMNS, "numeric")
+            else:
+                raise ValueError(f"{where}: unknown condition {condition!r}")
+
+        by = metric.by
+        if isinstance(metric, Spans) or not isinstance(by, tuple):
+            if by is not None and not (by == HOUR and isinstance(metric, Count)):
+                _check_column(where, by, CATEGORICAL_COLUMNS, "categorical")
+        elif len(by) != 2 or by[1] != HOUR:
+            raise ValueError(f"{where}: a grouping pair must be (column, {HOUR!r})")
+        else:
+            _check_column(where, by[0], CATEGORICAL_COLUMNS, "categorical")
+
+    def __getstate__(self):
+        # Compiled evaluators cannot be pickled; a worker process compiles its own
+        return {"metrics": self.metrics, "base": self.base}
+
+    def __setstate__(self, state):
+        self.metrics = state["metrics"]
+        self.base = state["base"]
+        self.version = 0
+        self._compiled = {}
+        self._extended = {}
+
+    def extended(self, other):
+        """
+        Returns a MetricSet holding these metrics followed by those of other, or this set when other is None.
+        The combined set is kept until either set changes, so its evaluator is compiled only once however
+        many days are evaluated with it.
+        """
+        if other is None:
+            return self
+        kept = self._extended.get(id(other))
+        if kept is not None and kept[0] is other and kept[1] == (self.version, other.version):
+            return kept[2]
+        combined = MetricSet(list(self.metrics.values()) + list(other.metrics.values()))
+        self._extended[id(other)] = (other, (self.version, other.version), combined)
+        return combined
+
+    @classmethod
+    def from_json(cls, path, base=None):
+        """
+        Reads metric definitions from a JSON file holding a list of objects such as
+        {"name": "hanley_trucks", "where": {"JunctionName": "Hanley Highway/Westway", "VehicleType": ["Truck"]},
+         "same": ["travel_Direction_in", "travel_Direction_out"], "less": ["JunctionSpeedLimit", "VehicleSpeed"],
+         "by": "hour"}, {"name": "fog", "spans": true, "where": {"Weather_Conditions": "Fog"}, "by": "JunctionName"}
+        or {"name": "truck_share", "ratio": ["hanley_trucks", "vehicle_count"], "scale": 100}.
+        Raises ValueError, naming the file and metric, for malformed JSON or a definition that is not valid.
+        :param base: Optional MetricSet the definitions will extend, e.g. DEFAULT_METRICS
+        """
+        with open(path) as file:
+            definitions = json.load(file)
+        if not isinstance(definitions, list):
+            raise ValueError(f"{path}: expected a list of metric definitions")
+        metric_set = cls(base=base)
+        for number, definition in enumerate(definitions, 1):
+            if not isinstance(definition, dict) or not isinstance(definition.get("name"), str):
+                raise ValueError(f"{path}: definition {number} must be an object with a name")
+            try:
+                metric_set.register(cls._from_definition(definition))
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}") from None
+        return metric_set
+
+    @staticmethod
+    def _from_definition(definition):
+        """
+        Builds one metric from a JSON definition, checking its keys and their shapes.
+        """
+        where = f"Metric {definition['name']!r}"
+        unknown = set(definition) - JSON_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown keys {', '.join(sorted(unknown))}")
+        if "ratio" in definition:
+            if set(definition) - {"name", "ratio", "scale"}:
+                raise ValueError(f"{where}: a ratio takes only name, ratio and scale")
+            ratio = definition["ratio"]
+            if not (isinstance(ratio, list) and len(ratio) == 2 and isinstance(ratio[0], str)):
+                raise ValueError(f"{where}: 'ratio' must be [numerator metric, denominator metric or number]")
+            return Ratio(definition["name"], ratio[0], ratio[1], definition.get("scale", 1))
+        if "scale" in definition:
+            raise ValueError(f"{where}: only ratios take a scale")
+
+        conditions = []
+        selections = definition.get("where", {})
+        if not isinstance(selections, dict):
+            raise ValueError(f"{where}: 'where' must map column names to a value or a list of values")
+        for column, values in selections.items():
+            conditions.append(Is(column, *(values if isinstance(values, list) else [values])))
+        for key, condition in (("same", Same), ("less", Less)):
+            if key in definition:
+                _check_pair(where, key, definition[key])
+                conditions.append(condition(*definition[key]))
+        by = definition.get("by")
+        if isinstance(by, list):
+            _check_pair(where, "by", by)
+        elif by is not None and not isinstance(by, str):
+            raise ValueError(f"{where}: 'by' must be a column name, {HOUR!r} or [column, {HOUR!r}]")
+        spans = definition.get("spans", False)
+        if not isinstance(spans, bool):
+            raise ValueError(f"{where}: 'spans' must be true or false")
+        return (Spans if spans else Count)(definition["name"], *conditions, by=by)
+
+    def accumulated(self):
+        """
+        Returns the Count and Spans metrics, which are accumulated row by row, in registration order.
+        """
+        return [metric for metric in self.metrics.values() if isinstance(metric, (Count, Spans))]
+
+    def conditions(self):
+        """
+        Returns the distinct conditions of every metric as {condition key: condition}.
+        """
+        conditions = {}
+        for metric in self.accumulated():
+            for condition in metric.conditions:
+                conditions.setdefault(condition.key(), condition)
+        return conditions
+
+    def state(self, engine="python"):
+        """
+        Returns empty running totals, to be fed chunk by chunk.
+        """
+        return MetricState(self, engine)
+
+    def evaluate(self, day, engine="python"):
+        """
+        Evaluates every metric over a ParsedDay, working on its integer codes rather than strings.
+        :param day: ParsedDay, e.g. loaded through a ParseCache
+        :param engine: "numpy" for masked reductions, anything else for the compiled per-row loop
+        :return: Dictionary of metric name to its value, in registration order
+        """
+        state = self.state(engine)
+        state.add(day.columns, day.vocabularies, day.row_count)
+        return state.values(day.vocabularies)
+
+    def compiled(self, present):
+        """
+        Returns the per-row evaluator for chunks holding the given columns, generating it on first use.
+        :param present: frozenset of the column names the chunks hold
+        :return: Tuple of (evaluator, names of the columns it reads)
+        """
+        compiled = self._compiled.get(present)
+        if compiled is None:
+            compiled = self._compiled[present] = self._compile(present)
+        return compiled
+
+    def _compile(self, present):
+        """
+        Generates one loop evaluating every condition once per row and updating every metric, so adding a
+        metric adds an integer operation per row rather than another pass or string comparison.
+        """
+        metrics = self.accumulated()
+        conditions = self.conditions()
+        columns = {column for condition in conditions.values() for column in condition.columns}
+        columns |= {_group_column(metric) for metric in metrics} - {None}
+        needs_hour = any(isinstance(metric, Count) and (metric.by == HOUR or isinstance(metric.by, tuple))
+                         for metric in metrics)
+        if needs_hour or any(isinstance(metric, Spans) for metric in metrics):
+            columns.add(TIME_COLUMN)
+        columns = [column for column in sorted(columns) if column in present]
+        variable = {column: f"c{index}" for index, column in enumerate(columns)}
+        condition_names = {key: f"k{index}" for index, key in enumerate(conditions)}
+
+        lines = ["def evaluate(columns, tables, counts, groups, orders, spans):"]
+        for key, name in condition_names.items():
+            condition = conditions[key]
+            if isinstance(condition, Same):
+                lines.append(f"    {name}_a = tables[{(key, condition.first)!r}]")
+                lines.append(f"    {name}_b = tables[{(key, condition.second)!r}]")
+            elif isinstance(condition, Is):
+                lines.append(f"    {name}_t = tables[{key!r}]")
+        for index, metric in enumerate(metrics):
+            if isinstance(metric, Spans):
+                lines.append(f"    s{index} = spans[{index}]")
+            elif metric.by is not None:
+                lines.append(f"    g{index} = groups[{index}]")
+                lines.append(f"    o{index} = orders[{index}]")
+            elif metric.conditions:
+                lines.append(f"    n{index} = 0")
+        lines.append(f"    for {', '.join(variable[column] for column in columns) or '_'}"
+                     f" in zip({', '.join(f'columns[{column!r}]' for column in columns) or 'columns[None]'}):")
+        body = []
+        for key, name in condition_names.items():
+            condition = conditions[key]
+            if not all(column in present for column in condition.columns):
+                body.append(f"{name} = 0")  # A column the chunk lacks never matches
+            elif isinstance(condition, Is):
+                body.append(f"{name} = {name}_t[{variable[condition.column]}]")
+            elif isinstance(condition, Same):
+                body.append(f"{name} = {name}_a[{variable[condition.first]}] == {name}_b[{variable[condition.second]}]")
+            else:
+                body.append(f"{name} = {variable[condition.first]} < {variable[condition.second]}")
+        if needs_hour:
+            body.append(f"hour = {variable[TIME_COLUMN]} // 3600" if TIME_COLUMN in variable else "hour = 0")
+        for index, metric in enumerate(metrics):
+            test = " & ".join(condition_names[condition.key()] for condition in metric.conditions)
+            if isinstance(metric, Spans):
+                if TIME_COLUMN in variable:
+                    slot = variable.get(metric.by, "0")
+                    body.append(f"s{index}[{slot}][{variable[TIME_COLUMN]}] |= {RAIN} if {test or 1} else {DRY}")
+                continue
+            if metric.by is None:
+                if test:
+                    body.append(f"n{index} += {test}")
+                continue
+            if metric.by == HOUR:
+                slot = "hour"
+            elif isinstance(metric.by, tuple):
+                slot = f"{variable.get(metric.by[0], '0')} * 24 + hour"
+            else:
+                slot = variable.get(metric.by, "0")
+            indent = ""
+            if test:
+                body.append(f"if {test}:")
+                indent = "    "
+            if not isinstance(metric.by, tuple):
+                # Remember the order groups first appear in, as the per-row reference loop did
+                body.append(f"{indent}if not g{index}[{slot}]:")
+                body.append(f"{indent}    o{index}.append({slot})")
+            body.append(f"{indent}g{index}[{slot}] += 1")
+        lines.extend(f"        {line}" for line in body or ["pass"])
+        for index, metric in enumerate(metrics):
+            if isinstance(metric, Count) and metric.by is None and metric.conditions:
+                lines.append(f"    counts[{index}] += n{index}")
+        namespace = {}
+        exec(compile("\n".join(lines), f"<metrics {sorted(self.metrics)}>", "exec"), namespace)
+        return namespace["evaluate"], columns
+
+
+class MetricState:
+    def __init__(self, metric_set, engine="python"):
+        """
+        Initializes the running totals of a MetricSet. Chunks of rows are added as they are read, e.g. while a
+        CSV file is streamed, and values() can be read at any point.
+        :param metric_set: The MetricSet to evaluate
+        :param engine: "numpy" for masked reductions, anything else for the compiled per-row loop
+        """
+        self.metric_set = metric_set
+        self.engine = "numpy" if engine == "numpy" and HAS_NUMPY else "python"
+        self.metrics = metric_set.accumulated()  # Indexed like the totals below
+        self.conditions = metric_set.conditions()
+        self.row_count = 0
+        self.counts = [0] * len(self.metrics)
+        self.groups = {}  # {index: array('q') of counts per group}
+        self.orders = {}  # {index: group keys in order of first appearance}
+        self.spans = {}   # {index: [bytearray(DAY_SECONDS) of per-second states per group]}
+        for index, metric in enumerate(self.metrics):
+            if isinstance(metric, Spans):
+                self.spans[index] = []
+            elif metric.by is not None:
+                self.groups[index] = array('q')
+                self.orders[index] = []
+        self._table_sizes = None
+        self.tables = {}
+
+    def group_size(self, metric, vocabularies):
+        if metric.by == HOUR:
+            return 24
+        size = max(len(vocabularies.get(_group_column(metric), ())), 1)
+        return size * 24 if isinstance(metric.by, tuple) else size
+
+    def _prepare(self, vocabularies):
+        """
+        Sizes the groups and rebuilds the lookup tables for vocabularies that grew since the last chunk.
+        """
+        sizes = {name: len(vocabulary) for name, vocabulary in vocabularies.items()}
+        if sizes == self._table_sizes:
+            return
+        self._table_sizes = sizes
+        for index, group in self.groups.items():
+            missing = self.group_size(self.metrics[index], vocabularies) - len(group)
+            if missing > 0:
+                group.extend(array('q', bytes(missing * group.itemsize)))
+        for index, states in self.spans.items():
+            by = self.metrics[index].by
+            for _ in range(max(len(vocabularies.get(by, ())), 1) - len(states)):
+                states.append(bytearray(DAY_SECONDS))
+        # Is: 1 for every code whose value is selected; Same: a code per value shared by both columns
+        for key, condition in self.conditions.items():
+            if isinstance(condition, Is):
+                self.tables[key] = bytes(value in condition.values for value in vocabularies.get(condition.column, ()))
+            elif isinstance(condition, Same):
+                shared = {}
+                for column in condition.columns:
+                    self.tables[(key, column)] = [shared.setdefault(value, len(shared))
+                                                  for value in vocabularies.get(column, ())]
+
+    def add(self, columns, vocabularies, row_count):
+        """
+        Adds a chunk of rows.
+        :param columns: Dictionary of column name to an array or memoryview of the chunk's codes or values
+        :param vocabularies: Dictionary of categorical column name to its values in code order, as a list or
+                             an insertion-ordered dictionary; it may grow from one chunk to the next
+        :param row_count: Number of rows in the chunk
+        """
+        with stage(f"metrics.{self.engine}") as timed:
+            timed.add(rows=row_count)
+            self.row_count += row_count
+            self._prepare(vocabularies)
+            if not row_count:
+                return
+            if self.engine == "numpy":
+                from numpy_metrics import add_chunk
+                add_chunk(self, columns, vocabularies, row_count)
+                return
+            evaluate, names = self.metric_set.compiled(frozenset(columns))
+            views = {name: memoryview(columns[name]) for name in names}
+            for start in range(0, row_count, CHUNK_ROWS):
+                chunk = {name: view[start:start + CHUNK_ROWS] for name, view in views.items()}
+                chunk[None] = range(min(CHUNK_ROWS, row_count - start))  # Row source when no column is needed
+                evaluate(chunk, self.tables, self.counts, self.groups, self.orders, self.spans)
+
+    def values(self, vocabularies):
+        """
+        Returns the value of every metric for the rows added so far.
+        :param vocabularies: The vocabularies of the last chunk added
+        :return: Dictionary of metric name to its value, in registration order
+        """
+        vocabularies = {name: list(vocabulary) for name, vocabulary in vocabularies.items()}
+        values = {}
+        for index, metric in enumerate(self.metrics):
+            if isinstance(metric, Spans):
+                found = [find_spans(states) for states in self.spans[index]]
+                if metric.by is None:
+                    values[metric.name] = found[0] if found else []
+                else:
+                    names = vocabularies.get(metric.by, ())
+                    values[metric.name] = {names[code]: spans for code, spans in enumerate(found) if spans}
+            elif metric.by is None:
+                values[metric.name] = self.counts[index] if metric.conditions else self.row_count
+            else:
+                values[metric.name] = self._group_values(metric, vocabularies, self.groups[index], self.orders[index])
+        for metric in self.metric_set.metrics.values():
+            if isinstance(metric, Ratio):
+                numerator = values[metric.numerator]
+                denominator = values.get(metric.denominator, metric.denominator)
+                values[metric.name] = metric.rounding(numerator * metric.scale / denominator) if denominator else 0
+        return {name: values[name] for name in self.metric_set.metrics}
+
+    @staticmethod
+    def _group_values(metric, vocabularies, group, order):
+        """
+        Turns the counts of a grouped metric into its result dictionary.
+        """
+        if metric.by == HOUR:
+            return {f"{hour:02d}": group[hour] for hour in order}
+        names = vocabularies.get(_group_column(metric), [])
+        if isinstance(metric.by, tuple):
+            hours = {}
+            for code, value in enumerate(names):
+                counts = group[code * 24:code * 24 + 24]
+                if any(counts):
+                    hours[value] = counts.tolist()
+            return hours
+        return {names[code] if code < len(names) else None: group[code] for code in order}
+
+
+# Example: python metric_registry.py traffic_data15062024.csv --metrics site_metrics.json --engine numpy
+if __name__ == "__main__":
+    # Use the classes of the imported module, which DEFAULT_METRICS is built from, rather than __main__'s
+    from metric_registry import MetricSet
+    from parse_cache import ParseCache
+    from traffic_metrics import DEFAULT_METRICS
+
+    parser = argparse.ArgumentParser(description="Evaluate the daily metrics, plus any per-site ones, for a CSV file.")
+    parser.add_argument("file", help="Traffic CSV file")
+    parser.add_argument("--metrics", metavar="JSON", help="File of extra metric definitions")
+    parser.add_argument("--engine", choices=("python", "numpy"), default="python")
+    args = parser.parse_args()
+
+    metric_set = DEFAULT_METRICS
+    if args.metrics:
+        try:
+            metric_set = DEFAULT_METRICS.extended(MetricSet.from_json(args.metrics, DEFAULT_METRICS))
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read metrics: {e}")
+    for name, value in metric_set.evaluate(ParseCache().load(args.file), args.engine).items():
+        print(f"{name}: {value}")
@@ -0,0 +1,140 @@
+import mmap
+import re
+from collections import Counter
+
+from instrumentation import stage
+from traffic_metrics import ELM_JUNCTION, HANLEY_JUNCTION
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the regex scanner is always available
+    np = None
+
+WINDOW_SIZE = 16 << 20  # Bytes scanned at a time, keeps temporary arrays bounded
+
+
+def _row_pattern(junction_col, time_col):
+    """
+    Builds a regex that captures only the junction name and the hour digits of each row.
+    """
+    fields = []
+    for position in range(max(junction_col, time_col) + 1):
+        if position == junction_col:
+            fields.append(rb"([^,\n]*)")
+        elif position == time_col:
+            fields.append(rb"\s*(\d+):[^,\n]*")
+        else:
+            fields.append(rb"[^,\n]*")
+    return re.compile(rb"^" + rb",".join(fields), re.MULTILINE)
+
+
+class _Scanner:
+    def __init__(self, columns, junctions):
+        """
+        Initializes the per-window scanners for one file layout.
+        :param columns: Header column names as bytes
+        :param junctions: Names of the junctions to count
+        """
+        self.column_count = len(columns)
+        self.junction_col = columns.index(b"JunctionName")
+        self.time_col = columns.index(b"timeOfDay")
+        self.pattern = _row_pattern(self.junction_col, self.time_col)
+        self.junctions = [junction.encode("utf-8") for junction in junctions]
+        self.counts = [[0] * 24 for _ in junctions]
+
+    def scan_regex(self, buffer, start, end):
+        """
+        Counts one window by matching only the two wanted fields of each row.
+        """
+        pairs = Counter(self.pattern.findall(buffer, start, end))
+        junction_first = self.junction_col < self.time_col
+        for groups, count in pairs.items():
+            junction, hour = groups if junction_first else groups[::-1]
+            junction = junction.strip()
+            if junction in self.junctions:
+                self.counts[self.junctions.index(junction)][int(hour)] += count
+
+    def scan_numpy(self, buffer, start, end):
+        """
+        Counts one window from newline and comma positions found with vectorized byte comparisons.
+        Falls back to the regex scanner when the window is not a plain grid of fields.
+        """
+        data = np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start)
+        newlines = np.flatnonzero(data == ord("\n"))
+        commas = np.flatnonzero(data == ord(","))
+        separators = self.column_count - 1
+        if not len(newlines) or len(commas) != len(newlines) * separators or separators == 0:
+            return self.scan_regex(buffer, start, end)
+
+        commas = commas.reshape(-1, separators)
+        if (commas[:, -1] > newlines).any() or (commas[1:, 0] < newlines[:-1]).any():
+            return self.scan_regex(buffer, start, end)
+        time_start, time_end = self._field_bounds(data, commas, newlines, self.time_col)
+        junction_start, junction_end = self._field_bounds(data, commas, newlines, self.junction_col)
+        if (time_end - time_start < 3).any() or (data[time_start + 2] != ord(":")).any():
+            return self.scan_regex(buffer, start, end)
+
+        hours = (data[time_start].astype(np.int64) - ord("0")) * 10 + data[time_start + 1] - ord("0")
+        if ((hours < 0) | (hours > 23)).any():
+            return self.scan_regex(buffer, start, end)
+
+        junction_length = junction_end - junction_start
+        padded = junction_length > 0
+        if ((data[junction_start[padded]] == ord(" ")) | (data[junction_end[padded] - 1] == ord(" "))).any():
+            return self.scan_regex(buffer, start, end)
+
+        for index, name in enumerate(self.junctions):
+            # Narrow the candidate rows one byte of the junction name at a time
+            rows = np.flatnonzero(junction_length == len(name))
+            for offset, byte in enumerate(name):
+                if not len(rows):
+                    break
+                rows = rows[data[junction_start[rows] + offset] == byte]
+            counts = np.bincount(hours[rows], minlength=24)
+            self.counts[index] = [total + int(count) for total, count in zip(self.counts[index], counts)]
+
+    def _field_bounds(self, data, commas, newlines, column):
+        """
+        Returns the start and end offsets of one column in every line of a window.
+        """
+        if column == 0:
+            starts = np.concatenate(([0], newlines[:-1] + 1))
+        else:
+            starts = commas[:, column - 1] + 1
+        if column == self.column_count - 1:
+            ends = newlines - (data[newlines - 1] == ord("\r"))
+        else:
+            ends = commas[:, column]
+        return starts, ends
+
+
+def scan_hourly_counts(file_name, junctions=(ELM_JUNCTION, HANLEY_JUNCTION), window_size=WINDOW_SIZE):
+    """
+    Counts vehicles per junction and hour by scanning a memory-mapped CSV file in place.
+    No Python string is built for the columns the histogram does not use.
+    Raises FileNotFoundError when the file does not exist.
+    :param file_name: Path of the traffic CSV file
+    :param junctions: Names of the junctions to count
+    :param window_size: Approximate number of bytes scanned at a time
+    :return: Dictionary of junction name to its 24 hourly vehicle counts
+    """
+    with open(file_name, "rb") as file:
+        header = file.readline()
+        scanner = _Scanner(header.strip().split(b","), junctions)
+        scan = scanner.scan_numpy if np is not None else scanner.scan_regex
+        size = file.seek(0, 2)
+
+        if size > len(header):
+            with stage("mmap.scan") as timed, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                start = len(header)
+                while start < size:
+                    end = buffer.rfind(b"\n", start, min(start + window_size, size)) + 1
+                    if end <= start:
+                        # No complete line left, the last line has no trailing newline
+                        scanner.scan_regex(buffer, start, size)
+                        break
+                    scan(buffer, start, end)
+                    start = end
+                timed.add(size=size - len(header))
+
+    return dict(zip(junctions, scanner.counts))
@@ -0,0 +1,145 @@
+import argparse
+import sys
+
+import numpy as np
+
+from metric_registry import HOUR, Is, MetricSet, Same, Spans
+from parse_cache import TIME_COLUMN, parse_csv
+from rain_intervals import DRY, RAIN
+from traffic_core import report_from_day
+from traffic_metrics import DEFAULT_METRICS, aggregate_file
+
+
+def column_array(data):
+    """
+    Wraps a column without copying it. Columns are arrays or, for mapped days, memoryviews; both expose
+    their item format.
+    """
+    return np.frombuffer(data, dtype=np.dtype(memoryview(data).format)) if len(data) else np.zeros(0, dtype=np.int32)
+
+
+def _condition_masks(state, columns, row_count):
+    """
+    Returns a boolean row mask per condition of a MetricState, keyed like its conditions.
+    """
+    masks = {}
+    for key, condition in state.conditions.items():
+        if not all(column in columns for column in condition.columns):
+            masks[key] = np.zeros(row_count, dtype=bool)  # A column the chunk lacks never matches
+        elif isinstance(condition, Is):
+            selected = np.frombuffer(state.tables[key], dtype=bool)
+            masks[key] = selected[columns[condition.column]]
+        elif isinstance(condition, Same):
+            first = np.array(state.tables[(key, condition.first)], dtype=np.intp)
+            second = np.array(state.tables[(key, condition.second)], dtype=np.intp)
+            masks[key] = first[columns[condition.first]] == second[columns[condition.second]]
+        else:
+            masks[key] = columns[condition.first] < columns[condition.second]
+    return masks
+
+
+def add_chunk(state, columns, vocabularies, row_count):
+    """
+    Adds a chunk of rows to a MetricState with masked reductions instead of the compiled per-row loop.
+    Called by MetricState.add once its groups and lookup tables are sized for the vocabularies.
+    """
+    columns = {name: column_array(data) for name, data in columns.items()}
+    masks = _condition_masks(state, columns, row_count)
+    seconds = columns.get(TIME_COLUMN)
+    hours = seconds // 3600 if seconds is not None else np.zeros(row_count, dtype=np.intp)
+    zeros = np.zeros(row_count, dtype=np.intp)
+    for index, metric in enumerate(state.metrics):
+        mask = np.ones(row_count, dtype=bool)
+        for condition in metric.conditions:
+            mask &= masks[condition.key()]
+        if isinstance(metric, Spans):
+            if seconds is None:
+                continue
+            slots = columns.get(metric.by, zeros) if metric.by is not None else zeros
+            for slot, states in enumerate(state.spans[index]):
+                rows = slots == slot
+                view = np.frombuffer(states, dtype=np.uint8)
+                view[seconds[rows & ~mask]] |= DRY
+                view[seconds[rows & mask]] |= RAIN
+            continue
+        if metric.by is None:
+            if metric.conditions:
+                state.counts[index] += int(np.count_nonzero(mask))
+            continue
+
+        if metric.by == HOUR:
+            keys = hours
+        elif isinstance(metric.by, tuple):
+            keys = columns.get(metric.by[0], zeros).astype(np.intp) * 24 + hours
+        else:
+            keys = columns.get(metric.by, zeros)
+        keys = keys[mask]
+        if not len(keys):
+            continue
+        group = np.frombuffer(state.groups[index], dtype=np.int64)
+        if not isinstance(metric.by, tuple):
+            # Groups first seen in this chunk, in the order the per-row loop would meet them
+            present, first_seen = np.unique(keys, return_index=True)
+            new = group[present] == 0
+            state.orders[index].extend(present[new][np.argsort(first_seen[new], kind='stable')].tolist())
+        group += np.bincount(keys, minlength=len(group))
+
+
+def _summary(report):
+    return (report.results(), list(report.vehicles_by_hour.items()), report.hourly_by_junction, report.rain_spans,
+            report.metrics)
+
+
+def check_parity(file_names, metrics=None):
+    """
+    Compares every way of evaluating the metric set against the compiled per-row loop over a streamed file:
+    the vectorized engine while streaming, and both engines over the whole parsed day.
+    :param file_names: Paths of the CSV files to compare
+    :param metrics: Optional MetricSet of per-site metrics, compared as well
+    :return: True when every file produces identical reports
+    """
+    identical = True
+    for file_name in file_names:
+        expected = aggregate_file(file_name, metrics=metrics).report()
+        day = parse_csv(file_name)
+        reports = {
+            "stream.numpy": aggregate_file(file_name, metrics=metrics, engine="numpy").report(),
+            "day.python": report_from_day(day, engine="python", metrics=metrics),
+            "day.numpy": report_from_day(day, engine="numpy", metrics=metrics),
+        }
+        mismatched = [engine for engine, report in reports.items() if _summary(report) != _summary(expected)]
+        if not mismatched:
+            print(f"OK: {file_name}")
+            continue
+        identical = False
+        for engine in mismatched:
+            actual = reports[engine]
+            print(f"MISMATCH: {file_name} ({engine})")
+            for want, got in zip(expected.results(), actual.results()):
+                if want != got:
+                    print(f"  expected: {want}\n  actual:   {got}")
+            if expected.vehicles_by_hour != actual.vehicles_by_hour:
+                print("  hourly Hanley Highway/Westway counts differ")
+            if expected.hourly_by_junction != actual.hourly_by_junction:
+                print("  hourly junction counts differ")
+            if expected.rain_spans != actual.rain_spans:
+                print("  rain spans differ")
+            if expected.metrics != actual.metrics:
+                print("  per-site metrics differ")
+    return identical
+
+
+# Parity check entry point: python numpy_metrics.py traffic_data15062024.csv ... [--metrics site_metrics.json]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that every engine computes the same metrics.")
+    parser.add_argument("files", nargs="+", help="Traffic CSV files")
+    parser.add_argument("--metrics", metavar="JSON", help="File of per-site metric definitions to compare too")
+    args = parser.parse_args()
+
+    site_metrics = None
+    if args.metrics:
+        try:
+            site_metrics = MetricSet.from_json(args.metrics, DEFAULT_METRICS)
+        except (OSError, ValueError) as e:
+            parser.error(f"Cannot read metrics: {e}")
+    sys.exit(0 if check_parity(args.files, site_metrics) else 1)
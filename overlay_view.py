@@ -0,0 +1,253 @@
+import argparse
+import os
+
+from canvas_renderer import HistogramWindow
+from binned_series import DAY_SECONDS
+from day_profiles import DEFAULT_CAPACITY, DayProfileCache, band_statistics
+from traffic_core import date_range_files, file_date
+from traffic_metrics import HANLEY_JUNCTION
+
+DEFAULT_PAGE_DAYS = 7
+TICK_STEPS = (3600, 7200, 10800, 21600, 43200)
+TICK_MIN_PX = 60  # Minimum spacing between hour labels
+
+# Fill colours of the bands, the lines drawn over them and the legend
+OUTER_BAND = "#c6dbef"
+INNER_BAND = "#6baed6"
+DAY_LINE = "#b0b0b0"
+MEDIAN_LINE = "#08519c"
+MEAN_LINE = "black"
+
+
+class OverlayApp(HistogramWindow):
+    def __init__(self, profiles, file_names, junction=HANLEY_JUNCTION, days_per_page=DEFAULT_PAGE_DAYS,
+                 canvas_width=1000):
+        """
+        Initializes a view overlaying the daily profiles of one junction across a page of days, with
+        10-90 and 25-75 percentile bands, the median and the mean.
+        :param profiles: DayProfileCache the per-day profiles are read from
+        :param file_names: Traffic CSV files of every date that can be paged through, in date order
+        :param junction: Junction whose profiles are shown
+        :param days_per_page: Number of days overlaid at once
+        :param canvas_width: Width of the canvas in pixels
+        """
+        super().__init__()
+        self.profiles = profiles
+        self.file_names = file_names
+        self.junction = junction
+        self.days_per_page = max(1, days_per_page)
+        self.canvas_width = canvas_width
+        self.canvas_height = 640
+        self.plot_left = 70
+        self.plot_right = canvas_width - 30
+        self.plot_top = 110
+        self.plot_bottom = 540
+        self._bound = False
+        self.set_page(0)
+
+    def set_page(self, first):
+        """
+        Shows the days starting at file index first, clamped to the dates available.
+        """
+        self.first = min(max(0, first), max(len(self.file_names) - self.days_per_page, 0))
+        self.page_files = self.file_names[self.first:self.first + self.days_per_page]
+        self.days = []  # (label, counts per bin) of the days with data
+        for file_name in self.page_files:
+            counts = self.profiles.junction_counts(file_name, self.junction)
+            if counts is not None:
+                date = file_date(file_name)
+                self.days.append((date.strftime("%d/%m") if date else os.path.basename(file_name), counts))
+        self.statistics = band_statistics([counts for _, counts in self.days])
+        self.peak = max((max(counts) for _, counts in self.days), default=0) or 1
+
+    def page(self, pages):
+        """
+        Moves forward (pages > 0) or back by whole pages; fractions move by single days.
+        """
+        self.set_page(self.first + round(pages * self.days_per_page))
+
+    def next_junction(self):
+        """
+        Switches to the next junction seen on the current page, in name order.
+        """
+        names = sorted({name for file_name in self.page_files for name in (self.profiles.get(file_name) or ())})
+        if names:
+            self.junction = names[(names.index(self.junction) + 1) % len(names)] if self.junction in names else names[0]
+            self.set_page(self.first)
+
+    def _date_label(self, file_name):
+        date = file_date(file_name)
+        return date.strftime("%d/%m/%Y") if date else os.path.basename(file_name)
+
+    def window_title(self):
+        return f"Daily profiles of {self.junction}"
+
+    def heading_shapes(self):
+        """
+        Returns the main heading, naming the junction and the dates of the page.
+        """
+        missing = len(self.page_files) - len(self.days)
+        dates = (f"{self._date_label(self.page_files[0])} to {self._date_label(self.page_files[-1])}"
+                 if self.page_files else "no dates")
+        return [
+            ("heading", "text", (self.canvas_width // 2, 30),
+             {"text": f"{self.junction}: vehicles per {self.profiles.bin_seconds // 60} minutes",
+              "font": ("Arial", 16, "bold"), "fill": "black"}),
+            ("subheading", "text", (self.canvas_width // 2, 55),
+             {"text": f"{dates} ({len(self.days)} days" + (f", {missing} missing" if missing else "") + ")",
+              "font": ("Arial", 11), "fill": "black"}),
+        ]
+
+    def _x(self, index):
+        return self.plot_left + (self.plot_right - self.plot_left) * (index + 0.5) / self.profiles.bin_count
+
+    def _y(self, value):
+        return self.plot_bottom - (self.plot_bottom - self.plot_top) * value / self.peak
+
+    def _line(self, values):
+        coords = []
+        for index, value in enumerate(values):
+            coords.extend((self._x(index), self._y(value)))
+        if len(coords) == 2:
+            coords.extend(coords)  # A line needs two points even for a single bin
+        return tuple(coords)
+
+    def _band(self, lower, upper):
+        coords = list(self._line(upper))
+        for index in reversed(range(len(lower))):
+            coords.extend((self._x(index), self._y(lower[index])))
+        return tuple(coords)
+
+    def histogram_shapes(self):
+        """
+        Returns the percentile bands, one thin line per day, the median and mean lines, hour ticks and axes.
+        Every page has the same items, so paging only moves them and they keep their stacking order.
+        """
+        shapes = []
+        statistics = self.statistics
+        hidden = {"state": "hidden"}
+        flat = (self.plot_left, self.plot_bottom, self.plot_right, self.plot_bottom)
+        if statistics:
+            shapes.append(("outer_band", "polygon", self._band(statistics["p10"], statistics["p90"]),
+                           {"fill": OUTER_BAND, "outline": "", "state": "normal"}))
+            shapes.append(("inner_band", "polygon", self._band(statistics["p25"], statistics["p75"]),
+                           {"fill": INNER_BAND, "outline": "", "state": "normal"}))
+        else:
+            shapes.append(("outer_band", "polygon", flat + flat[:2], {"fill": OUTER_BAND, "outline": "", **hidden}))
+            shapes.append(("inner_band", "polygon", flat + flat[:2], {"fill": INNER_BAND, "outline": "", **hidden}))
+
+        for slot in range(self.days_per_page):
+            if slot < len(self.days):
+                shapes.append((("day", slot), "line", self._line(self.days[slot][1]),
+                               {"fill": DAY_LINE, "width": 1, "state": "normal"}))
+            else:
+                shapes.append((("day", slot), "line", flat, {"fill": DAY_LINE, "width": 1, **hidden}))
+
+        for key, values, options in (("median", statistics.get("p50"), {"fill": MEDIAN_LINE, "width": 2, "dash": (6, 3)}),
+                                     ("mean", statistics.get("mean"), {"fill": MEAN_LINE, "width": 2})):
+            if values:
+                shapes.append((key, "line", self._line(values), {**options, "state": "normal"}))
+            else:
+                shapes.append((key, "line", flat, {**options, **hidden}))
+
+        # Hour ticks, at most one every TICK_MIN_PX pixels
+        px_per_second = (self.plot_right - self.plot_left) / 86400
+        step = next((step for step in TICK_STEPS if step * px_per_second >= TICK_MIN_PX), TICK_STEPS[-1])
+        for slot, seconds in enumerate(range(0, 86400 + 1, step)):
+            x = self.plot_left + seconds * px_per_second
+            shapes.append((("tick", slot), "line", (x, self.plot_bottom, x, self.plot_bottom + 5), {}))
+            shapes.append((("tick_label", slot), "text", (x, self.plot_bottom + 8),
+                           {"text": f"{seconds // 3600:02d}:00", "anchor": "n", "font": ("Arial", 9)}))
+
+        shapes.append(("x_axis", "line", (self.plot_left, self.plot_bottom, self.plot_right, self.plot_bottom), {}))
+        shapes.append(("y_axis", "line", (self.plot_left, self.plot_top, self.plot_left, self.plot_bottom), {}))
+        shapes.append(("y_peak", "text", (self.plot_left - 6, self.plot_top),
+                       {"text": str(self.peak), "anchor": "e", "font": ("Arial", 9)}))
+        shapes.append(("x_label", "text", (self.canvas_width // 2, self.plot_bottom + 45), {
+            "text": "Time of day (Left/Right: page, Shift+Left/Right: one day, J: next junction)",
+            "anchor": "center", "font": ("Arial", 11)}))
+        return shapes
+
+    def legend_shapes(self):
+        """
+        Returns the legend of the bands and lines.
+        """
+        entries = (("outer", "rectangle", OUTER_BAND, "10th-90th percentile"),
+                   ("inner", "rectangle", INNER_BAND, "25th-75th percentile"),
+                   ("median", "line", MEDIAN_LINE, "Median"),
+                   ("mean", "line", MEAN_LINE, "Mean"),
+                   ("days", "line", DAY_LINE, "Single days"))
+        shapes = []
+        column_width = (self.canvas_width - 100) // len(entries)
+        for index, (key, kind, color, text) in enumerate(entries):
+            x, y = 55 + index * column_width, 78
+            if kind == "rectangle":
+                shapes.append((("swatch", key), "rectangle", (x, y, x + 16, y + 16), {"fill": color, "outline": ""}))
+            else:
+                shapes.append((("swatch", key), "line", (x, y + 8, x + 16, y + 8), {"fill": color, "width": 2}))
+            shapes.append((("name", key), "text", (x + 24, y + 8), {"text": text, "anchor": "w", "font": ("Arial", 10)}))
+        return shapes
+
+    def redraw(self):
+        """
+        Updates the heading, the plot and the legend after the page or junction changed.
+        """
+        self.setup_window()
+        self.draw_histogram()
+        self.add_legend()
+
+    def setup_window(self):
+        """
+        Sets up the window and binds the keys that page through the dates.
+        """
+        super().setup_window()
+        if not self._bound:
+            bindings = {
+                "<Left>": lambda event: self.page(-1), "<Right>": lambda event: self.page(1),
+                "<Prior>": lambda event: self.page(-1), "<Next>": lambda event: self.page(1),
+                "<Shift-Left>": lambda event: self.set_page(self.first - 1),
+                "<Shift-Right>": lambda event: self.set_page(self.first + 1),
+                "<Home>": lambda event: self.set_page(0),
+                "<End>": lambda event: self.set_page(len(self.file_names)),
+                "<j>": lambda event: self.next_junction(),
+            }
+            for sequence, action in bindings.items():
+                self.root.bind(sequence, lambda event, action=action: (action(event), self.redraw()))
+            self._bound = True
+
+    def close(self):
+        super().close()
+        self._bound = False
+
+    def refresh(self, junction):
+        """
+        Shows another junction on the current page.
+        """
+        self.junction = junction
+        self.set_page(self.first)
+        self.redraw()
+
+
+# Example: python overlay_view.py 01062024 30062024 --page 30 --junction "Hanley Highway/Westway"
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overlay the daily vehicle profiles of a junction across many days.")
+    parser.add_argument("start", metavar="DDMMYYYY", help="First date")
+    parser.add_argument("end", metavar="DDMMYYYY", help="Last date")
+    parser.add_argument("--junction", default=HANLEY_JUNCTION)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE_DAYS, help="Days overlaid at once")
+    parser.add_argument("--bin", type=int, default=60, help="Bin width in minutes")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Days kept in memory")
+    parser.add_argument("--directory", default=".")
+    args = parser.parse_args()
+    if args.bin <= 0 or DAY_SECONDS % (args.bin * 60):
+        parser.error(f"--bin must be a positive number of minutes that divides a day evenly, not {args.bin}")
+    if args.page <= 0:
+        parser.error(f"--page must be a positive number of days, not {args.page}")
+    if args.capacity <= 0:
+        parser.error(f"--capacity must be a positive number of days, not {args.capacity}")
+
+    cache = DayProfileCache(args.capacity, args.bin * 60)
+    app = OverlayApp(cache, date_range_files(args.start, args.end, args.directory), args.junction, args.page)
+    app.run()
+    app.close()
+    print(f"Profiles read: {cache.misses}, served from memory: {cache.hits}")
@@ -0,0 +1,455 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import partial
+from itertools import repeat
+
+from instrumentation import stage
+
+CACHE_DIRECTORY = ".traffic_cache"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+CATEGORICAL_COLUMNS = ('JunctionName', 'VehicleType', 'travel_Direction_in', 'travel_Direction_out',
+                       'elctricHybrid', 'Weather_Conditions')
+INTEGER_COLUMNS = ('JunctionSpeedLimit', 'VehicleSpeed')
+TIME_COLUMN = 'timeOfDay'
+
+MAGIC = b"TRAFDAY1"
+ALIGNMENT = 8
+CONVERTED_SUFFIX = ".tday"  # Packed copy written next to a CSV file by traffic_convert.py
+_PACK_INT = struct.Struct("=i").pack  # Native layout of one array('i') item
+
+CHUNK_SIZE = 1 << 20  # Approximate number of bytes read per chunk
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """
+    Reads an open text file in chunks of whole lines so memory stays constant.
+    :param file: File object positioned at the first line to read
+    :param chunk_size: Approximate number of bytes per chunk
+    """
+    while True:
+        with stage("csv.read") as timed:
+            lines = file.readlines(chunk_size)
+            timed.add(rows=len(lines), size=sum(map(len, lines)))
+        if not lines:
+            return
+        yield lines
+
+
+def time_to_seconds(value):
+    """
+    Converts a "HH:MM:SS" string to seconds since midnight.
+    """
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def seconds_to_time(value):
+    """
+    Converts seconds since midnight back to a "HH:MM:SS" string.
+    """
+    return f"{value // 3600:02d}:{value // 60 % 60:02d}:{value % 60:02d}"
+
+
+def _codes_typecode(size):
+    if size <= 0x100:
+        return 'B'
+    if size <= 0x10000:
+        return 'H'
+    return 'i'
+
+
+def _integer_typecode(low, high):
+    if 0 <= low and high <= 0xFF:
+        return 'B'
+    if 0 <= low and high <= 0xFFFF:
+        return 'H'
+    return 'i'
+
+
+def _narrowed(data, typecode):
+    """
+    Converts an array('i') to typecode 'B', 'H' or 'i', whose range the values are known to fit.
+    On little-endian machines the low bytes of each item are copied with slices instead of item by item.
+    """
+    if typecode == data.typecode:
+        return data
+    if sys.byteorder != "little":
+        return array(typecode, data)
+    raw = data.tobytes()
+    size = array(typecode).itemsize
+    narrow = bytearray(len(data) * size)
+    for byte in range(size):
+        narrow[byte::size] = raw[byte::data.itemsize]
+    return array(typecode, narrow)
+
+
+class ParsedDay:
+    def __init__(self, columns, vocabularies, row_count):
+        """
+        Initializes a parsed day held as typed columns.
+        :param columns: Dictionary of column name to array; categorical columns hold vocabulary codes
+        :param vocabularies: Dictionary of categorical column name to its list of distinct values
+        :param row_count: Number of data rows
+        """
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.row_count = row_count
+
+    def values(self, name):
+        """
+        Decodes one column back to the string values the CSV holds.
+        """
+        data = self.columns[name]
+        if name in self.vocabularies:
+            return list(map(self.vocabularies[name].__getitem__, data))
+        if name == TIME_COLUMN:
+            formatted = {value: seconds_to_time(value) for value in set(data)}
+            return list(map(formatted.__getitem__, data))
+        return list(map(str, data))
+
+
+class _Lookup(dict):
+    """
+    Dictionary converting each missing raw value once and remembering the result, packed as the bytes of
+    one array('i') item so a whole column is encoded with a single bytes.join.
+    """
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, key):
+        value = self[key] = _PACK_INT(self.convert(key))
+        return value
+
+
+def _vocabulary_code(vocabulary, value):
+    return vocabulary.setdefault(value.strip(), len(vocabulary))
+
+
+class ColumnEncoder:
+    def __init__(self, header):
+        """
+        Initializes the encoding of CSV chunks into typed columns. Each distinct raw value is converted once
+        per file, into a vocabulary code, seconds since midnight or an integer, rather than once per row.
+        :param header: Column names from the CSV header, in file order
+        """
+        index = {name: i for i, name in enumerate(header)}
+        self.width = len(header)
+        self.names = [name for name in CATEGORICAL_COLUMNS + INTEGER_COLUMNS + (TIME_COLUMN,) if name in index]
+        self.positions = {name: index[name] for name in self.names}
+        self.vocabularies = {name: {} for name in CATEGORICAL_COLUMNS if name in index}
+        # Both direction columns share one vocabulary so their codes can be compared directly
+        if 'travel_Direction_in' in self.vocabularies and 'travel_Direction_out' in self.vocabularies:
+            self.vocabularies['travel_Direction_out'] = self.vocabularies['travel_Direction_in']
+        self.lookups = {}
+        for name in self.names:
+            if name in self.vocabularies:
+                self.lookups[name] = _Lookup(partial(_vocabulary_code, self.vocabularies[name]))
+            else:
+                self.lookups[name] = _Lookup(time_to_seconds if name == TIME_COLUMN else int)
+
+    def split(self, lines):
+        """
+        Splits a chunk of lines into the raw values of each column.
+        :return: Tuple of ({column name: sequence of raw values}, row count)
+        """
+        if set(map(str.count, lines, repeat(','))) == {self.width - 1}:
+            # Every line has exactly one field per header column, so the chunk splits as one string
+            count = len(lines)
+            flat = ''.join(lines).replace('\n', ',').split(',')
+            end = count * self.width
+            return {name: flat[position:end:self.width] for name, position in self.positions.items()}, count
+
+        rows = [line.split(',') for line in map(str.strip, lines) if line]
+        width = max(self.positions.values(), default=-1) + 1  # Fields a row needs to hold every column
+        if rows and min(map(len, rows)) < width:
+            # zip() stops at the shortest row, so pad rows missing trailing fields such as elctricHybrid
+            rows = [row if len(row) >= width else row + [''] * (width - len(row)) for row in rows]
+        fields = list(zip(*rows))
+        return {name: fields[position] for name, position in self.positions.items()} if rows else {}, len(rows)
+
+    def encode(self, lines):
+        """
+        Encodes a chunk of data lines (without the header).
+        :return: Tuple of ({column name: array of the chunk's codes or values}, row count)
+        """
+        with stage("csv.split") as timed:
+            fields, count = self.split(lines)
+            timed.add(rows=count)
+        with stage("csv.encode") as timed:
+            timed.add(rows=count)
+            columns = {}
+            for name, values in fields.items():
+                columns[name] = data = array('i')
+                data.frombytes(b''.join(map(self.lookups[name].__getitem__, values)))
+        return columns, count
+
+    def vocabulary_lists(self):
+        """
+        Returns the vocabularies so far as lists indexed by code.
+        """
+        return {name: list(vocabulary) for name, vocabulary in self.vocabularies.items()}
+
+    def parsed_day(self, columns, row_count):
+        """
+        Packs the columns of every chunk into a ParsedDay, narrowing each to the smallest type that holds it.
+        :param columns: Dictionary of column name to array('i') of every row
+        """
+        columns = dict(columns)
+        for name, vocabulary in self.vocabularies.items():
+            columns[name] = _narrowed(columns[name], _codes_typecode(len(vocabulary)))
+        # Speeds fit in a byte; narrow them like the codes
+        for name in INTEGER_COLUMNS:
+            if columns.get(name):
+                columns[name] = _narrowed(columns[name], _integer_typecode(min(columns[name]), max(columns[name])))
+        return ParsedDay(columns, self.vocabulary_lists(), row_count)
+
+
+def parse_csv(file_name, chunk_size=CHUNK_SIZE):
+    """
+    Parses a traffic CSV file into typed columns, dictionary-encoding the categorical ones.
+    :param file_name: Path of the CSV file
+    :param chunk_size: Approximate number of bytes read per chunk
+    :return: The ParsedDay for the file
+    """
+    with open(file_name, 'r') as file:
+        encoder = ColumnEncoder(file.readline().strip().split(','))
+        columns = {name: array('i') for name in encoder.names}
+        row_count = 0
+        for lines in read_chunks(file, chunk_size):
+            chunk, count = encoder.encode(lines)
+            row_count += count
+            for name, data in chunk.items():
+                columns[name].extend(data)
+    return encoder.parsed_day(columns, row_count)
+
+
+def write_day(day, path, source=None):
+    """
+    Writes a ParsedDay as a packed columnar file with 8-byte aligned column blocks.
+    :param day: The ParsedDay to write
+    :param path: Destination path, replaced atomically
+    :param source: Optional dictionary describing the CSV file the day was parsed from
+    """
+    descriptors = []
+    offset = 0
+    for name, data in day.columns.items():
+        descriptors.append({
+            "name": name,
+            "typecode": data.typecode,
+            "offset": offset,
+            "count": len(data),
+            "vocabulary": day.vocabularies.get(name),
+        })
+        offset += -(-len(data) * data.itemsize // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({"source": source, "rows": day.row_count, "columns": descriptors}).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGNMENT)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(prefix)
+        for data in day.columns.values():
+            if sys.byteorder != "little":
+                data = array(data.typecode, data)
+                data.byteswap()
+            file.write(data.tobytes())
+            file.write(b"\0" * (-len(data) * data.itemsize % ALIGNMENT))
+    os.replace(temporary, path)
+
+
+def read_header(file):
+    """
+    Reads the header of a packed columnar file.
+    :return: Tuple of (header dictionary, byte offset where the column blocks start)
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a packed traffic day file")
+    (length,) = struct.unpack("<I", file.read(4))
+    header = json.loads(file.read(length).decode("utf-8"))
+    start = len(MAGIC) + 4 + length
+    return header, start + (-start % ALIGNMENT)
+
+
+def read_day(path):
+    """
+    Reads a packed columnar file written by write_day.
+    :return: The ParsedDay stored in the file
+    """
+    with open(path, "rb") as file:
+        header, start = read_header(file)
+        columns = {}
+        vocabularies = {}
+        for descriptor in header["columns"]:
+            data = array(descriptor["typecode"])
+            file.seek(start + descriptor["offset"])
+            data.fromfile(file, descriptor["count"])
+            if sys.byteorder != "little":
+                data.byteswap()
+            columns[descriptor["name"]] = data
+            if descriptor["vocabulary"] is not None:
+                vocabularies[descriptor["name"]] = descriptor["vocabulary"]
+    return ParsedDay(columns, vocabularies, header["rows"])
+
+
+def map_day(path):
+    """
+    Memory-maps a packed columnar file written by write_day. The columns are read-only memoryviews of the
+    mapping, so only the header is parsed and pages are read as the columns are used.
+    Falls back to read_day on big-endian machines, where the little-endian columns must be swapped.
+    :return: The ParsedDay stored in the file
+    """
+    if sys.byteorder != "little":
+        return read_day(path)
+    with open(path, "rb") as file:
+        header, start = read_header(file)
+        view = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+    columns = {}
+    vocabularies = {}
+    for descriptor in header["columns"]:
+        first = start + descriptor["offset"]
+        size = descriptor["count"] * array(descriptor["typecode"]).itemsize
+        columns[descriptor["name"]] = view[first:first + size].cast(descriptor["typecode"])
+        if descriptor["vocabulary"] is not None:
+            vocabularies[descriptor["name"]] = descriptor["vocabulary"]
+    return ParsedDay(columns, vocabularies, header["rows"])
+
+
+def converted_path(file_name):
+    """
+    Returns the path of the packed copy of a CSV file, e.g. traffic_data15062024.tday.
+    """
+    return os.path.splitext(file_name)[0] + CONVERTED_SUFFIX
+
+
+def load_converted(file_name):
+    """
+    Maps the packed copy of a CSV file written by traffic_convert.py.
+    The copy is used when the CSV file has been removed or is unchanged since the conversion.
+    :return: The ParsedDay, or None when there is no up-to-date copy
+    """
+    path = converted_path(file_name)
+    try:
+        with open(path, "rb") as file:
+            header, _ = read_header(file)
+        source = header["source"] or {}
+        stat = os.stat(file_name)
+        if (source.get("size"), source.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+            return None
+    except FileNotFoundError as e:
+        if e.filename != file_name:
+            return None  # No packed copy
+    except (OSError, ValueError, KeyError):
+        return None
+    with stage("converted.map") as timed:
+        day = map_day(path)
+        timed.add(rows=day.row_count)
+    return day
+
+
+class ParseCache:
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=MAX_CACHE_BYTES):
+        """
+        Initializes the on-disk cache of parsed days.
+        :param directory: Directory holding the cached files
+        :param max_bytes: Total size above which the least recently used entries are evicted
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, file_name):
+        key = hashlib.sha1(os.path.abspath(file_name).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.day")
+
+    def source(self, file_name):
+        """
+        Describes a CSV file as its cache entry records it: absolute path, size and modification time.
+        """
+        stat = os.stat(file_name)
+        return {"path": os.path.abspath(file_name), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def cached(self, file_name):
+        """
+        Returns the cached parsed day of a CSV file, or None when there is no up-to-date copy.
+        A packed copy made by traffic_convert.py is preferred over the cache.
+        Raises FileNotFoundError when neither the CSV file nor a packed copy exists.
+        """
+        day = load_converted(file_name)
+        if day is not None:
+            return day
+        source = self.source(file_name)
+        entry = self._entry_path(file_name)
+        try:
+            with open(entry, "rb") as file:
+                header, _ = read_header(file)
+            if header["source"] == source:
+                os.utime(entry)  # Mark as most recently used
+                with stage("cache.read") as timed:
+                    day = read_day(entry)
+                    timed.add(rows=day.row_count, size=os.path.getsize(entry))
+                return day
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def load(self, file_name):
+        """
+        Returns the parsed day for a CSV file, parsing and caching it when the cached copy is stale.
+        A packed copy made by traffic_convert.py is mapped instead when it is up to date.
+        Raises FileNotFoundError when neither the CSV file nor a packed copy exists.
+        """
+        day = self.cached(file_name)
+        if day is not None:
+            return day
+
+        source = self.source(file_name)
+        with stage("csv.parse") as timed:
+            day = parse_csv(file_name)
+            timed.add(rows=day.row_count, size=source["size"])
+        self.store(day, source)
+        return day
+
+    def store(self, day, source):
+        """
+        Writes a parsed day as the cache entry of its CSV file, e.g. one built while the file was streamed.
+        Errors are reported and otherwise ignored, as the day is still usable.
+        :param day: The ParsedDay of the file
+        :param source: Dictionary returned by source() before the file was read, so a file that changed
+                       while it was read is parsed again next time
+        """
+        entry = self._entry_path(source["path"])
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with stage("cache.write") as timed:
+                write_day(day, entry, source)
+                timed.add(rows=day.row_count, size=os.path.getsize(entry))
+            self.evict()
+        except OSError as e:
+            print(f"Error writing parse cache: {e}")
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits within max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".day"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # Already evicted by another process
+            total -= size
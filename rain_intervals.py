@@ -0,0 +1,137 @@
+import argparse
+import re
+
+DAY_SECONDS = 86400
+
+# State of one second of one junction
+UNSEEN = 0
+DRY = 1
+RAIN = 2
+MIXED = DRY | RAIN  # Both rain and dry rows in the same second; the span ends there
+
+# A span runs from a rain second through the last rain second before a dry one, skipping unseen seconds
+_SPAN = re.compile(rb"\x03|\x02(?:[\x00\x02]*[\x02\x03])?")
+
+
+def find_spans(states):
+    """
+    Returns the rain spans in the per-second states of one junction.
+    :param states: bytearray of DAY_SECONDS states
+    :return: List of (start, end) seconds since midnight of the first and last rain row of each span
+    """
+    return [(match.start(), match.end() - 1) for match in _SPAN.finditer(states)]
+
+
+def merge_spans(spans):
+    """
+    Merges overlapping or touching spans into their union.
+    :param spans: Iterable of (start, end) tuples in any order
+    :return: Sorted list of disjoint (start, end) tuples
+    """
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RainTracker:
+    def __init__(self):
+        """
+        Initializes rain span tracking for one day.
+        Rows are bucketed by junction and second as they arrive, so recording a row is O(1) and the rows
+        may come in any order; the spans are read back in time order per junction.
+        """
+        self.states = {}  # {junction: bytearray(DAY_SECONDS)}
+
+    def junction_states(self, junction):
+        """
+        Returns the per-second state buffer of a junction, creating it on first use.
+        """
+        states = self.states.get(junction)
+        if states is None:
+            states = self.states[junction] = bytearray(DAY_SECONDS)
+        return states
+
+    def observe(self, junction, second, raining):
+        """
+        Records one row.
+        :param junction: Junction the row was recorded at
+        :param second: Time of the row in seconds since midnight
+        :param raining: Whether the row reports rain
+        """
+        self.junction_states(junction)[second] |= RAIN if raining else DRY
+
+    def spans(self):
+        """
+        Returns the rain spans of every junction that reported rain.
+        A span still open at the end of the data is included, ending at its last rain row.
+        :return: Dictionary of junction name to a list of (start, end) seconds since midnight
+        """
+        spans = {}
+        for junction, states in self.states.items():
+            found = find_spans(states)
+            if found:
+                spans[junction] = found
+        return spans
+
+
+def total_seconds(spans):
+    """
+    Returns the time during which it rained at any junction, counting overlapping spans once.
+    :param spans: Dictionary of junction name to a list of (start, end) spans
+    """
+    return sum(end - start for start, end in merge_spans(span for found in spans.values() for span in found))
+
+
+def tracker_from_day(day, rain_conditions):
+    """
+    Builds the rain tracker of a cached ParsedDay from its junction, weather and time columns.
+    """
+    junctions = day.vocabularies['JunctionName']
+    weather = day.vocabularies['Weather_Conditions']
+    bits = bytes(RAIN if value in rain_conditions else DRY for value in weather)
+    tracker = RainTracker()
+    buffers = [tracker.junction_states(name) for name in junctions]
+    for junction, condition, second in zip(day.columns['JunctionName'], day.columns['Weather_Conditions'],
+                                           day.columns['timeOfDay']):
+        buffers[junction][second] |= bits[condition]
+    return tracker
+
+
+def _format_span(span):
+    start, end = span
+    return f"{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60:02d}-{end // 3600:02d}:{end // 60 % 60:02d}:{end % 60:02d}"
+
+
+# Rain exposure over many days: python rain_intervals.py 01012024 31032024
+if __name__ == "__main__":
+    from parse_cache import ParseCache
+    from traffic_core import date_range_files
+    from traffic_metrics import RAIN_CONDITIONS
+
+    parser = argparse.ArgumentParser(description="List rain spans per junction and the rain exposure per day.")
+    parser.add_argument("start", metavar="DDMMYYYY")
+    parser.add_argument("end", metavar="DDMMYYYY")
+    parser.add_argument("--directory", default=".")
+    parser.add_argument("--spans", action="store_true", help="Print every span, not just the daily totals")
+    args = parser.parse_args()
+
+    cache = ParseCache()
+    overall = 0
+    for file_name in date_range_files(args.start, args.end, args.directory):
+        try:
+            day_spans = tracker_from_day(cache.load(file_name), RAIN_CONDITIONS).spans()
+        except FileNotFoundError:
+            print(f"File not found: {file_name}")
+            continue
+        seconds = total_seconds(day_spans)
+        overall += seconds
+        print(f"{file_name}: {seconds // 3600} hours and {seconds // 60 % 60} minutes of rain")
+        if args.spans:
+            for junction, found in day_spans.items():
+                print(f"  {junction}: {', '.join(map(_format_span, found))}")
+    print(f"Total: {overall // 3600} hours and {overall // 60 % 60} minutes of rain")
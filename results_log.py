@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+from datetime import datetime
+
+from instrumentation import stage
+from traffic_metrics import COUNTER_NAMES
+
+RESULTS_PATH = "results.jsonl"
+BATCH_SIZE = 256  # Records buffered before they are written in one call
+
+RECORD_FIELDS = ("date",) + COUNTER_NAMES + (
+    "truck_percentage", "avg_bike_per_hour", "elm_junc_scooter_percentage", "peak_hour", "peak_hour_count",
+    "rain_seconds",
+)
+
+_DATE_PREFIX = b'{"date":"'
+
+
+def date_key(value):
+    """
+    Returns the "YYYY-MM-DD" key of a date, datetime or key string.
+    """
+    return value if isinstance(value, str) else value.strftime("%Y-%m-%d")
+
+
+def results_record(report, day):
+    """
+    Builds the typed results record of one day from a DayReport.
+    :param report: DayReport of the day
+    :param day: The day as a date, datetime or "YYYY-MM-DD" key
+    :return: Dictionary holding every name in RECORD_FIELDS, all numbers except the date
+    """
+    peak_hour, peak_hour_count = report.peak_hour
+    record = {"date": date_key(day)}
+    for name in COUNTER_NAMES:
+        record[name] = getattr(report, name)
+    record["truck_percentage"] = report.truck_percentage
+    record["avg_bike_per_hour"] = report.avg_bike_per_hour
+    record["elm_junc_scooter_percentage"] = report.elm_junc_scooter_percentage
+    record["peak_hour"] = int(peak_hour)
+    record["peak_hour_count"] = peak_hour_count
+    record["rain_seconds"] = report.rain_seconds
+    return record
+
+
+def _line_date(line):
+    # Records are written with the date first, so the key can be sliced without parsing the line
+    if line.startswith(_DATE_PREFIX):
+        return line[len(_DATE_PREFIX):len(_DATE_PREFIX) + 10].decode("ascii")
+    return json.loads(line)["date"]
+
+
+class ResultsLog:
+    def __init__(self, path=RESULTS_PATH, batch_size=BATCH_SIZE):
+        """
+        Initializes a JSON Lines log of daily results records, one line per record.
+        A date written again supersedes its earlier record; compact() drops the superseded lines.
+        :param path: Path of the log file
+        :param batch_size: Number of records buffered before they are written together
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.index = None  # {date key: byte offset of its latest record}, built on first lookup
+
+    def append(self, record):
+        """
+        Buffers a record, writing the buffer once it holds batch_size records.
+        """
+        self.pending.append(record)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered records with a single write.
+        """
+        if not self.pending:
+            return
+        with stage("results.write") as timed:
+            lines = [(json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8") for record in self.pending]
+            with open(self.path, "ab") as file:
+                offset = file.seek(0, os.SEEK_END)
+                timed.add(rows=len(lines), size=file.write(b"".join(lines)))
+        if self.index is not None:
+            for record, line in zip(self.pending, lines):
+                self.index[record["date"]] = offset
+                offset += len(line)
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+
+    def _load_index(self):
+        self.flush()
+        if self.index is None:
+            self.index = {}
+            try:
+                with open(self.path, "rb") as file:
+                    offset = 0
+                    for line in file:
+                        if line.strip():
+                            self.index[_line_date(line)] = offset
+                        offset += len(line)
+            except FileNotFoundError:
+                pass
+        return self.index
+
+    def get(self, day):
+        """
+        Returns the latest record of a day, or None when the day has no record.
+        :param day: The day as a date, datetime or "YYYY-MM-DD" key
+        """
+        offset = self._load_index().get(date_key(day))
+        if offset is None:
+            return None
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return json.loads(file.readline())
+
+    def records(self, start=None, end=None):
+        """
+        Yields the latest record of every day from start to end inclusive, in date order.
+        """
+        start = date_key(start) if start is not None else None
+        end = date_key(end) if end is not None else None
+        index = self._load_index()
+        if not index:
+            return
+        with open(self.path, "rb") as file:
+            for key in sorted(index):
+                if (start is None or key >= start) and (end is None or key <= end):
+                    file.seek(index[key])
+                    yield json.loads(file.readline())
+
+    def compact(self):
+        """
+        Rewrites the log with only the latest record of each day, in date order.
+        """
+        records = list(self.records())
+        if not records:
+            return
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(b"".join((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8") for record in records))
+        os.replace(temporary, self.path)
+        self.index = None
+
+
+# Report over a range of days: python results_log.py 01012024 31122024 [--compact]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the logged daily results as CSV.")
+    parser.add_argument("start", metavar="DDMMYYYY", nargs="?")
+    parser.add_argument("end", metavar="DDMMYYYY", nargs="?")
+    parser.add_argument("--log", default=RESULTS_PATH)
+    parser.add_argument("--compact", action="store_true", help="Drop superseded records first")
+    args = parser.parse_args()
+
+    log = ResultsLog(args.log)
+    if args.compact:
+        log.compact()
+    first = datetime.strptime(args.start, "%d%m%Y") if args.start else None
+    last = datetime.strptime(args.end or args.start, "%d%m%Y") if args.start else None
+    print(",".join(RECORD_FIELDS))
+    for entry in log.records(first, last):
+        print(",".join(str(entry[name]) for name in RECORD_FIELDS))
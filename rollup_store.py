@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import sqlite3
+from collections import Counter
+from datetime import date, datetime
+
+from instrumentation import stage
+from parse_cache import ParseCache, converted_path
+from traffic_core import DATE_FORMAT, available_engine, date_range_files, file_date, report_from_day
+from traffic_metrics import COUNTER_NAMES, DayReport
+
+STORE_PATH = "traffic_rollup.sqlite"
+MEASURES = ("vehicles", "over_speed", "electric")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS days (
+    day INTEGER PRIMARY KEY,       -- date.toordinal()
+    weekday INTEGER NOT NULL,      -- 0 is Monday
+    source TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    {", ".join(f"{name} INTEGER NOT NULL" for name in COUNTER_NAMES)},
+    vehicles_by_hour TEXT NOT NULL, -- JSON list of ["HH", count] in order of first appearance
+    rain_spans TEXT NOT NULL        -- JSON object of junction to [[start, end], ...] seconds
+);
+CREATE TABLE IF NOT EXISTS hourly (
+    junction TEXT NOT NULL,
+    vehicle_type TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    weekday INTEGER NOT NULL,
+    vehicles INTEGER NOT NULL,
+    over_speed INTEGER NOT NULL,
+    electric INTEGER NOT NULL,
+    PRIMARY KEY (junction, vehicle_type, hour, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hourly_by_day ON hourly (day, hour);
+"""
+
+
+def hourly_rollup(day):
+    """
+    Counts the rows of a ParsedDay per junction, hour and vehicle type.
+    :return: Dictionary of (junction, vehicle type, hour) to a (vehicles, over speed, electric) tuple
+    """
+    junctions = day.vocabularies['JunctionName']
+    vehicle_types = day.vocabularies['VehicleType']
+    keys = list(zip(day.columns['JunctionName'], day.columns['VehicleType'],
+                    [seconds // 3600 for seconds in day.columns['timeOfDay']]))
+    vehicles = Counter(keys)
+    over_speed = Counter(key for key, limit, speed in zip(keys, day.columns['JunctionSpeedLimit'],
+                                                          day.columns['VehicleSpeed']) if limit < speed)
+    electric = Counter()
+    if 'elctricHybrid' in day.columns and 'True' in day.vocabularies['elctricHybrid']:
+        true_code = day.vocabularies['elctricHybrid'].index('True')
+        electric = Counter(key for key, code in zip(keys, day.columns['elctricHybrid']) if code == true_code)
+    rollup = {}
+    for key, count in vehicles.items():
+        junction, vehicle_type, hour = key
+        rollup[junctions[junction], vehicle_types[vehicle_type], hour] = (count, over_speed[key], electric[key])
+    return rollup
+
+
+def _in_clause(column, values):
+    return f"{column} IN ({', '.join('?' * len(values))})", list(values)
+
+
+class RollupStore:
+    def __init__(self, path=STORE_PATH):
+        """
+        Opens the rollup store, creating it if needed.
+        Each day is ingested once into per-junction, per-hour, per-vehicle-type counts plus a daily summary,
+        so reports and range queries never touch the raw CSV files again.
+        :param path: Path of the SQLite file
+        """
+        self.path = path
+        # A background load may use the store while the Tk thread waits for it
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def ingest(self, file_name, cache=None, engine="python", force=False):
+        """
+        Adds or replaces one day, skipping it when the stored copy was built from the same file.
+        Raises FileNotFoundError when the CSV file does not exist.
+        :param file_name: Path of a traffic_dataDDMMYYYY.csv file
+        :param cache: ParseCache to load the parsed day through, a default one is used if omitted
+        :param engine: "python" or "numpy", as returned by available_engine
+        :param force: Ingest even when the stored copy is up to date
+        :return: True when the day was (re)ingested
+        """
+        when = file_date(file_name)
+        if when is None:
+            raise ValueError(f"File name does not carry a date: {file_name}")
+        # The CSV file may have been removed after traffic_convert.py packed it
+        source_name = file_name if os.path.exists(file_name) else converted_path(file_name)
+        stat = os.stat(source_name)
+        source = (os.path.abspath(source_name), stat.st_size, stat.st_mtime_ns)
+        day_number = when.toordinal()
+        stored = self.connection.execute("SELECT source, size, mtime_ns FROM days WHERE day = ?", (day_number,)).fetchone()
+        if stored == source and not force:
+            return False
+
+        day = (cache or ParseCache()).load(file_name)
+        report = report_from_day(day, engine=engine)
+        weekday = when.weekday()
+        with stage("rollup.write") as timed, self.connection:
+            timed.add(rows=day.row_count)
+            self.connection.execute("DELETE FROM hourly WHERE day = ?", (day_number,))
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO days VALUES ({', '.join('?' * (len(COUNTER_NAMES) + 7))})",
+                (day_number, weekday, *source, *(getattr(report, name) for name in COUNTER_NAMES),
+                 json.dumps(list(report.vehicles_by_hour.items())), json.dumps(report.rain_spans)))
+            self.connection.executemany(
+                "INSERT INTO hourly VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(junction, vehicle_type, hour, day_number, weekday, *counts)
+                 for (junction, vehicle_type, hour), counts in hourly_rollup(day).items()])
+        return True
+
+    def report(self, when, date_label=None):
+        """
+        Rebuilds the DayReport of an ingested day without reading its CSV file.
+        :param when: The day as a date or datetime
+        :param date_label: Date shown to the user, DD/MM/YYYY by default
+        :return: The DayReport, or None when the day has not been ingested
+        """
+        day_number = when.toordinal()
+        row = self.connection.execute(
+            f"SELECT {', '.join(COUNTER_NAMES)}, vehicles_by_hour, rain_spans FROM days WHERE day = ?",
+            (day_number,)).fetchone()
+        if row is None:
+            return None
+        counts = dict(zip(COUNTER_NAMES, row))
+        vehicles_by_hour = dict(json.loads(row[-2]))
+        rain_spans = {junction: [tuple(span) for span in spans] for junction, spans in json.loads(row[-1]).items()}
+        hourly_by_junction = self.hourly_counts(when, when)
+        return DayReport(date_label or when.strftime("%d/%m/%Y"), counts, vehicles_by_hour, hourly_by_junction, rain_spans)
+
+    def load_report(self, file_name, date_label=None, cache=None, engine="python"):
+        """
+        Returns the DayReport of a traffic CSV file, ingesting it first when it is new or has changed.
+        Raises FileNotFoundError when the CSV file does not exist.
+        """
+        self.ingest(file_name, cache, engine)
+        return self.report(file_date(file_name), date_label)
+
+    def _where(self, start, end, junctions, vehicle_types, hours, weekdays):
+        clauses, parameters = [], []
+        if start is not None:
+            clauses.append("day >= ?")
+            parameters.append(start.toordinal())
+        if end is not None:
+            clauses.append("day <= ?")
+            parameters.append(end.toordinal())
+        if hours is not None:
+            clauses.append("hour >= ? AND hour < ?")
+            parameters.extend(hours)
+        for column, values in (("junction", junctions), ("vehicle_type", vehicle_types), ("weekday", weekdays)):
+            if values is not None:
+                clause, values = _in_clause(column, values)
+                clauses.append(clause)
+                parameters.extend(values)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", parameters
+
+    def count(self, start=None, end=None, junctions=None, vehicle_types=None, hours=None, weekdays=None,
+              measure="vehicles"):
+        """
+        Sums a measure over a range, e.g. trucks at Elm Avenue on weekdays in March between 07:00 and 09:00:
+        count(date(2024, 3, 1), date(2024, 3, 31), [ELM_JUNCTION], ["Truck"], (7, 9), range(5)).
+        Every filter left as None matches everything.
+        :param start: First day, inclusive
+        :param end: Last day, inclusive
+        :param junctions: Junction names to include
+        :param vehicle_types: Vehicle types to include
+        :param hours: (first, last) hours, half-open, so (7, 9) covers 07:00 to 08:59
+        :param weekdays: Weekdays to include, 0 is Monday
+        :param measure: One of MEASURES
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}")
+        where, parameters = self._where(start, end, junctions, vehicle_types, hours, weekdays)
+        return self.connection.execute(f"SELECT COALESCE(SUM({measure}), 0) FROM hourly{where}", parameters).fetchone()[0]
+
+    def hourly_counts(self, start=None, end=None, junctions=None, vehicle_types=None, weekdays=None,
+                      measure="vehicles"):
+        """
+        Sums a measure per junction and hour over a range, with the same filters as count.
+        :return: Dictionary of junction name to its 24 hourly totals
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}")
+        where, parameters = self._where(start, end, junctions, vehicle_types, None, weekdays)
+        counts = {}
+        for junction, hour, total in self.connection.execute(
+                f"SELECT junction, hour, SUM({measure}) FROM hourly{where} GROUP BY junction, hour", parameters):
+            counts.setdefault(junction, [0] * 24)[hour] = total
+        return counts
+
+    def days(self, start=None, end=None):
+        """
+        Returns the ingested days in a range, in date order.
+        """
+        where, parameters = self._where(start, end, None, None, None, None)
+        return [date.fromordinal(day) for (day,) in self.connection.execute(f"SELECT day FROM days{where} ORDER BY day", parameters)]
+
+
+def _parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+# Ingest: python rollup_store.py ingest 01032024 31032024
+# Query:  python rollup_store.py query 01032024 31032024 --junction "Elm Avenue/Rabbit Road" --type Truck --hours 7 9 --weekdays
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest traffic CSV files into the rollup store and query it.")
+    parser.add_argument("command", choices=("ingest", "query"))
+    parser.add_argument("start", metavar="DDMMYYYY")
+    parser.add_argument("end", metavar="DDMMYYYY")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--directory", default=".", help="Directory holding the CSV files to ingest")
+    parser.add_argument("--engine", choices=("python", "numpy"), default="python")
+    parser.add_argument("--junction", action="append", help="Junction to include, repeatable")
+    parser.add_argument("--type", action="append", dest="vehicle_types", help="Vehicle type to include, repeatable")
+    parser.add_argument("--hours", nargs=2, type=int, metavar=("FIRST", "LAST"), help="Hours from FIRST up to LAST")
+    parser.add_argument("--weekdays", action="store_true", help="Only Monday to Friday")
+    parser.add_argument("--measure", choices=MEASURES, default="vehicles")
+    args = parser.parse_args()
+
+    store = RollupStore(args.store)
+    if args.command == "ingest":
+        engine = available_engine(args.engine)
+        cache = ParseCache()
+        ingested = 0
+        for name in date_range_files(args.start, args.end, args.directory):
+            try:
+                ingested += store.ingest(name, cache, engine)
+            except FileNotFoundError:
+                print(f"File not found: {name}")
+        print(f"Ingested {ingested} days into {args.store}")
+    else:
+        total = store.count(_parse_date(args.start), _parse_date(args.end), args.junction, args.vehicle_types,
+                            args.hours, range(5) if args.weekdays else None, args.measure)
+        print(total)
+    store.close()
@@ -0,0 +1,90 @@
+import pytest
+
+from canvas_renderer import CanvasRenderer, HistogramWindow
+
+
+class FakeCanvas:
+    """
+    Records the canvas calls the renderer makes, holding items like a tk.Canvas would.
+    """
+    def __init__(self):
+        self.items = {}
+        self.calls = []
+        self.next_id = 1
+
+    def _create(self, kind, coords, options):
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = [kind, coords, dict(options)]
+        self.calls.append(("create", item_id))
+        return item_id
+
+    def __getattr__(self, name):
+        if name.startswith("create_"):
+            return lambda *coords, **options: self._create(name[len("create_"):], coords, options)
+        raise AttributeError(name)
+
+    def coords(self, item_id, *coords):
+        self.items[item_id][1] = coords
+        self.calls.append(("coords", item_id))
+
+    def itemconfigure(self, item_id, **options):
+        self.items[item_id][2].update(options)
+        self.calls.append(("itemconfigure", item_id, tuple(sorted(options))))
+
+    def delete(self, item_id):
+        del self.items[item_id]
+        self.calls.append(("delete", item_id))
+
+
+def _bars(*heights):
+    return [(("bar", i), "rectangle", (i * 10, 100 - height, i * 10 + 8, 100), {"fill": "blue"})
+            for i, height in enumerate(heights)]
+
+
+def test_sync_applies_only_the_differences():
+    canvas = FakeCanvas()
+    renderer = CanvasRenderer(canvas)
+    assert renderer.sync("histogram", _bars(10, 20, 30)) == 3
+    assert [call[0] for call in canvas.calls] == ["create"] * 3
+
+    canvas.calls.clear()
+    assert renderer.sync("histogram", _bars(10, 20, 30)) == 0
+    assert canvas.calls == []
+
+    # The second bar moves, the third is dropped
+    assert renderer.sync("histogram", _bars(10, 25)) == 2
+    assert canvas.calls == [("coords", 2), ("delete", 3)]
+    assert canvas.items[2][1] == (10, 75, 18, 100)
+
+    canvas.calls.clear()
+    shapes = _bars(10, 25)
+    shapes[0] = (("bar", 0), "rectangle", shapes[0][2], {"fill": "red"})
+    assert renderer.sync("histogram", shapes) == 1
+    assert canvas.calls == [("itemconfigure", 1, ("fill",))]
+    assert canvas.items[1][2] == {"fill": "red"}
+
+
+def test_sync_recreates_items_that_change_kind_and_keeps_groups_apart():
+    canvas = FakeCanvas()
+    renderer = CanvasRenderer(canvas)
+    renderer.sync("histogram", [("axis", "line", (0, 0, 10, 0), {})])
+    renderer.sync("legend", [("axis", "text", (5, 5), {"text": "Axis"})])  # Same key, other group
+    canvas.calls.clear()
+    assert renderer.sync("histogram", [("axis", "text", (0, 0), {"text": "x"})]) == 1
+    assert canvas.calls == [("delete", 1), ("create", 3)]
+    assert sorted(kind for kind, _, _ in canvas.items.values()) == ["text", "text"]
+    assert renderer.sync("legend", []) == 1
+    assert list(canvas.items) == [3]
+
+
+def test_windows_must_implement_the_drawing_hooks():
+    class Incomplete(HistogramWindow):
+        def window_title(self):
+            return "Incomplete"
+
+        def histogram_shapes(self):
+            return []
+
+    with pytest.raises(TypeError, match="refresh"):
+        Incomplete()
@@ -0,0 +1,150 @@
+import json
+import random
+from datetime import date
+
+import pytest
+
+from metric_registry import MetricSet
+from parse_cache import ParseCache
+from rain_intervals import RainTracker
+from traffic_core import HAS_NUMPY, load_report
+from traffic_generator import generate_day
+from traffic_metrics import (
+    COUNTER_NAMES, DEFAULT_METRICS, ELM_JUNCTION, HANLEY_JUNCTION, RAIN_CONDITIONS, aggregate_file,
+)
+
+ROWS = 3000
+
+
+def reference_counts(file_name):
+    """
+    Counts the daily metrics with a plain csv-style loop, independently of every engine.
+    """
+    with open(file_name, newline='') as file:
+        lines = [line.strip() for line in file.read().splitlines()]
+    header = lines[0].split(',')
+    counts = dict.fromkeys(COUNTER_NAMES, 0)
+    hanley_hours = {}
+    rain = RainTracker()
+    for line in filter(None, lines[1:]):
+        row = dict(zip(header, line.split(',')))
+        vehicle_type, junction = row['VehicleType'], row['JunctionName']
+        counts['vehicle_count'] += 1
+        counts['truck_count'] += vehicle_type == 'Truck'
+        counts['elec_count'] += row.get('elctricHybrid') == 'True'
+        counts['two_wheeled_vehicle_count'] += vehicle_type in ('Bicycle', 'Motorcycle', 'Scooter')
+        counts['buses_heading_north_count'] += (vehicle_type == 'Buss' and junction == ELM_JUNCTION
+                                                and row['travel_Direction_out'] == 'N')
+        counts['no_turn_count'] += row['travel_Direction_in'] == row['travel_Direction_out']
+        counts['bicycle_count'] += vehicle_type == 'Bicycle'
+        counts['over_speed_limit_count'] += int(row['JunctionSpeedLimit']) < int(row['VehicleSpeed'])
+        counts['elm_junction_count'] += junction == ELM_JUNCTION
+        counts['hanley_junction_count'] += junction == HANLEY_JUNCTION
+        counts['elm_junc_scooter_count'] += junction == ELM_JUNCTION and vehicle_type == 'Scooter'
+        if junction == HANLEY_JUNCTION:
+            hour = row['timeOfDay'][:2]
+            hanley_hours[hour] = hanley_hours.get(hour, 0) + 1
+        hours, minutes, seconds = map(int, row['timeOfDay'].split(':'))
+        rain.observe(junction, hours * 3600 + minutes * 60 + seconds, row['Weather_Conditions'] in RAIN_CONDITIONS)
+    return counts, hanley_hours, rain.spans()
+
+
+def _rewrite(source, target, transform, newline="\n"):
+    with open(source) as file:
+        header, *rows = file.read().splitlines()
+    with open(target, "w", newline="") as file:
+        file.write(newline.join([header] + transform(rows)) + newline)
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory):
+    """
+    Writes a generated day and variants of it: CRLF line endings, header only, short rows and shuffled rows.
+    """
+    directory = tmp_path_factory.mktemp("generated")
+    plain = str(directory / "traffic_data15062024.csv")
+    generate_day(plain, date(2024, 6, 15), ROWS, seed=3)
+    variants = {"plain": plain}
+    for name, transform, newline in (
+            ("crlf", lambda rows: rows, "\r\n"),
+            ("header_only", lambda rows: [], "\n"),
+            # Every seventh row lacks its trailing elctricHybrid field
+            ("short_rows", lambda rows: [row.rpartition(',')[0] if i % 7 == 0 else row for i, row in enumerate(rows)], "\n"),
+            ("shuffled", lambda rows: random.Random(5).sample(rows, len(rows)), "\n")):
+        variants[name] = str(directory / f"traffic_data_{name}.csv")
+        _rewrite(plain, variants[name], transform, newline)
+    return directory, variants
+
+
+def _reports(file_name, cache_directory):
+    """
+    Returns the DayReport of a file from every engine, keyed by engine.
+    """
+    reports = {}
+    engines = ("python", "numpy") if HAS_NUMPY else ("python",)
+    for engine in engines:
+        reports[f"stream.{engine}"] = aggregate_file(file_name, engine=engine).report()
+        reports[f"small_chunks.{engine}"] = aggregate_file(file_name, 4096, engine=engine).report()
+        cache = ParseCache(str(cache_directory / engine))
+        reports[f"parsed.{engine}"] = load_report(file_name, cache=cache, engine=engine)  # Parses and caches
+        reports[f"cached.{engine}"] = load_report(file_name, cache=cache, engine=engine)  # Reads the cache
+    return reports
+
+
+def _summary(report):
+    return (report.results(), list(report.vehicles_by_hour.items()), report.hourly_by_junction, report.rain_spans)
+
+
+@pytest.mark.parametrize("variant", ["plain", "crlf", "header_only", "short_rows", "shuffled"])
+def test_engines_agree(generated, variant):
+    directory, variants = generated
+    file_name = variants[variant]
+    reports = _reports(file_name, directory / f"cache_{variant}")
+
+    expected = _summary(reports["stream.python"])
+    for engine, report in reports.items():
+        assert _summary(report) == expected, engine
+
+    counts, hanley_hours, rain_spans = reference_counts(file_name)
+    assert {name: getattr(reports["stream.python"], name) for name in COUNTER_NAMES} == counts
+    assert reports["stream.python"].vehicles_by_hour == hanley_hours
+    assert reports["stream.python"].rain_spans == rain_spans
+
+
+def test_variants_match_the_plain_file(generated):
+    directory, variants = generated
+    plain = _summary(aggregate_file(variants["plain"]).report())
+    assert _summary(aggregate_file(variants["crlf"]).report()) == plain
+    shuffled = aggregate_file(variants["shuffled"]).report()
+    # Only the order in which the hours first appear may change, which picks between tied peak hours
+    results = shuffled.results()
+    assert results[:-2] + results[-1:] == plain[0][:-2] + plain[0][-1:]
+    assert shuffled.hourly_by_junction == plain[2] and shuffled.rain_spans == plain[3]
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+def test_check_parity_covers_site_metrics(generated, tmp_path):
+    from numpy_metrics import check_parity
+    _, variants = generated
+    definitions = tmp_path / "site.json"
+    definitions.write_text(json.dumps([
+        {"name": "hanley_trucks", "where": {"JunctionName": HANLEY_JUNCTION, "VehicleType": "Truck"}, "by": "hour"},
+        {"name": "by_type", "by": "VehicleType"},
+        {"name": "fast", "less": ["JunctionSpeedLimit", "VehicleSpeed"], "by": ["JunctionName", "hour"]},
+        {"name": "fog", "spans": True, "where": {"Weather_Conditions": "Fog"}, "by": "JunctionName"},
+        {"name": "fast_share", "ratio": ["over_speed_limit_count", "vehicle_count"], "scale": 100},
+    ]))
+    assert check_parity(list(variants.values()), MetricSet.from_json(str(definitions), DEFAULT_METRICS))
+
+
+def test_hours_are_zero_padded(tmp_path):
+    # Unpadded and padded times of the same hour count together; the peak hour is shown as "07"
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    rows = [f"{HANLEY_JUNCTION},15/06/2024,{time},N,S,Clear,30,25,Car,False"
+            for time in ("7:05:00", "07:10:00", "7:59:59", "9:00:00")]
+    with open(file_name, "w") as file:
+        file.write("\n".join(["JunctionName,Date,timeOfDay,travel_Direction_in,travel_Direction_out,"
+                              "Weather_Conditions,JunctionSpeedLimit,VehicleSpeed,VehicleType,elctricHybrid"] + rows))
+    for engine, report in _reports(file_name, tmp_path).items():
+        assert report.vehicles_by_hour == {"07": 3, "09": 1}, engine
+        assert report.results()[-2].endswith("recorded Between 07:00 and 8:00"), engine
@@ -0,0 +1,28 @@
+from datetime import date
+
+from follow import FollowedFile
+from traffic_generator import generate_day
+from traffic_metrics import aggregate_file
+
+
+def test_appended_rows_are_read_in_chunks(tmp_path):
+    source = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(source, date(2024, 6, 15), 3000, seed=2)
+    with open(source, "rb") as file:
+        data = file.read()
+    expected = aggregate_file(source).report()
+
+    followed_name = str(tmp_path / "followed.csv")
+    followed = FollowedFile(followed_name)
+    written = 0
+    # Append in pieces that end mid-line, and read with chunks much smaller than the backlog
+    for end in (40, len(data) // 3, len(data) // 3 + 7, len(data) - 5, len(data)):
+        with open(followed_name, "ab") as file:
+            file.write(data[written:end])
+        written = end
+        followed.poll(chunk_size=4096)
+        assert followed.aggregator is None or followed.aggregator.vehicle_count == data[:end].count(b"\n") - 1
+
+    report = followed.report()
+    assert report.results() == expected.results()
+    assert report.hourly_by_junction == expected.hourly_by_junction and report.rain_spans == expected.rain_spans
@@ -0,0 +1,78 @@
+import struct
+import zlib
+
+import pytest
+
+import histogram_export
+from histogram_export import main, render_png, render_svg
+
+
+class Layout:
+    """
+    The shape methods of a HistogramWindow, returning fixed shapes.
+    """
+    canvas_width = 40
+    canvas_height = 30
+
+    def __init__(self, shapes):
+        self.shapes = shapes
+
+    def heading_shapes(self):
+        return []
+
+    def histogram_shapes(self):
+        return list(self.shapes)
+
+    def legend_shapes(self):
+        return []
+
+
+def _pixel(png, x, y, width):
+    """
+    Reads one RGB pixel back from a PNG written by render_png.
+    """
+    length = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + length])
+    start = y * (width * 3 + 1) + 1 + x * 3
+    return tuple(raw[start:start + 3])
+
+
+TRIANGLE = ("band", "polygon", (5, 5, 35, 5, 20, 25), {"fill": "#6baed6", "outline": ""})
+
+
+@pytest.fixture(params=[True, False], ids=["pillow", "pure"])
+def pillow(request, monkeypatch):
+    if request.param and histogram_export.Image is None:
+        pytest.skip("Pillow is not installed")
+    if not request.param:
+        monkeypatch.setattr(histogram_export, "Image", None)
+    return request.param
+
+
+def test_polygons_are_rendered(pillow):
+    app = Layout([TRIANGLE])
+    assert '<polygon points="5,5 35,5 20,25" fill="#6baed6" stroke="none"/>' in render_svg(app)
+    png = render_png(app)
+    assert _pixel(png, 20, 10, app.canvas_width) == (0x6b, 0xae, 0xd6)
+    assert _pixel(png, 2, 20, app.canvas_width) == (255, 255, 255)
+
+
+def test_hidden_shapes_are_skipped_and_unknown_kinds_rejected():
+    hidden = Layout([(TRIANGLE[0], "polygon", TRIANGLE[2], {**TRIANGLE[3], "state": "hidden"})])
+    assert "<polygon" not in render_svg(hidden)
+    with pytest.raises(ValueError, match="oval"):
+        render_svg(Layout([("dot", "oval", (1, 1, 5, 5), {})]))
+
+
+def test_malformed_range_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--range", "0106", "02062024"])
+    assert exit_info.value.code == 2
+    assert "DDMMYYYY" in capsys.readouterr().err
+
+
+def test_unsupported_format_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--glob", "missing*.csv", "--format", "svg,jpg"])
+    assert exit_info.value.code == 2
+    assert "Unsupported export format: jpg" in capsys.readouterr().err
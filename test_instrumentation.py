@@ -0,0 +1,24 @@
+import instrumentation
+from instrumentation import collect, merge, stage
+
+
+def _work(rows):
+    with stage("work") as timed:
+        timed.add(rows=rows, size=rows * 10)
+    return rows
+
+
+def test_collected_stages_are_merged_into_the_parent():
+    outer = instrumentation.disable()
+    assert collect(_work, 3) == (3, None)
+    recorder = instrumentation.enable()
+    try:
+        _work(1)
+        result, summary = collect(_work, 5)
+        assert result == 5 and summary["stages"]["work"]["rows"] == 5  # Kept apart from the parent's totals
+        assert recorder.stages["work"][:1] + recorder.stages["work"][2:4] == [1, 1, 10]
+        merge(summary)
+        assert recorder.stages["work"][:1] + recorder.stages["work"][2:4] == [2, 6, 60]
+    finally:
+        instrumentation.disable()
+        instrumentation._recorder = outer
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from metric_registry import HOUR, Count, Is, Less, MetricSet, Ratio, Same, Spans
+from traffic_metrics import DEFAULT_METRICS
+
+
+@pytest.mark.parametrize("metric, message", [
+    (Count('fast', Is('VehicleSpeed', '50')), "not a categorical column"),
+    (Count('fast', Less('JunctionName', 'VehicleSpeed')), "not a numeric column"),
+    (Count('turns', Same('travel_Direction_in', 'Direction')), "unknown column 'Direction'"),
+    (Count('by_speed', by='VehicleSpeed'), "not a categorical column"),
+    (Count('by_pair', by=('JunctionName', 'VehicleType')), "grouping pair"),
+    (Spans('fog', Is('Weather_Conditions', 'Fog'), by=HOUR), "unknown column 'hour'"),
+    (Ratio('share', 'trucks', 'vehicle_count'), "numerator 'trucks'"),
+    (Ratio('share', 'vehicle_count', 'vehicles_by_hour'), "denominator 'vehicles_by_hour'"),
+    (Count('truck_count'), "already defined"),
+])
+def test_invalid_definitions_are_rejected(metric, message):
+    with pytest.raises(ValueError, match=message):
+        MetricSet(base=DEFAULT_METRICS).register(metric)
+
+
+def test_ratios_may_refer_to_the_base_set():
+    metric_set = MetricSet([Count('trucks', Is('VehicleType', 'Truck')), Ratio('share', 'trucks', 'vehicle_count')],
+                           base=DEFAULT_METRICS)
+    assert metric_set.names() == ['trucks', 'share']
+
+
+@pytest.mark.parametrize("definition, message", [
+    ({"name": "fog", "were": {"Weather_Conditions": "Fog"}}, "unknown keys were"),
+    ({"name": "fog", "less": "VehicleSpeed"}, "'less' must be a list of two column names"),
+    ({"name": "share", "ratio": ["trucks"]}, "'ratio' must be"),
+    ({"name": "share", "ratio": ["vehicle_count", 24], "by": "hour"}, "only name, ratio and scale"),
+    ({"where": {"VehicleType": "Car"}}, "must be an object with a name"),
+])
+def test_from_json_rejects_bad_entries(tmp_path, definition, message):
+    path = tmp_path / "metrics.json"
+    path.write_text(json.dumps([definition]))
+    with pytest.raises(ValueError, match=message):
+        MetricSet.from_json(str(path), DEFAULT_METRICS)
+
+
+def test_extended_sets_are_built_once():
+    site = MetricSet([Count('trucks', Is('VehicleType', 'Truck'))], base=DEFAULT_METRICS)
+    combined = DEFAULT_METRICS.extended(site)
+    assert DEFAULT_METRICS.extended(site) is combined
+    site.register(Count('cars', Is('VehicleType', 'Car')))
+    assert DEFAULT_METRICS.extended(site).names()[-2:] == ['trucks', 'cars']
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+
+import mmap_scan
+from mmap_scan import scan_hourly_counts
+from traffic_generator import generate_day
+from traffic_metrics import ELM_JUNCTION, HANLEY_JUNCTION, aggregate_file
+
+JUNCTIONS = (ELM_JUNCTION, HANLEY_JUNCTION)
+
+
+def _reversed_columns(lines):
+    return [",".join(reversed(line.split(","))) for line in lines]
+
+
+@pytest.fixture(scope="module")
+def plain(tmp_path_factory):
+    file_name = str(tmp_path_factory.mktemp("scan") / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 3000, seed=6)
+    return file_name
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+@pytest.mark.parametrize("variant, transform, newline, trailing", [
+    ("plain", list, "\n", True),
+    ("crlf", list, "\r\n", True),
+    ("no_trailing_newline", list, "\n", False),
+    ("header_only", lambda lines: lines[:1], "\n", True),
+    ("reordered", _reversed_columns, "\n", True),
+])
+def test_scan_matches_the_report(plain, tmp_path, monkeypatch, numpy, variant, transform, newline, trailing):
+    if numpy and mmap_scan.np is None:
+        pytest.skip("NumPy is not installed")
+    if not numpy:
+        monkeypatch.setattr(mmap_scan, "np", None)  # Forces the regex scanner
+    with open(plain) as file:
+        lines = transform(file.read().splitlines())
+    file_name = str(tmp_path / f"traffic_data_{variant}.csv")
+    with open(file_name, "w", newline="") as file:
+        file.write(newline.join(lines) + (newline if trailing else ""))
+
+    report = aggregate_file(file_name).report()
+    expected = {junction: report.hourly_counts(junction) for junction in JUNCTIONS}
+    assert scan_hourly_counts(file_name) == expected
+    # Windows far smaller than the file split it at many line boundaries
+    assert scan_hourly_counts(file_name, window_size=4096) == expected
@@ -0,0 +1,52 @@
+from datetime import date
+
+from background_load import DONE, BackgroundLoad, stream_report
+from batch import process_file
+from parse_cache import ParseCache, parse_csv
+from traffic_core import ENGINES, available_engine, load_report, report_from_day
+from traffic_generator import generate_day
+from traffic_metrics import aggregate_file
+
+HEADER = ("JunctionName,Date,timeOfDay,travel_Direction_in,travel_Direction_out,Weather_Conditions,"
+          "JunctionSpeedLimit,VehicleSpeed,VehicleType,elctricHybrid")
+ROWS = (
+    "Hanley Highway/Westway,15/06/2024,00:00:00,N,S,Clear,30,39,Van,False",
+    "Elm Avenue/Rabbit Road,15/06/2024,00:00:04,N,N,Light Rain,30,23,Taxi,True",
+    "Elm Avenue/Rabbit Road,15/06/2024,01:10:00,S,S,Light Rain,20,25,Buss",  # No elctricHybrid field
+    "Hanley Highway/Westway,15/06/2024,13:05:09,E,W,Clear,30,31,Truck,True",
+)
+
+
+def test_rows_missing_a_trailing_field_are_padded(tmp_path):
+    file_name = tmp_path / "traffic_data15062024.csv"
+    file_name.write_text("\n".join((HEADER,) + ROWS) + "\n")
+
+    day = parse_csv(str(file_name))
+    assert day.row_count == len(ROWS)
+    assert day.values('VehicleType') == ['Van', 'Taxi', 'Buss', 'Truck']
+    assert day.values('elctricHybrid') == ['False', 'True', '', 'True']
+
+    expected = aggregate_file(str(file_name)).report().results()
+    for engine in ENGINES:
+        cache = ParseCache(str(tmp_path / f"cache_{engine}"))
+        assert load_report(str(file_name), cache=cache, engine=available_engine(engine)).results() == expected
+
+
+def test_streamed_loads_fill_the_cache(tmp_path):
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 2000, seed=1)
+    expected = aggregate_file(file_name).report().results()
+
+    cache = ParseCache(str(tmp_path / "cache_stream"))
+    load = BackgroundLoad(stream_report, file_name, None, cache)
+    load.run()  # On this thread; the messages are queued the same way
+    messages = []
+    while not load.messages.empty():
+        messages.append(load.messages.get())
+    assert messages[-1][0] == DONE and messages[-1][1].results() == expected
+    day = cache.cached(file_name)
+    assert day is not None and report_from_day(day).results() == expected
+
+    cache = ParseCache(str(tmp_path / "cache_batch"))
+    assert process_file(file_name, cache=cache)[3].results() == expected
+    assert cache.cached(file_name) is not None
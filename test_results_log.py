@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from results_log import RECORD_FIELDS, ResultsLog, results_record
+from traffic_generator import generate_day
+from traffic_metrics import aggregate_file
+
+
+def _record(day, vehicle_count):
+    return {"date": day, "vehicle_count": vehicle_count}
+
+
+def test_get_returns_the_latest_record_of_a_day(tmp_path):
+    log = ResultsLog(str(tmp_path / "results.jsonl"), batch_size=2)
+    log.append(_record("2024-06-02", 10))
+    log.append(_record("2024-06-01", 20))  # Fills the batch, so both are written
+    log.append(_record("2024-06-02", 30))  # Still buffered; get() flushes it
+    assert log.get(date(2024, 6, 2)) == _record("2024-06-02", 30)
+    assert log.get(datetime(2024, 6, 1)) == _record("2024-06-01", 20)
+    assert log.get("2024-06-03") is None
+
+    log.append(_record("2024-06-01", 40))  # Written after the index was built
+    log.flush()
+    assert log.get("2024-06-01") == _record("2024-06-01", 40)
+    assert ResultsLog(log.path).get("2024-06-01") == _record("2024-06-01", 40)  # Index rebuilt from the file
+
+
+def test_records_follow_date_order_within_the_range(tmp_path):
+    log = ResultsLog(str(tmp_path / "results.jsonl"))
+    for day, count in (("2024-06-03", 3), ("2024-06-01", 1), ("2024-06-02", 2), ("2024-06-01", 4)):
+        log.append(_record(day, count))
+    assert [record["vehicle_count"] for record in log.records()] == [4, 2, 3]
+    assert [record["date"] for record in log.records(date(2024, 6, 2), "2024-06-03")] == ["2024-06-02", "2024-06-03"]
+    assert list(ResultsLog(str(tmp_path / "missing.jsonl")).records()) == []
+
+
+def test_compact_keeps_only_the_latest_records(tmp_path):
+    log = ResultsLog(str(tmp_path / "results.jsonl"))
+    for day, count in (("2024-06-02", 1), ("2024-06-01", 2), ("2024-06-02", 3)):
+        log.append(_record(day, count))
+    log.compact()
+    with open(log.path) as file:
+        assert len(file.readlines()) == 2
+    assert [record["vehicle_count"] for record in log.records()] == [2, 3]
+    log.append(_record("2024-06-01", 5))
+    assert log.get("2024-06-01") == _record("2024-06-01", 5)
+
+
+def test_results_records_are_typed(tmp_path):
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 1000, seed=3)
+    report = aggregate_file(file_name).report()
+    record = results_record(report, date(2024, 6, 15))
+    assert tuple(record) == RECORD_FIELDS
+    assert record["date"] == "2024-06-15"
+    assert all(isinstance(record[name], int) for name in RECORD_FIELDS[1:])
+    assert (record["vehicle_count"], record["peak_hour_count"]) == (report.vehicle_count, report.peak_hour[1])
@@ -0,0 +1,51 @@
+import csv
+from datetime import date
+
+from parse_cache import ParseCache
+from rollup_store import RollupStore
+from traffic_core import load_report
+from traffic_generator import generate_day
+from traffic_metrics import ELM_JUNCTION
+
+DAY = date(2024, 3, 4)
+
+
+def _ingested(tmp_path):
+    file_name = str(tmp_path / "traffic_data04032024.csv")
+    generate_day(file_name, DAY, 3000, seed=2)
+    store = RollupStore(str(tmp_path / "rollup.sqlite"))
+    assert store.ingest(file_name, ParseCache(str(tmp_path / "cache")))
+    return file_name, store
+
+
+def test_report_matches_the_csv(tmp_path):
+    file_name, store = _ingested(tmp_path)
+    expected = load_report(file_name, "04/03/2024", ParseCache(str(tmp_path / "cache_direct")))
+    report = store.report(DAY)
+    assert report.results() == expected.results()
+    assert report.vehicles_by_hour == expected.vehicles_by_hour
+    assert report.hourly_by_junction == expected.hourly_by_junction
+    assert report.rain_spans == expected.rain_spans
+    store.close()
+
+
+def test_count_matches_the_rows(tmp_path):
+    file_name, store = _ingested(tmp_path)
+    with open(file_name, newline='') as file:
+        rows = list(csv.DictReader(file))
+    expected = sum(1 for row in rows if row['JunctionName'] == ELM_JUNCTION and row['VehicleType'] == 'Truck'
+                   and 7 <= int(row['timeOfDay'][:2]) < 9)
+    assert expected
+    assert store.count(DAY, DAY, [ELM_JUNCTION], ["Truck"], (7, 9), range(5)) == expected
+    assert store.count(DAY, DAY, weekdays=[5, 6]) == 0  # A Monday
+    over_speed = sum(1 for row in rows if int(row['JunctionSpeedLimit']) < int(row['VehicleSpeed']))
+    assert store.count(measure="over_speed") == over_speed
+    store.close()
+
+
+def test_unchanged_files_are_not_ingested_again(tmp_path):
+    file_name, store = _ingested(tmp_path)
+    assert not store.ingest(file_name)
+    assert store.ingest(file_name, ParseCache(str(tmp_path / "cache")), force=True)
+    assert store.days() == [DAY]
+    store.close()
@@ -0,0 +1,53 @@
+import os
+from datetime import date
+
+from parse_cache import ParseCache, converted_path, load_converted, map_day
+from traffic_convert import convert_file, main
+from traffic_core import ENGINES, available_engine, load_report, report_from_day
+from traffic_generator import generate_day
+from traffic_metrics import aggregate_file
+
+
+def _summary(report):
+    return (report.results(), list(report.vehicles_by_hour.items()), report.hourly_by_junction, report.rain_spans)
+
+
+def test_converted_days_give_the_same_report(tmp_path):
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 3000, seed=4)
+    expected = _summary(aggregate_file(file_name).report())
+
+    name, csv_size, packed_size = convert_file(file_name)
+    assert (name, csv_size) == (file_name, os.path.getsize(file_name))
+    assert packed_size == os.path.getsize(converted_path(file_name))
+    day = map_day(converted_path(file_name))
+    for engine in ENGINES:
+        engine = available_engine(engine)
+        assert _summary(report_from_day(day, engine=engine)) == expected, engine
+
+    os.remove(file_name)
+    assert load_converted(file_name) is not None
+    for engine in ENGINES:
+        cache = ParseCache(str(tmp_path / f"cache_{engine}"))
+        assert _summary(load_report(file_name, cache=cache, engine=available_engine(engine))) == expected, engine
+
+
+def test_changed_csv_files_are_parsed_again(tmp_path):
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 500, seed=4)
+    assert main(["--glob", str(tmp_path / "traffic_data*.csv")]) == 0
+    assert load_converted(file_name) is not None
+
+    generate_day(file_name, date(2024, 6, 15), 800, seed=5)
+    assert load_converted(file_name) is None
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert load_report(file_name, cache=cache).vehicle_count == 800
+
+
+def test_remove_csv_keeps_only_the_packed_copy(tmp_path):
+    file_name = str(tmp_path / "traffic_data15062024.csv")
+    generate_day(file_name, date(2024, 6, 15), 500, seed=4)
+    expected = _summary(aggregate_file(file_name).report())
+    assert main(["--glob", file_name, "--remove-csv", "--workers", "1"]) == 0
+    assert not os.path.exists(file_name) and os.path.exists(converted_path(file_name))
+    assert _summary(load_report(file_name, cache=ParseCache(str(tmp_path / "cache")))) == expected
@@ -0,0 +1,70 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from parse_cache import converted_path, parse_csv, write_day
+from traffic_core import date_range_files
+
+
+def convert_file(file_name, remove_csv=False):
+    """
+    Converts a traffic CSV file to a packed copy next to it, which every loader then maps instead of parsing
+    the CSV: categorical columns become vocabulary codes, times and speeds fixed-width integers.
+    Runs inside a worker process.
+    :param file_name: Path of the traffic CSV file
+    :param remove_csv: Delete the CSV file once the copy is written
+    :return: Tuple of (file name, CSV bytes, packed bytes), with None sizes if the file is missing
+    """
+    try:
+        stat = os.stat(file_name)
+        day = parse_csv(file_name)
+    except FileNotFoundError:
+        return file_name, None, None
+    path = converted_path(file_name)
+    write_day(day, path, {"path": os.path.abspath(file_name), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    if remove_csv:
+        os.remove(file_name)
+    return file_name, stat.st_size, os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert traffic CSV files to packed binary copies.")
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument("--range", nargs=2, metavar=("START", "END"), help="Inclusive date range as DDMMYYYY DDMMYYYY")
+    selection.add_argument("--glob", help="Glob pattern of CSV files, e.g. 'traffic_data*2024.csv'")
+    parser.add_argument("--directory", default=".", help="Directory holding the files for --range")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--remove-csv", action="store_true", help="Delete each CSV file after converting it")
+    args = parser.parse_args(argv)
+
+    if args.range:
+        try:
+            file_names = date_range_files(args.range[0], args.range[1], args.directory)
+        except ValueError:
+            parser.error("Dates must use the DDMMYYYY format.")
+    else:
+        file_names = glob.glob(args.glob)
+    if not file_names:
+        print("No files to convert.")
+        return 1
+
+    total_csv = total_packed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for file_name, csv_size, packed_size in pool.map(convert_file, sorted(file_names),
+                                                         [args.remove_csv] * len(file_names)):
+            if csv_size is None:
+                print(f"Error: No file found: {file_name}")
+                continue
+            total_csv += csv_size
+            total_packed += packed_size
+            print(f"{file_name}: {csv_size / 1e6:.1f} MB -> {packed_size / 1e6:.1f} MB")
+    if total_packed:
+        print(f"Converted {total_csv / 1e6:.1f} MB to {total_packed / 1e6:.1f} MB ({total_csv / total_packed:.1f}x smaller)")
+    return 0
+
+
+# Example: python traffic_convert.py --range 01062024 30062024 --remove-csv
+if __name__ == "__main__":
+    sys.exit(main())
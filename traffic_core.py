@@ -0,0 +1,85 @@
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+from instrumentation import stage
+from parse_cache import ParseCache
+from traffic_metrics import DEFAULT_METRICS, DayReport
+
+# NumPy is optional and slow to import, so the vectorized engine is imported on first use
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+ENGINES = ("python", "numpy")
+
+# Traffic files are named traffic_dataDDMMYYYY.csv
+DATE_FORMAT = "%d%m%Y"
+FILE_PREFIX = "traffic_data"
+
+
+def date_range_files(start, end, directory="."):
+    """
+    Lists the traffic CSV files for every date from start to end inclusive.
+    :param start: First date as a DDMMYYYY string
+    :param end: Last date as a DDMMYYYY string
+    :param directory: Directory holding the traffic_dataDDMMYYYY.csv files
+    """
+    day = datetime.strptime(start, DATE_FORMAT)
+    last = datetime.strptime(end, DATE_FORMAT)
+    file_names = []
+    while day <= last:
+        file_names.append(os.path.join(directory, f"{FILE_PREFIX}{day.strftime(DATE_FORMAT)}.csv"))
+        day += timedelta(days=1)
+    return file_names
+
+
+def file_date(file_name):
+    """
+    Extracts the date from a traffic_dataDDMMYYYY.csv file name.
+    :return: The date as a datetime, or None when the name does not carry one
+    """
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    try:
+        return datetime.strptime(stem[len(FILE_PREFIX):], DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def available_engine(engine):
+    """
+    Returns the engine to use, falling back to the per-row engine when NumPy is missing.
+    :param engine: "python" for the per-row reference loop or "numpy" for the vectorized engine
+    """
+    if engine == "numpy" and not HAS_NUMPY:
+        print("NumPy is not installed; falling back to the per-row engine.")
+        return "python"
+    return engine
+
+
+def load_report(file_name, date=None, cache=None, engine="python", metrics=None):
+    """
+    Aggregates one day of traffic data in a single pass.
+    Raises FileNotFoundError when the CSV file does not exist.
+    :param file_name: Path of the traffic CSV file
+    :param date: Date the file covers, as shown to the user
+    :param cache: ParseCache to load the parsed day through, a default one is used if omitted
+    :param engine: "python" or "numpy", as returned by available_engine
+    :param metrics: Optional MetricSet of per-site metrics, evaluated in the same pass
+    :return: The DayReport holding the summary metrics, hourly junction counts and rain intervals
+    """
+    return report_from_day((cache or ParseCache()).load(file_name), date, engine, metrics)
+
+
+def report_from_day(day, date=None, engine="python", metrics=None):
+    """
+    Aggregates an already parsed day, evaluating the daily metrics and any per-site ones in one pass.
+    :param day: ParsedDay, e.g. loaded through a ParseCache
+    :param date: Date the day covers, as shown to the user
+    :param engine: "python" or "numpy", as returned by available_engine
+    :param metrics: Optional MetricSet of per-site metrics; their values end up in DayReport.metrics
+    :return: The DayReport of the day
+    """
+    metric_set = DEFAULT_METRICS.extended(metrics)
+    with stage(f"aggregate.{engine}") as timed:
+        timed.add(rows=day.row_count)
+        values = metric_set.evaluate(day, engine)
+    return DayReport.from_values(date, values)
@@ -0,0 +1,140 @@
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from traffic_metrics import ELM_JUNCTION, HANLEY_JUNCTION
+
+COLUMNS = ("JunctionName", "Date", "timeOfDay", "travel_Direction_in", "travel_Direction_out", "Weather_Conditions",
+           "JunctionSpeedLimit", "VehicleSpeed", "VehicleType", "elctricHybrid")
+
+# Junction name to its speed limit
+JUNCTIONS = {ELM_JUNCTION: 30, HANLEY_JUNCTION: 40}
+
+# Vehicle type to relative frequency
+VEHICLE_MIX = {"Car": 50, "Truck": 8, "Buss": 4, "Van": 10, "Taxi": 8, "Motorcycle": 6, "Scooter": 6, "Bicycle": 8}
+
+# Weather condition to relative frequency of a run of that weather
+WEATHER_MIX = {"Clear": 40, "Overcast": 20, "Light Rain": 15, "Heavy Rain": 8, "Fog": 7, "Snow": 2, "Windy": 8}
+WEATHER_RUN_MINUTES = 45  # Mean length of a run of one weather condition
+
+# Relative traffic per hour of the day, with morning and evening peaks
+HOURLY_PROFILE = (2, 1, 1, 1, 2, 4, 8, 14, 16, 11, 9, 9, 10, 9, 9, 10, 13, 16, 14, 10, 7, 5, 4, 3)
+
+DIRECTIONS = ("N", "E", "S", "W")
+ELECTRIC_SHARE = 0.15
+WRITE_BATCH = 100_000  # Rows joined and written at a time
+
+
+def weather_runs(rng, weather_mix=WEATHER_MIX, run_minutes=WEATHER_RUN_MINUTES):
+    """
+    Splits one day into runs of weather, each lasting an exponentially distributed number of minutes.
+    :return: List of (start second, condition) tuples covering the day, in time order
+    """
+    conditions = list(weather_mix)
+    weights = list(weather_mix.values())
+    runs = []
+    second = 0
+    while second < 86400:
+        runs.append((second, rng.choices(conditions, weights)[0]))
+        second += max(60, int(rng.expovariate(1 / (run_minutes * 60))))
+    return runs
+
+
+def hourly_row_counts(rows, profile=HOURLY_PROFILE):
+    """
+    Spreads a number of rows over the 24 hours following a traffic profile, summing exactly to rows.
+    """
+    total = sum(profile)
+    bounds = [rows * weight // total for weight in accumulate(profile)]
+    bounds[-1] = rows
+    return [end - start for start, end in zip([0] + bounds[:-1], bounds)]
+
+
+def generate_day(file_name, day, rows, seed=0, junctions=None, vehicle_mix=None, weather_mix=None,
+                 weather_run_minutes=WEATHER_RUN_MINUTES):
+    """
+    Writes one day of synthetic traffic in the traffic_dataDDMMYYYY.csv schema, rows in time order.
+    The same arguments always produce the same file.
+    :param file_name: Path of the CSV file to write
+    :param day: The date written in the Date column, as a date or datetime
+    :param rows: Number of data rows
+    :param seed: Seed combined with the date, so each day of a range differs
+    :param junctions: Dictionary of junction name to speed limit, JUNCTIONS by default
+    :param vehicle_mix: Dictionary of vehicle type to relative frequency, VEHICLE_MIX by default
+    :param weather_mix: Dictionary of weather condition to relative frequency, WEATHER_MIX by default
+    :param weather_run_minutes: Mean length in minutes of a run of one weather condition
+    """
+    rng = random.Random(seed * 1_000_003 + day.toordinal())
+    junctions = junctions or JUNCTIONS
+    vehicle_mix = vehicle_mix or VEHICLE_MIX
+    junction_names = list(junctions)
+    vehicle_types = list(vehicle_mix)
+    vehicle_weights = list(accumulate(vehicle_mix.values()))
+    runs = weather_runs(rng, weather_mix or WEATHER_MIX, weather_run_minutes)
+    date_text = day.strftime("%d/%m/%Y")
+    # Pre-format every time of day once
+    times = [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}" for second in range(86400)]
+
+    with open(file_name, "w", newline="") as file:
+        file.write(",".join(COLUMNS) + "\n")
+        run = 0
+        for hour, count in enumerate(hourly_row_counts(rows)):
+            written = 0
+            while written < count:
+                size = min(WRITE_BATCH, count - written)
+                seconds = [hour * 3600 + (written + i) * 3600 // count for i in range(size)]
+                names = rng.choices(junction_names, k=size)
+                types = rng.choices(vehicle_types, cum_weights=vehicle_weights, k=size)
+                directions_in = rng.choices(DIRECTIONS, k=size)
+                directions_out = rng.choices(DIRECTIONS, k=size)
+                lines = []
+                for i in range(size):
+                    second = seconds[i]
+                    while run + 1 < len(runs) and runs[run + 1][0] <= second:
+                        run += 1
+                    limit = junctions[names[i]]
+                    # Most vehicles keep close to the limit, a tail goes over it
+                    speed = max(5, int(rng.gauss(limit - 3, 6)))
+                    electric = "True" if rng.random() < ELECTRIC_SHARE else "False"
+                    lines.append(f"{names[i]},{date_text},{times[second]},{directions_in[i]},{directions_out[i]},"
+                                 f"{runs[run][1]},{limit},{speed},{types[i]},{electric}\n")
+                file.writelines(lines)
+                written += size
+
+
+def _parse_mix(values, cast):
+    mix = {}
+    for value in values:
+        name, _, weight = value.rpartition(":")
+        mix[name] = cast(weight)
+    return mix
+
+
+# Example: python traffic_generator.py 01062024 07062024 --rows 100000 --directory data
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic traffic_dataDDMMYYYY.csv files.")
+    parser.add_argument("start", metavar="DDMMYYYY")
+    parser.add_argument("end", metavar="DDMMYYYY", nargs="?", help="Last date, the first date when omitted")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per day")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", default=".")
+    parser.add_argument("--junction", action="append", metavar="NAME:LIMIT", help="Junction and speed limit, repeatable")
+    parser.add_argument("--vehicle", action="append", metavar="TYPE:WEIGHT", help="Vehicle type and weight, repeatable")
+    parser.add_argument("--weather", action="append", metavar="CONDITION:WEIGHT", help="Weather and weight, repeatable")
+    parser.add_argument("--weather-run", type=float, default=WEATHER_RUN_MINUTES, help="Mean weather run in minutes")
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    current = datetime.strptime(args.start, "%d%m%Y")
+    last = datetime.strptime(args.end or args.start, "%d%m%Y")
+    while current <= last:
+        path = os.path.join(args.directory, f"traffic_data{current.strftime('%d%m%Y')}.csv")
+        generate_day(path, current, args.rows, args.seed,
+                     _parse_mix(args.junction, int) if args.junction else None,
+                     _parse_mix(args.vehicle, float) if args.vehicle else None,
+                     _parse_mix(args.weather, float) if args.weather else None,
+                     args.weather_run)
+        print(f"Wrote {args.rows} rows to {path}")
+        current += timedelta(days=1)
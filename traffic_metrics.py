@@ -0,0 +1,229 @@
+from array import array
+
+from instrumentation import stage
+from metric_registry import HOUR, Count, Is, Less, MetricSet, Same, Spans
+from parse_cache import CHUNK_SIZE, ColumnEncoder, read_chunks
+from rain_intervals import merge_spans, total_seconds
+
+ELM_JUNCTION = "Elm Avenue/Rabbit Road"
+HANLEY_JUNCTION = "Hanley Highway/Westway"
+RAIN_CONDITIONS = ('Light Rain', 'Heavy Rain')
+TWO_WHEELED_TYPES = ('Bicycle', 'Motorcycle', 'Scooter')
+
+# Every metric of a DayReport; per-site metrics are evaluated alongside them in the same pass
+DEFAULT_METRICS = MetricSet([
+    Count('vehicle_count'),
+    Count('truck_count', Is('VehicleType', 'Truck')),
+    Count('elec_count', Is('elctricHybrid', 'True')),
+    Count('two_wheeled_vehicle_count', Is('VehicleType', *TWO_WHEELED_TYPES)),
+    Count('buses_heading_north_count', Is('VehicleType', 'Buss'), Is('JunctionName', ELM_JUNCTION),
+          Is('travel_Direction_out', 'N')),
+    Count('no_turn_count', Same('travel_Direction_in', 'travel_Direction_out')),
+    Count('bicycle_count', Is('VehicleType', 'Bicycle')),
+    Count('over_speed_limit_count', Less('JunctionSpeedLimit', 'VehicleSpeed')),
+    Count('elm_junction_count', Is('JunctionName', ELM_JUNCTION)),
+    Count('hanley_junction_count', Is('JunctionName', HANLEY_JUNCTION)),
+    Count('elm_junc_scooter_count', Is('JunctionName', ELM_JUNCTION), Is('VehicleType', 'Scooter')),
+    Count('vehicles_by_hour', Is('JunctionName', HANLEY_JUNCTION), by=HOUR),
+    Count('hourly_by_junction', by=('JunctionName', HOUR)),
+    Spans('rain_spans', Is('Weather_Conditions', *RAIN_CONDITIONS), by='JunctionName'),
+])
+
+
+class TrafficAggregator:
+    def __init__(self, columns, metrics=None, engine="python", keep_columns=False):
+        """
+        Initializes the running totals of the daily traffic metrics. Each chunk of lines is encoded into
+        typed columns and evaluated by the compiled metric set, so rows are never compared as strings.
+        :param columns: Column names from the CSV header, in file order
+        :param metrics: Optional MetricSet of per-site metrics, evaluated in the same pass
+        :param engine: "python" for the compiled per-row loop or "numpy" for masked reductions
+        :param keep_columns: Also keep the encoded columns, so parsed_day() can return them for caching
+        """
+        self.encoder = ColumnEncoder(columns)
+        self.metric_set = DEFAULT_METRICS.extended(metrics)
+        self.state = self.metric_set.state(engine)
+        self.columns = {name: array('i') for name in self.encoder.names} if keep_columns else None
+
+    @property
+    def vehicle_count(self):
+        return self.state.row_count
+
+    def add_lines(self, lines):
+        """
+        Encodes a chunk of raw CSV lines and feeds it through every metric.
+        :param lines: Data lines (without the header) as a file yields them, each ending with its newline
+                      except possibly the last line of the file
+        """
+        self.add_columns(*self.encoder.encode(lines))
+
+    def add_columns(self, columns, row_count):
+        """
+        Feeds a chunk of encoded columns, as returned by ColumnEncoder.encode, through every metric.
+        """
+        self.state.add(columns, self.encoder.vocabularies, row_count)
+        if self.columns is not None:
+            for name, data in columns.items():
+                self.columns[name].extend(data)
+
+    def report(self, date=None):
+        """
+        Returns a DayReport snapshot of the accumulated rows.
+        :param date: Date the rows belong to, as shown to the user
+        """
+        return DayReport.from_values(date, self.state.values(self.encoder.vocabularies))
+
+    def parsed_day(self):
+        """
+        Returns the ParsedDay of every row added, when the aggregator keeps its columns.
+        """
+        return self.encoder.parsed_day(self.columns, self.state.row_count)
+
+    def results(self):
+        """
+        Returns the formatted result lines for the accumulated rows.
+        """
+        return self.report().results()
+
+
+COUNTER_NAMES = (
+    'vehicle_count', 'truck_count', 'elec_count', 'two_wheeled_vehicle_count', 'buses_heading_north_count',
+    'no_turn_count', 'bicycle_count', 'over_speed_limit_count', 'elm_junction_count', 'hanley_junction_count',
+    'elm_junc_scooter_count',
+)
+
+
+class DayReport:
+    def __init__(self, date, counts, vehicles_by_hour, hourly_by_junction, rain_spans, metrics=None):
+        """
+        Initializes the aggregated result of one pass over a day of traffic data.
+        :param date: Date the report covers, as shown to the user
+        :param counts: Dictionary holding a value for every name in COUNTER_NAMES
+        :param vehicles_by_hour: Hanley Highway/Westway vehicles per "HH" hour, in order of first appearance
+        :param hourly_by_junction: Dictionary of junction name to its 24 hourly vehicle counts
+        :param rain_spans: Dictionary of junction name to its (start, end) rain spans in seconds since midnight
+        :param metrics: Dictionary of per-site metric name to its value, empty when none were registered
+        """
+        self.date = date
+        for name in COUNTER_NAMES:
+            setattr(self, name, counts[name])
+        self.vehicles_by_hour = vehicles_by_hour
+        self.hourly_by_junction = hourly_by_junction
+        self.rain_spans = rain_spans
+        self.metrics = metrics or {}
+
+    @classmethod
+    def from_values(cls, date, values):
+        """
+        Builds a report from the values of DEFAULT_METRICS, extended or not, as MetricSet.evaluate returns.
+        The values of metrics outside DEFAULT_METRICS end up in DayReport.metrics.
+        """
+        metrics = {name: value for name, value in values.items() if name not in DEFAULT_METRICS.metrics}
+        return cls(date, values, values['vehicles_by_hour'], values['hourly_by_junction'], values['rain_spans'],
+                   metrics)
+
+    @property
+    def truck_percentage(self):
+        return round((self.truck_count * 100) / self.vehicle_count) if self.vehicle_count else 0
+
+    @property
+    def avg_bike_per_hour(self):
+        return round(self.bicycle_count / 24)
+
+    @property
+    def elm_junc_scooter_percentage(self):
+        return int((self.elm_junc_scooter_count * 100) / self.elm_junction_count) if self.elm_junction_count else 0
+
+    @property
+    def peak_hour(self):
+        """
+        Returns the busiest Hanley Highway/Westway hour as an ("HH", count) tuple.
+        """
+        return max(self.vehicles_by_hour.items(), key=lambda x: x[1]) if self.vehicles_by_hour else ('0', 0)
+
+    @property
+    def rain_intervals(self):
+        """
+        Returns the periods during which it rained at any junction, as sorted (start, end) seconds.
+        """
+        return merge_spans(span for spans in self.rain_spans.values() for span in spans)
+
+    @property
+    def rain_seconds(self):
+        return total_seconds(self.rain_spans)
+
+    @property
+    def rain_hours(self):
+        return self.rain_seconds // 3600
+
+    @property
+    def rain_minutes(self):
+        return self.rain_seconds // 60 % 60
+
+    def hourly_counts(self, junction):
+        """
+        Returns the 24 hourly vehicle counts for a junction, all zero if it recorded no vehicles.
+        """
+        return self.hourly_by_junction.get(junction, [0] * 24)
+
+    def results(self):
+        """
+        Returns the formatted result lines for the report.
+        """
+        return format_results(self)
+
+
+def format_results(report):
+    """
+    Formats the daily metric counts as the result lines shown to the user.
+    :param report: DayReport to format
+    """
+    peak_hour = report.peak_hour
+    formatted_peak_hours = f"Between {peak_hour[0]}:00 and {int(peak_hour[0]) + 1}:00"
+    formatted_rain_duration = f"{report.rain_hours} hours and {report.rain_minutes} minutes"
+
+    return [
+        f"The total number of vehicles recorded for this date is {report.vehicle_count}",
+        f"The total number of trucks recorded for this date is {report.truck_count}",
+        f"The total number of electric vehicles for this date is {report.elec_count}",
+        f"The total number of two-wheeled vehicles for this date is {report.two_wheeled_vehicle_count}",
+        f"The total number of Buses leaving Elm Avenue/Rabbit Road heading North is {report.buses_heading_north_count}",
+        f"The total number of vehicles through both junctions not turning left or right is {report.no_turn_count}",
+        f"The percentage of all vehicles recorded that are Trucks for this date is {report.truck_percentage}%",
+        f"The average number of Bikes per hour for this date is {report.avg_bike_per_hour}",
+        f"The total number of vehicles recorded as over the speed limit for this date is {report.over_speed_limit_count}",
+        f"The total number of vehicles recorded through Elm Avenue/Rabbit Road junction is {report.elm_junction_count}",
+        f"The total number of vehicles recorded through Hanley Highway/Westway junction is {report.hanley_junction_count}",
+        f"{report.elm_junc_scooter_percentage}% of vehicles recorded through Elm Avenue/Rabbit Road are scooters.",
+        f"The highest number of vehicles in an hour on Hanley Highway/Westway is {peak_hour[1]}",
+        f"The most vehicles through Hanley Highway/Westway were recorded {formatted_peak_hours}",
+        f"The number of hours of rain for this date is {formatted_rain_duration}"
+    ] + [f"{name}: {value}" for name, value in report.metrics.items()]
+
+
+def aggregate_file(file_name, chunk_size=CHUNK_SIZE, metrics=None, engine="python", cache=None, progress=None):
+    """
+    Streams a traffic CSV file through a TrafficAggregator.
+    :param file_name: Path of the CSV file
+    :param chunk_size: Approximate number of bytes read per chunk
+    :param metrics: Optional MetricSet of per-site metrics
+    :param engine: "python" or "numpy"
+    :param cache: Optional ParseCache; the encoded columns are kept and stored in it once the whole file is
+                  read, so the next load of the day skips the CSV file
+    :param progress: Optional function called after each chunk as progress(characters read, aggregator)
+    :return: The filled TrafficAggregator
+    """
+    source = cache.source(file_name) if cache is not None else None
+    with open(file_name, 'r') as file:
+        aggregator = TrafficAggregator(file.readline().strip().split(','), metrics, engine, keep_columns=bool(cache))
+        consumed = 0
+        for lines in read_chunks(file, chunk_size):
+            with stage("aggregate.stream") as timed:
+                aggregator.add_lines(lines)
+                timed.add(rows=len(lines))
+            if progress is not None:
+                consumed += sum(map(len, lines))
+                progress(consumed, aggregator)
+    if cache is not None:
+        cache.store(aggregator.parsed_day(), source)
+    return aggregator